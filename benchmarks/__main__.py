@@ -0,0 +1,51 @@
+import sys
+import typing as t
+
+import click
+
+from benchmarks.runner import Benchmark, BenchmarkResult, dump_results, format_result, load_results, run_benchmark
+
+
+@click.command("benchmarks")
+@click.option("-k", "--filter", "patterns", type=str, multiple=True,
+              help="run only the benchmarks which names contain any of the patterns")
+@click.option("--suite", "suites", type=click.Choice(["micro", "macro"]), multiple=True)
+@click.option("--scale", type=click.FloatRange(min=0.0, min_open=True), default=1.0,
+              help="multiplier of the number of operations of each benchmark")
+@click.option("-o", "--output", type=click.File("w"), default=None, help="write the results as JSON")
+@click.option("--compare", "baseline", type=click.File("r"), default=None,
+              help="compare with the results of the previous run")
+def main(
+        patterns: t.Sequence[str],
+        suites: t.Sequence[str],
+        scale: float,
+        output: t.Optional[t.TextIO],
+        baseline: t.Optional[t.TextIO],
+) -> None:
+    benchmarks: t.List[Benchmark] = []
+
+    if not suites or "micro" in suites:
+        from benchmarks import micro
+        benchmarks.extend(micro.create_benchmarks(max(1, int(100_000 * scale))))
+
+    if not suites or "macro" in suites:
+        from benchmarks import macro
+        benchmarks.extend(macro.create_benchmarks(max(1, int(2_000 * scale))))
+
+    baseline_results = load_results(baseline) if baseline is not None else {}
+    results: t.List[BenchmarkResult] = []
+
+    for benchmark in benchmarks:
+        if patterns and not any(pattern in benchmark.name for pattern in patterns):
+            continue
+
+        result = run_benchmark(benchmark, warmup=max(1, benchmark.operations // 10))
+        results.append(result)
+        click.echo(format_result(result, baseline_results.get(result.name)), file=sys.stderr)
+
+    if output is not None:
+        dump_results(results, output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import asyncio
+import typing as t
+from time import perf_counter_ns
+
+from benchmarks.runner import BenchmarkFunc
+
+Message = t.MutableMapping[str, object]
+ASGIApp = t.Callable[
+    [Message, t.Callable[[], t.Awaitable[Message]], t.Callable[[Message], t.Awaitable[None]]],
+    t.Awaitable[None],
+]
+RequestFactory = t.Callable[[int], t.Tuple[str, str, bytes]]
+
+
+class ASGIClient:
+    """Sends HTTP requests directly to the ASGI app, without network and server in between."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.__app = app
+
+    async def request(self, method: str, path: str, body: bytes = b"") -> t.Tuple[int, bytes]:
+        scope: Message = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": [
+                (b"host", b"benchmark"),
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": ("benchmark", 80),
+        }
+        request_sent = False
+        status = 0
+        chunks: t.List[bytes] = []
+
+        async def receive() -> Message:
+            nonlocal request_sent
+
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+
+            return {"type": "http.disconnect"}
+
+        async def send(message: Message) -> None:
+            nonlocal status
+
+            if message["type"] == "http.response.start":
+                status = t.cast(int, message["status"])
+
+            elif message["type"] == "http.response.body":
+                chunks.append(t.cast(bytes, message.get("body", b"")))
+
+        await self.__app(scope, receive, send)
+
+        return status, b"".join(chunks)
+
+
+def measure_concurrently(app: ASGIApp, make_request: RequestFactory, concurrency: int) -> BenchmarkFunc:
+    """Makes a benchmark func that sends the requests from `concurrency` concurrent clients."""
+
+    def run(operations: int) -> t.Sequence[int]:
+        async def main() -> t.Sequence[int]:
+            client = ASGIClient(app)
+            latencies: t.List[int] = []
+            indexes = iter(range(operations))
+
+            async def send_requests() -> None:
+                for index in indexes:
+                    method, path, body = make_request(index)
+
+                    start = perf_counter_ns()
+                    status, content = await client.request(method, path, body)
+                    latencies.append(perf_counter_ns() - start)
+
+                    if status >= 400:
+                        raise RuntimeError("unexpected response", method, path, status, content)
+
+            await asyncio.gather(*(send_requests() for _ in range(concurrency)))
+
+            return latencies
+
+        return asyncio.run(main())
+
+    return run
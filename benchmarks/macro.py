@@ -0,0 +1,91 @@
+import json
+import typing as t
+from pathlib import Path
+
+# noinspection PyPackageRequirements
+from fastapi import FastAPI
+# noinspection PyPackageRequirements
+from uvicorn import Config
+
+from benchmarks.asgi import ASGIApp, measure_concurrently
+from benchmarks.runner import Benchmark
+from examples.myproject.models import FooModel
+from ml2service.models.base import Model
+from ml2service.models.loader import EntrypointLoader, ModuleInfo
+from ml2service.services.base import ModelService, TrainRequest
+from ml2service.services.dynamic import DynamicModelService
+from ml2service.services.runners.fastapi.factory import FastAPIServiceRunnerFactory
+from ml2service.services.static import StaticModelService
+from ml2service.storages.in_memory import InMemoryStorage
+
+KEYS: t.Final[int] = 100
+CONCURRENCY_LEVELS: t.Final[t.Sequence[int]] = (1, 16)
+
+
+def create_app(service: ModelService, info: ModuleInfo[object, object, object]) -> ASGIApp:
+    apps: t.List[FastAPI] = []
+
+    def make_config(app: FastAPI) -> Config:
+        apps.append(app)
+        return Config(app)
+
+    FastAPIServiceRunnerFactory(info=info, server_config_factory=make_config).create_service_runner(service)
+
+    return t.cast(ASGIApp, apps[0])
+
+
+def create_dynamic_benchmarks(operations: int) -> t.Sequence[Benchmark]:
+    info = EntrypointLoader().load("examples.myproject.models:FooDynamicModelTrainer", [])
+    storage: InMemoryStorage[object, Model[object, object]] = InMemoryStorage()
+    service = DynamicModelService(info.trainer, storage)
+    for i in range(KEYS):
+        service.train(TrainRequest(key=f"foo-{i}", input_=i))
+
+    app = create_app(service, info)
+    body = json.dumps(2).encode()
+    batch_body = json.dumps(list(range(32))).encode()
+
+    benchmarks: t.List[Benchmark] = []
+    for concurrency in CONCURRENCY_LEVELS:
+        benchmarks.extend([
+            Benchmark(
+                f"macro.http.dynamic.predict.c{concurrency}",
+                measure_concurrently(app, lambda i: ("POST", f"/foo-{i % KEYS}/", body), concurrency),
+                operations,
+            ),
+            Benchmark(
+                f"macro.http.dynamic.predict_batch32.c{concurrency}",
+                measure_concurrently(app, lambda i: ("POST", f"/foo-{i % KEYS}/batch", batch_body), concurrency),
+                operations,
+            ),
+            Benchmark(
+                f"macro.http.dynamic.train.c{concurrency}",
+                measure_concurrently(app, lambda i: ("PUT", f"/bar-{i % KEYS}/", json.dumps(i).encode()),
+                                     concurrency),
+                operations,
+            ),
+        ])
+
+    return benchmarks
+
+
+def create_static_benchmarks(operations: int) -> t.Sequence[Benchmark]:
+    info = EntrypointLoader().load("examples.myproject.models:FooStaticModelTrainer", [])
+    model = info.trainer.train(Path(__file__).parent.parent / "src" / "examples" / "myproject" / "data.json")
+    assert isinstance(model, FooModel)
+
+    app = create_app(StaticModelService(model), info)
+    body = json.dumps(2).encode()
+
+    return [
+        Benchmark(
+            f"macro.http.static.predict.c{concurrency}",
+            measure_concurrently(app, lambda i: ("POST", "/", body), concurrency),
+            operations,
+        )
+        for concurrency in CONCURRENCY_LEVELS
+    ]
+
+
+def create_benchmarks(operations: int) -> t.Sequence[Benchmark]:
+    return [*create_dynamic_benchmarks(operations), *create_static_benchmarks(operations)]
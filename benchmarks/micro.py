@@ -0,0 +1,55 @@
+import typing as t
+
+from benchmarks.runner import Benchmark, measure_each
+from examples.myproject.models import FooDynamicModelTrainer, FooModel
+from ml2service.models.base import Model
+from ml2service.serializers.pickle import PickleSerializer
+from ml2service.services.base import PredictRequest, TrainRequest
+from ml2service.services.dynamic import DynamicModelService
+from ml2service.services.static import StaticModelService
+from ml2service.storages.in_memory import InMemoryStorage
+from ml2service.storages.memoize import MemoizeStorage
+from ml2service.storages.serialized import SerializedStorage
+
+FooStorage = InMemoryStorage[str, Model[int, int]]
+
+
+def create_storage_benchmarks(operations: int) -> t.Sequence[Benchmark]:
+    in_memory: FooStorage = InMemoryStorage({"foo": FooModel(3)})
+    memoize = MemoizeStorage(InMemoryStorage({"foo": FooModel(3)}))
+    serialized: SerializedStorage[str, Model[int, int]] = SerializedStorage(InMemoryStorage(), PickleSerializer())
+    serialized.update("foo", FooModel(3))
+
+    return [
+        Benchmark("micro.storage.in_memory.get", measure_each(lambda: in_memory.get("foo")), operations),
+        Benchmark("micro.storage.in_memory.update", measure_each(lambda: in_memory.update("bar", FooModel(2))),
+                  operations),
+        Benchmark("micro.storage.memoize.get", measure_each(lambda: memoize.get("foo")), operations),
+        Benchmark("micro.storage.memoize.update", measure_each(lambda: memoize.update("bar", FooModel(2))),
+                  operations),
+        Benchmark("micro.storage.serialized.get", measure_each(lambda: serialized.get("foo")), operations),
+        Benchmark("micro.storage.serialized.update", measure_each(lambda: serialized.update("bar", FooModel(2))),
+                  operations),
+    ]
+
+
+def create_service_benchmarks(operations: int) -> t.Sequence[Benchmark]:
+    storage: FooStorage = InMemoryStorage()
+    dynamic = DynamicModelService(FooDynamicModelTrainer(), storage)
+    dynamic.train(TrainRequest(key="foo", input_=3))
+    static: StaticModelService[str, int, int] = StaticModelService(FooModel(3))
+
+    predict_request = PredictRequest(key="foo", input_=2)
+    train_request = TrainRequest(key="bar", input_=3)
+
+    return [
+        Benchmark("micro.service.dynamic.predict", measure_each(lambda: dynamic.predict(predict_request)),
+                  operations),
+        Benchmark("micro.service.dynamic.train", measure_each(lambda: dynamic.train(train_request)), operations),
+        Benchmark("micro.service.static.predict", measure_each(lambda: static.predict(predict_request)),
+                  operations),
+    ]
+
+
+def create_benchmarks(operations: int) -> t.Sequence[Benchmark]:
+    return [*create_storage_benchmarks(operations), *create_service_benchmarks(operations)]
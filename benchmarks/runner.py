@@ -0,0 +1,113 @@
+import gc
+import json
+import platform
+import statistics
+import sys
+import typing as t
+from dataclasses import asdict, dataclass
+from time import perf_counter_ns
+
+BenchmarkFunc = t.Callable[[int], t.Sequence[int]]
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    """
+    A named benchmark: `func` performs the specified number of operations and returns the latency of each one in
+    nanoseconds (operations may run concurrently, so the latencies don't have to sum up to the elapsed time).
+    """
+
+    name: str
+    func: BenchmarkFunc
+    operations: int
+
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    name: str
+    operations: int
+    elapsed_s: float
+    throughput_ops: float
+    mean_us: float
+    p50_us: float
+    p99_us: float
+    max_us: float
+
+
+def measure_each(op: t.Callable[[], object]) -> BenchmarkFunc:
+    """Makes a benchmark func that runs the operation sequentially and measures each run."""
+
+    def run(operations: int) -> t.Sequence[int]:
+        latencies: t.List[int] = []
+
+        for _ in range(operations):
+            start = perf_counter_ns()
+            op()
+            latencies.append(perf_counter_ns() - start)
+
+        return latencies
+
+    return run
+
+
+def percentile(sorted_values: t.Sequence[int], q: float) -> int:
+    index = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_benchmark(benchmark: Benchmark, warmup: int) -> BenchmarkResult:
+    benchmark.func(warmup)
+
+    # collector pauses would be attributed to random operations, collect before the measurement instead
+    gc.collect()
+    start = perf_counter_ns()
+    latencies = sorted(benchmark.func(benchmark.operations))
+    elapsed_ns = perf_counter_ns() - start
+
+    return BenchmarkResult(
+        name=benchmark.name,
+        operations=len(latencies),
+        elapsed_s=elapsed_ns / 1e9,
+        throughput_ops=len(latencies) / (elapsed_ns / 1e9) if elapsed_ns > 0 else float("inf"),
+        mean_us=statistics.fmean(latencies) / 1e3,
+        p50_us=percentile(latencies, 0.50) / 1e3,
+        p99_us=percentile(latencies, 0.99) / 1e3,
+        max_us=latencies[-1] / 1e3,
+    )
+
+
+def dump_results(results: t.Sequence[BenchmarkResult], stream: t.TextIO) -> None:
+    json.dump(
+        {
+            "python": sys.version,
+            "platform": platform.platform(),
+            "results": [asdict(result) for result in results],
+        },
+        stream,
+        indent=2,
+    )
+    stream.write("\n")
+
+
+def load_results(stream: t.TextIO) -> t.Mapping[str, BenchmarkResult]:
+    data = t.cast(t.Mapping[str, t.Sequence[t.Mapping[str, t.Union[str, int, float]]]], json.load(stream))
+
+    return {
+        t.cast(str, item["name"]): BenchmarkResult(**item)  # type: ignore[arg-type]
+        for item in data["results"]
+    }
+
+
+def format_result(result: BenchmarkResult, baseline: t.Optional[BenchmarkResult]) -> str:
+    line = (
+        f"{result.name:<48} {result.throughput_ops:>12.0f} ops/s"
+        f"  p50 {result.p50_us:>10.2f} us  p99 {result.p99_us:>10.2f} us"
+    )
+
+    if baseline is not None:
+        line += (
+            f"  ({result.throughput_ops / baseline.throughput_ops - 1.0:+.1%} ops/s,"
+            f" {result.p99_us / baseline.p99_us - 1.0:+.1%} p99)"
+        )
+
+    return line
@@ -4,15 +4,42 @@ from pathlib import Path
 
 import click
 
-from ml2service.models.base import Model
+from ml2service.executors.base import ModelExecutor
+from ml2service.executors.inline import InlineModelExecutor
+from ml2service.executors.instrumented import InstrumentedModelExecutor
+from ml2service.executors.process_pool import ProcessPoolModelExecutor
+from ml2service.executors.thread_pool import ThreadPoolModelExecutor
+from ml2service.executors.traced import TracedModelExecutor
+from ml2service.models.base import IncrementalModelTrainer, Model
 from ml2service.models.loader import EntrypointLoader, ModuleInfo
+from ml2service.models.snapshot import ModelSnapshotCache
+from ml2service.monitoring.metrics import ServiceMetrics, make_prefix_key_classifier
+from ml2service.monitoring.tracing import JsonLinesSpanExporter, Tracer
+from ml2service.serializers.base import Buffer
+from ml2service.serializers.pickle import Compression, PickleSerializer
+from ml2service.services.admission import AdmissionOptions
 from ml2service.services.base import ModelService
+from ml2service.services.batching import BatchingOptions
 from ml2service.services.dynamic import DynamicModelService
+from ml2service.services.jobs import TrainingJobOptions
+from ml2service.services.prediction_cache import PredictionCacheOptions
+from ml2service.services.remote import RemoteModelService
+from ml2service.services.routing import RoutingModelService
 from ml2service.services.runners.base import ServiceRunner
 from ml2service.services.static import StaticModelService
 from ml2service.storages.base import Storage
+from ml2service.storages.file import FileStorage
 from ml2service.storages.in_memory import InMemoryStorage
+from ml2service.storages.instrumented import InstrumentedStorage
+from ml2service.storages.lru_cache import LRUCacheStorage
 from ml2service.storages.memoize import MemoizeStorage
+from ml2service.storages.serialized import SerializedStorage
+from ml2service.storages.sharded import ShardedStorage
+from ml2service.storages.sqlite import SQLiteStorage
+from ml2service.storages.traced import TracedStorage
+
+K = t.TypeVar("K")
+V = t.TypeVar("V")
 
 
 @dataclass()
@@ -20,6 +47,11 @@ class CLIContext:
     info: t.Optional[ModuleInfo[object, object, object]] = None
     service: t.Optional[ModelService] = None
     runner: t.Optional[ServiceRunner] = None
+    train_jobs_enabled: bool = False
+    metrics: t.Optional[ServiceMetrics] = None
+    tracer: t.Optional[Tracer] = None
+    # the service keeps no process local state, so it may be served by several processes
+    multiprocess_safe: bool = False
 
 
 @click.group("ml2service")
@@ -51,8 +83,26 @@ def show_info(context: CLIContext) -> None:
 
 
 @cli.group("run")
-def run() -> None:
-    pass
+@click.option("--metrics/--no-metrics", "metrics_enabled", is_flag=True, default=False)
+@click.option("--metrics-key-separator", type=str, default=None)
+@click.option("--trace-sample-ratio", type=click.FloatRange(min=0.0, max=1.0), default=None)
+@click.option("--trace-output", type=click.File("a", lazy=False), default="-")
+@click.pass_obj
+def run(
+        context: CLIContext,
+        metrics_enabled: bool,
+        metrics_key_separator: t.Optional[str],
+        trace_sample_ratio: t.Optional[float],
+        trace_output: t.TextIO,
+) -> None:
+    if metrics_enabled:
+        context.metrics = ServiceMetrics(
+            key_classifier=make_prefix_key_classifier(metrics_key_separator)
+            if metrics_key_separator is not None else None,
+        )
+
+    if trace_sample_ratio is not None:
+        context.tracer = Tracer(JsonLinesSpanExporter(trace_output), sample_ratio=trace_sample_ratio)
 
 
 @run.result_callback()
@@ -62,11 +112,70 @@ def start_service_runner(context: CLIContext, *_: object, **__: object) -> None:
         context.runner.start()
 
 
+def make_batching_options(max_batch_size: t.Optional[int], max_wait_ms: float) -> t.Optional[BatchingOptions]:
+    return BatchingOptions(max_batch_size, max_wait_ms) if max_batch_size is not None else None
+
+
+def make_executor(kind: str, workers: t.Optional[int], context: CLIContext) -> ModelExecutor:
+    executor: ModelExecutor = (
+        ThreadPoolModelExecutor(workers) if kind == "thread"
+        else ProcessPoolModelExecutor(workers) if kind == "process"
+        else InlineModelExecutor()
+    )
+
+    if context.metrics is not None:
+        executor = InstrumentedModelExecutor(executor, context.metrics)
+
+    if context.tracer is not None:
+        executor = TracedModelExecutor(executor, context.tracer)
+
+    return executor
+
+
+def trace_storage(storage: Storage[K, V], context: CLIContext, name: str) -> Storage[K, V]:
+    return TracedStorage(storage, context.tracer, name) if context.tracer is not None else storage
+
+
+executor_option = click.option("--executor", "executor_kind", type=click.Choice(["inline", "thread", "process"]),
+                               default="inline")
+workers_option = click.option("--workers", type=click.IntRange(min=1), default=None)
+prediction_cache_option = click.option("--prediction-cache-size", type=click.IntRange(min=1), default=None)
+
+
+def shard_storages(shards: t.Mapping[str, Storage[K, V]], virtual_nodes: int) -> Storage[K, V]:
+    if len(shards) == 1:
+        return next(iter(shards.values()))
+
+    return ShardedStorage(shards, virtual_nodes)
+
+
+def make_prediction_cache_options(max_entries: t.Optional[int]) -> t.Optional[PredictionCacheOptions]:
+    return PredictionCacheOptions(max_entries) if max_entries is not None else None
+
+
 @run.group("static")
 @click.argument("input", type=click.Path(exists=True, resolve_path=True, path_type=Path))
+@click.option("--batch-size", "max_batch_size", type=click.IntRange(min=1), default=None)
+@click.option("--batch-wait-ms", "max_wait_ms", type=click.FloatRange(min=0.0), default=5.0)
+@executor_option
+@workers_option
+@prediction_cache_option
+@click.option("--snapshot/--no-snapshot", "snapshot_enabled", is_flag=True, default=False)
+@click.option("--snapshot-dir", type=click.Path(file_okay=False, resolve_path=True, path_type=Path), default=None)
 @click.pass_obj
 @click.pass_context
-def run_static(click_context: click.Context, context: CLIContext, input: Path) -> None:
+def run_static(
+        click_context: click.Context,
+        context: CLIContext,
+        input: Path,
+        max_batch_size: t.Optional[int],
+        max_wait_ms: float,
+        executor_kind: str,
+        workers: t.Optional[int],
+        prediction_cache_size: t.Optional[int],
+        snapshot_enabled: bool,
+        snapshot_dir: t.Optional[Path],
+) -> None:
     info = context.info
     assert info is not None
 
@@ -75,30 +184,223 @@ def run_static(click_context: click.Context, context: CLIContext, input: Path) -
         # FIXME: mypy knows that this statement is unreachable, but PyCharm don't
         return  # type: ignore[unreachable]
 
-    model = info.trainer.train(input)
-    context.service = StaticModelService(model)
+    if snapshot_enabled:
+        snapshots = ModelSnapshotCache(SerializedStorage(
+            FileStorage(snapshot_dir or input.parent / ".ml2service-snapshots", suffix=".snapshot"),
+            PickleSerializer(),
+        ))
+        model = snapshots.load_or_train(t.cast(ModuleInfo[Path, object, object], info), input)
+
+    else:
+        model = info.trainer.train(input)
+    context.service = StaticModelService(
+        model=model,
+        batching=make_batching_options(max_batch_size, max_wait_ms),
+        executor=make_executor(executor_kind, workers, context),
+        prediction_cache=make_prediction_cache_options(prediction_cache_size),
+    )
+    # the metrics are kept by each process
+    context.multiprocess_safe = context.metrics is None
 
 
 @run.group("dynamic")
+@click.option("--storage-dir", "storage_dirs", type=click.Path(file_okay=False, resolve_path=True, path_type=Path),
+              multiple=True, help="several dirs shard the models over them by the dir names")
+@click.option("--storage-sqlite", "storage_sqlites",
+              type=click.Path(dir_okay=False, resolve_path=True, path_type=Path),
+              multiple=True, help="several databases shard the models over them by the file names")
+@click.option("--storage-shm/--no-storage-shm", "storage_shm_enabled", is_flag=True, default=False)
+@click.option("--storage-shm-capacity", type=click.IntRange(min=1), default=4096)
+@click.option("--compression", type=click.Choice([compression.value for compression in Compression]),
+              default=Compression.NONE.value)
+@click.option("--compression-level", type=int, default=None)
 @click.option("--memoize/--no-memoize", "memoize_enabled", is_flag=True, default=False)
+@click.option("--cache-size", "cache_max_entries", type=click.IntRange(min=1), default=None)
+@click.option("--cache-max-bytes", "cache_max_size", type=click.IntRange(min=1), default=None)
+@click.option("--cache-ttl", "cache_ttl", type=click.FloatRange(min=0.0, min_open=True), default=None)
+@click.option("--batch-size", "max_batch_size", type=click.IntRange(min=1), default=None)
+@click.option("--batch-wait-ms", "max_wait_ms", type=click.FloatRange(min=0.0), default=5.0)
+@click.option("--train-jobs/--no-train-jobs", "train_jobs_enabled", is_flag=True, default=False)
+@click.option("--train-workers", type=click.IntRange(min=1), default=1)
+@click.option("--train-queue-size", type=click.IntRange(min=0), default=16)
+@click.option("--node", type=str, default=None, help="name of this node, required to route the keys to the peers")
+@click.option("--peer", "peers", type=str, multiple=True, help="other node of the cluster as NAME=URL")
+@click.option("--cluster-secret", type=str, envvar="ML2SERVICE_CLUSTER_SECRET", default=None,
+              help="secret shared by the nodes, the nodes trust the requests forwarded with it only")
+@click.option("--virtual-nodes", type=click.IntRange(min=1), default=128)
+@executor_option
+@workers_option
+@prediction_cache_option
 @click.pass_obj
-def run_dynamic(context: CLIContext, memoize_enabled: bool) -> None:
+@click.pass_context
+def run_dynamic(
+        click_context: click.Context,
+        context: CLIContext,
+        storage_dirs: t.Sequence[Path],
+        storage_sqlites: t.Sequence[Path],
+        storage_shm_enabled: bool,
+        storage_shm_capacity: int,
+        compression: str,
+        compression_level: t.Optional[int],
+        memoize_enabled: bool,
+        cache_max_entries: t.Optional[int],
+        cache_max_size: t.Optional[int],
+        cache_ttl: t.Optional[float],
+        max_batch_size: t.Optional[int],
+        max_wait_ms: float,
+        executor_kind: str,
+        workers: t.Optional[int],
+        prediction_cache_size: t.Optional[int],
+        train_jobs_enabled: bool,
+        train_workers: int,
+        train_queue_size: int,
+        node: t.Optional[str],
+        peers: t.Sequence[str],
+        cluster_secret: t.Optional[str],
+        virtual_nodes: int,
+) -> None:
     info = context.info
     assert info is not None
 
-    storage: Storage[object, Model[object, object]] = InMemoryStorage()
+    if sum((bool(storage_dirs), bool(storage_sqlites), storage_shm_enabled)) > 1:
+        click_context.fail("only one of storage dir, storage sqlite and storage shm can be specified")
+        # FIXME: mypy knows that this statement is unreachable, but PyCharm don't
+        return  # type: ignore[unreachable]
 
-    if memoize_enabled:
-        storage = MemoizeStorage(storage)
+    peer_urls: t.Dict[str, str] = {}
+    for peer in peers:
+        peer_name, sep, peer_url = peer.partition("=")
+        if not sep or not peer_name or not peer_url:
+            click_context.fail(f"peer must be specified as NAME=URL: {peer!r}")
 
-    context.service = DynamicModelService(info.trainer, storage)
+        peer_urls[peer_name] = peer_url
+
+    if peer_urls and (node is None or not cluster_secret or train_jobs_enabled):
+        click_context.fail("peers require the node name and the cluster secret and are not supported with train jobs")
+        # FIXME: mypy knows that this statement is unreachable, but PyCharm don't
+        return  # type: ignore[unreachable]
+
+    # the keys are assigned to the shards by their names, so the names must not change when the paths do
+    shard_paths = storage_dirs or storage_sqlites
+    if len({path.name for path in shard_paths}) != len(shard_paths):
+        click_context.fail("storage shards must have distinct names")
+        # FIXME: mypy knows that this statement is unreachable, but PyCharm don't
+        return  # type: ignore[unreachable]
+
+    bytes_storage: t.Optional[Storage[object, Buffer]] = None
+    if storage_dirs:
+        bytes_storage = shard_storages({path.name: FileStorage(path) for path in storage_dirs}, virtual_nodes)
+
+    elif storage_sqlites:
+        bytes_storage = shard_storages({path.name: SQLiteStorage(path) for path in storage_sqlites}, virtual_nodes)
+
+    elif storage_shm_enabled:
+        # posix only
+        from ml2service.storages.shared_memory import SharedMemoryStorage
+        bytes_storage = SharedMemoryStorage(capacity=storage_shm_capacity)
+
+    storage: Storage[object, Model[object, object]] = (
+        trace_storage(
+            SerializedStorage(
+                trace_storage(bytes_storage, context, "storage.bytes"),
+                PickleSerializer(Compression(compression), compression_level),
+            ),
+            context,
+            "storage.serialized",
+        )
+        if bytes_storage is not None
+        else trace_storage(InMemoryStorage(), context, "storage.in_memory")
+    )
+
+    if memoize_enabled:
+        storage = trace_storage(MemoizeStorage(storage), context, "storage.memoize")
+
+    if cache_max_entries is not None or cache_max_size is not None:
+        storage = LRUCacheStorage(
+            inner=storage,
+            max_entries=cache_max_entries,
+            max_size=cache_max_size,
+            ttl=cache_ttl,
+        )
+        storage = trace_storage(storage, context, "storage.lru_cache")
+
+    if context.metrics is not None:
+        storage = InstrumentedStorage(storage, context.metrics)
+
+    context.train_jobs_enabled = train_jobs_enabled
+    local_service: DynamicModelService[object, object, object, object] = DynamicModelService(
+        trainer=info.trainer,
+        storage=storage,
+        batching=make_batching_options(max_batch_size, max_wait_ms),
+        executor=make_executor(executor_kind, workers, context),
+        prediction_cache=make_prediction_cache_options(prediction_cache_size),
+        train_jobs=TrainingJobOptions(max_workers=train_workers, max_pending=train_queue_size),
+    )
+    context.service = local_service
+
+    if node is not None and cluster_secret and peer_urls:
+        context.service = RoutingModelService(
+            node=node,
+            local=t.cast(DynamicModelService[str, object, object, object], local_service),
+            peers={
+                peer_name: RemoteModelService(peer_url, info.predict_output_type, cluster_secret)
+                for peer_name, peer_url in peer_urls.items()
+            },
+            secret=cluster_secret,
+            virtual_nodes=virtual_nodes,
+        )
+
+    context.multiprocess_safe = (
+            bytes_storage is not None
+            and not memoize_enabled
+            and cache_max_entries is None
+            and cache_max_size is None
+            and prediction_cache_size is None
+            and not train_jobs_enabled
+            # the update reads, updates & writes back the model under the lock of this process only, so the updates of
+            # the same key by the other processes would be lost
+            and not isinstance(info.trainer, IncrementalModelTrainer)
+            and context.metrics is None
+    )
 
 
 @click.command("http")
 @click.option("--port", type=int, default=8000)
+@click.option("--workers", "server_workers", type=click.IntRange(min=1), default=1,
+              help="number of server processes forked after the service is created")
+@click.option("--max-in-flight", type=click.IntRange(min=1), default=None,
+              help="max predictions in flight (per server process), the excess waits in the queue")
+@click.option("--max-in-flight-per-key", type=click.IntRange(min=1), default=None)
+@click.option("--max-queued", type=click.IntRange(min=0), default=0,
+              help="max predictions waiting for admission, the excess is rejected with 503")
+@click.option("--max-queue-wait", type=click.FloatRange(min=0.0, min_open=True), default=None)
+@click.option("--train-max-in-flight", type=click.IntRange(min=1), default=None)
+@click.option("--train-max-queued", type=click.IntRange(min=0), default=0)
+@click.option("--default-timeout", type=click.FloatRange(min=0.0, min_open=True), default=None,
+              help="seconds to wait for the predictions & trainings, unless the client sends its own timeout")
+@click.option("--fast-responses", is_flag=True, default=False,
+              help="trust the model outputs: encode them to JSON without the validation by the response model")
+@click.option("--upload-dir", type=click.Path(file_okay=False, exists=True, resolve_path=True, path_type=Path),
+              default=None, help="dir to spool the training data uploads to (the temp dir by default)")
+@click.option("--max-upload-size", type=click.IntRange(min=1), default=None, help="max training data upload bytes")
 @click.pass_obj
 @click.pass_context
-def http(click_context: click.Context, context: CLIContext, port: int) -> None:
+def http(
+        click_context: click.Context,
+        context: CLIContext,
+        port: int,
+        server_workers: int,
+        max_in_flight: t.Optional[int],
+        max_in_flight_per_key: t.Optional[int],
+        max_queued: int,
+        max_queue_wait: t.Optional[float],
+        train_max_in_flight: t.Optional[int],
+        train_max_queued: int,
+        default_timeout: t.Optional[float],
+        fast_responses: bool,
+        upload_dir: t.Optional[Path],
+        max_upload_size: t.Optional[int],
+) -> None:
     try:
         # noinspection PyPackageRequirements
         from fastapi import FastAPI
@@ -117,12 +419,43 @@ def http(click_context: click.Context, context: CLIContext, port: int) -> None:
     assert info is not None
     assert service is not None
 
+    if server_workers > 1 and not context.multiprocess_safe:
+        click_context.fail("multiple server workers require a service without process local state: static model "
+                           "or dynamic models in shared storage (dir, sqlite or shm) without caches, train jobs and "
+                           "incremental updates; and without metrics")
+        # FIXME: mypy knows that this statement is unreachable, but PyCharm don't
+        return  # type: ignore[unreachable]
+
+    if max_in_flight is None and max_in_flight_per_key is not None:
+        click_context.fail("max in flight per key requires max in flight")
+        # FIXME: mypy knows that this statement is unreachable, but PyCharm don't
+        return  # type: ignore[unreachable]
+
     def make_config(app: FastAPI) -> Config:
         return Config(app, port=port)
 
     service_runner_factory = FastAPIServiceRunnerFactory(
         info=info,
         server_config_factory=make_config,
+        train_jobs_enabled=context.train_jobs_enabled,
+        metrics=context.metrics,
+        tracer=context.tracer,
+        workers=server_workers,
+        admission=AdmissionOptions(
+            max_in_flight=max_in_flight,
+            max_in_flight_per_key=max_in_flight_per_key,
+            max_queued=max_queued,
+            max_wait=max_queue_wait,
+        ) if max_in_flight is not None else None,
+        train_admission=AdmissionOptions(
+            max_in_flight=train_max_in_flight,
+            max_queued=train_max_queued,
+            max_wait=max_queue_wait,
+        ) if train_max_in_flight is not None else None,
+        default_timeout=default_timeout,
+        fast_responses=fast_responses,
+        upload_dir=upload_dir,
+        max_upload_size=max_upload_size,
     )
     context.runner = service_runner_factory.create_service_runner(service)
 
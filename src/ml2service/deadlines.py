@@ -0,0 +1,54 @@
+import typing as t
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import copy_context
+from threading import Lock
+from time import monotonic
+
+T = t.TypeVar("T")
+
+# HTTP header of the seconds the client waits for the response
+TIMEOUT_HEADER: t.Final[str] = "X-Request-Timeout"
+
+
+def make_deadline(timeout: t.Optional[float], now: t.Optional[float] = None) -> t.Optional[float]:
+    return (now if now is not None else monotonic()) + timeout if timeout is not None else None
+
+
+def get_timeout(deadline: t.Optional[float]) -> t.Optional[float]:
+    """Returns the seconds left until the deadline (zero if it has passed) or None if there is no deadline."""
+    return max(deadline - monotonic(), 0.0) if deadline is not None else None
+
+
+def is_expired(deadline: t.Optional[float]) -> bool:
+    return deadline is not None and deadline <= monotonic()
+
+
+class DeadlineExecutor:
+    """
+    Runs blocking calls in its own threads, so their callers may stop waiting for them when their deadlines pass.
+
+    A running call can't be interrupted, it goes on until it returns and its result is dropped. The thread pool is
+    created by the first call, so the service that never gets deadlines starts no threads.
+    """
+
+    def __init__(self, max_workers: t.Optional[int] = None) -> None:
+        self.__max_workers = max_workers
+        self.__lock = Lock()
+        self.__executor: t.Optional[ThreadPoolExecutor] = None
+
+    def submit(self, func: t.Callable[[], T]) -> "Future[T]":
+        with self.__lock:
+            if self.__executor is None:
+                self.__executor = ThreadPoolExecutor(max_workers=self.__max_workers, thread_name_prefix="deadline")
+
+            executor = self.__executor
+
+        # the call keeps the context of its caller (e.g. the current tracing span)
+        return executor.submit(copy_context().run, func)
+
+    def shutdown(self) -> None:
+        with self.__lock:
+            executor, self.__executor = self.__executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=False)
@@ -0,0 +1,67 @@
+import abc
+import typing as t
+from concurrent.futures import Future
+
+from ml2service.models.base import IncrementalModelTrainer, Model, ModelTrainer
+
+T_train_input = t.TypeVar("T_train_input")
+T_predict_input = t.TypeVar("T_predict_input")
+T_predict_output = t.TypeVar("T_predict_output")
+
+
+class ModelExecutor(metaclass=abc.ABCMeta):
+    """
+    Decides where `ModelTrainer.train`, `IncrementalModelTrainer.update` and `Model.predict` calls are executed.
+
+    The predictions may get the `cache_key` of the model (e.g. its storage key & version), it tells the executor that
+    the models with the same cache key are the same, even if they are different objects.
+    """
+
+    @property
+    def uses_cache_keys(self) -> bool:
+        """Tells that the predictions use the cache keys, so the callers don't have to make them otherwise."""
+        return False
+
+    @property
+    def is_inline(self) -> bool:
+        """Tells that the calls are executed in the caller thread, so the returned futures are already done."""
+        return False
+
+    @abc.abstractmethod
+    def train(
+            self,
+            trainer: ModelTrainer[T_train_input, T_predict_input, T_predict_output],
+            input_: T_train_input,
+    ) -> "Future[Model[T_predict_input, T_predict_output]]":
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def update(
+            self,
+            trainer: IncrementalModelTrainer[T_train_input, T_predict_input, T_predict_output],
+            model: Model[T_predict_input, T_predict_output],
+            input_: T_train_input,
+    ) -> "Future[Model[T_predict_input, T_predict_output]]":
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def predict(
+            self,
+            model: Model[T_predict_input, T_predict_output],
+            input_: T_predict_input,
+            cache_key: t.Optional[t.Hashable] = None,
+    ) -> "Future[T_predict_output]":
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def predict_batch(
+            self,
+            model: Model[T_predict_input, T_predict_output],
+            inputs: t.Sequence[T_predict_input],
+            cache_key: t.Optional[t.Hashable] = None,
+    ) -> "Future[t.Sequence[T_predict_output]]":
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def shutdown(self) -> None:
+        raise NotImplementedError
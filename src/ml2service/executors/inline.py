@@ -0,0 +1,64 @@
+import typing as t
+from concurrent.futures import Future
+
+from ml2service.executors.base import ModelExecutor
+from ml2service.models.base import IncrementalModelTrainer, Model, ModelTrainer
+
+A = t.TypeVar("A")
+T = t.TypeVar("T")
+T_train_input = t.TypeVar("T_train_input")
+T_predict_input = t.TypeVar("T_predict_input")
+T_predict_output = t.TypeVar("T_predict_output")
+
+
+class InlineModelExecutor(ModelExecutor):
+    """Executes the calls in the caller thread, returned futures are always done."""
+
+    @property
+    def is_inline(self) -> bool:
+        return True
+
+    def train(
+            self,
+            trainer: ModelTrainer[T_train_input, T_predict_input, T_predict_output],
+            input_: T_train_input,
+    ) -> "Future[Model[T_predict_input, T_predict_output]]":
+        return self.__call(trainer.train, input_)
+
+    def update(
+            self,
+            trainer: IncrementalModelTrainer[T_train_input, T_predict_input, T_predict_output],
+            model: Model[T_predict_input, T_predict_output],
+            input_: T_train_input,
+    ) -> "Future[Model[T_predict_input, T_predict_output]]":
+        return self.__call(lambda arg: trainer.update(model, arg), input_)
+
+    def predict(
+            self,
+            model: Model[T_predict_input, T_predict_output],
+            input_: T_predict_input,
+            cache_key: t.Optional[t.Hashable] = None,
+    ) -> "Future[T_predict_output]":
+        return self.__call(model.predict, input_)
+
+    def predict_batch(
+            self,
+            model: Model[T_predict_input, T_predict_output],
+            inputs: t.Sequence[T_predict_input],
+            cache_key: t.Optional[t.Hashable] = None,
+    ) -> "Future[t.Sequence[T_predict_output]]":
+        return self.__call(model.predict_batch, inputs)
+
+    def shutdown(self) -> None:
+        pass
+
+    def __call(self, func: t.Callable[[A], T], arg: A) -> "Future[T]":
+        future: Future[T] = Future()
+
+        try:
+            future.set_result(func(arg))
+
+        except Exception as err:
+            future.set_exception(err)
+
+        return future
@@ -0,0 +1,75 @@
+import typing as t
+from concurrent.futures import Future
+from time import perf_counter
+
+from ml2service.executors.base import ModelExecutor
+from ml2service.models.base import IncrementalModelTrainer, Model, ModelTrainer
+from ml2service.monitoring.metrics import HistogramChild, ServiceMetrics
+
+T = t.TypeVar("T")
+T_train_input = t.TypeVar("T_train_input")
+T_predict_input = t.TypeVar("T_predict_input")
+T_predict_output = t.TypeVar("T_predict_output")
+
+
+class InstrumentedModelExecutor(ModelExecutor):
+    """
+    Records the durations of `train`, `update`, `predict` and `predict_batch` calls of the inner executor.
+
+    A duration is measured from the submission of the call until its future is done, so it includes the time the call
+    waited for a free worker.
+    """
+
+    def __init__(self, inner: ModelExecutor, metrics: ServiceMetrics) -> None:
+        self.__inner = inner
+        self.__train_duration = metrics.stage_duration.labels("train")
+        self.__update_duration = metrics.stage_duration.labels("update")
+        self.__predict_duration = metrics.stage_duration.labels("predict")
+        self.__predict_batch_duration = metrics.stage_duration.labels("predict_batch")
+
+    @property
+    def uses_cache_keys(self) -> bool:
+        return self.__inner.uses_cache_keys
+
+    @property
+    def is_inline(self) -> bool:
+        return self.__inner.is_inline
+
+    def train(
+            self,
+            trainer: ModelTrainer[T_train_input, T_predict_input, T_predict_output],
+            input_: T_train_input,
+    ) -> "Future[Model[T_predict_input, T_predict_output]]":
+        return self.__observe(self.__train_duration, perf_counter(), self.__inner.train(trainer, input_))
+
+    def update(
+            self,
+            trainer: IncrementalModelTrainer[T_train_input, T_predict_input, T_predict_output],
+            model: Model[T_predict_input, T_predict_output],
+            input_: T_train_input,
+    ) -> "Future[Model[T_predict_input, T_predict_output]]":
+        return self.__observe(self.__update_duration, perf_counter(), self.__inner.update(trainer, model, input_))
+
+    def predict(
+            self,
+            model: Model[T_predict_input, T_predict_output],
+            input_: T_predict_input,
+            cache_key: t.Optional[t.Hashable] = None,
+    ) -> "Future[T_predict_output]":
+        return self.__observe(self.__predict_duration, perf_counter(), self.__inner.predict(model, input_, cache_key))
+
+    def predict_batch(
+            self,
+            model: Model[T_predict_input, T_predict_output],
+            inputs: t.Sequence[T_predict_input],
+            cache_key: t.Optional[t.Hashable] = None,
+    ) -> "Future[t.Sequence[T_predict_output]]":
+        return self.__observe(self.__predict_batch_duration, perf_counter(),
+                              self.__inner.predict_batch(model, inputs, cache_key))
+
+    def shutdown(self) -> None:
+        self.__inner.shutdown()
+
+    def __observe(self, duration: HistogramChild, start: float, future: "Future[T]") -> "Future[T]":
+        future.add_done_callback(lambda _: duration.observe(perf_counter() - start))
+        return future
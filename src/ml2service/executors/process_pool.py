@@ -0,0 +1,225 @@
+import pickle
+import typing as t
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing.context import BaseContext
+from threading import Lock
+from uuid import uuid4
+
+from ml2service.executors.base import ModelExecutor
+from ml2service.models.base import IncrementalModelTrainer, Model, ModelTrainer
+
+T = t.TypeVar("T")
+T_train_input = t.TypeVar("T_train_input")
+T_predict_input = t.TypeVar("T_predict_input")
+T_predict_output = t.TypeVar("T_predict_output")
+
+# worker process state: targets (trainers & models) unpickled in this process, by their tokens
+_worker_targets: "OrderedDict[str, object]" = OrderedDict()
+_worker_targets_limit = 0
+
+
+def _init_worker(targets_limit: int) -> None:
+    global _worker_targets_limit
+    _worker_targets_limit = targets_limit
+
+
+class _Method(t.Protocol):
+    def __call__(self, *args: object) -> object:
+        ...
+
+
+def _invoke(
+        token: t.Optional[str],
+        payload: t.Optional[bytes],
+        method: str,
+        args: t.Tuple[object, ...],
+) -> t.Tuple[bool, object]:
+    if payload is not None:
+        target = t.cast(object, pickle.loads(payload))
+
+        if token is not None:
+            _worker_targets[token] = target
+
+            while len(_worker_targets) > _worker_targets_limit:
+                _worker_targets.popitem(last=False)
+
+    elif token is not None and token in _worker_targets:
+        target = _worker_targets[token]
+        _worker_targets.move_to_end(token)
+
+    else:
+        return False, None
+
+    func = t.cast(_Method, getattr(target, method))
+
+    return True, func(*args)
+
+
+class _CallFuture(Future[T]):
+    """The future of the call in the pool, its cancellation cancels the pool call that hasn't started yet."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.__call: t.Optional["Future[t.Tuple[bool, object]]"] = None
+
+    def attach(self, call: "Future[t.Tuple[bool, object]]") -> None:
+        self.__call = call
+
+    def cancel(self) -> bool:
+        call = self.__call
+        if call is not None:
+            call.cancel()
+
+        return super().cancel()
+
+
+class ProcessPoolModelExecutor(ModelExecutor):
+    """
+    Executes the calls in worker processes, so that CPU bound pure python models are not limited by the GIL.
+
+    Trainers and models are pickled and sent to a worker only if the worker does not have them yet: each worker keeps
+    the latest used targets by their tokens, so a static model or a hot dynamic model is pinned in every worker after
+    the first calls. The token of a target lives as long as the target object in this process, or it is kept by the
+    cache key of the model (the latest `worker_cache_size` keys), so the model loaded from the storage on each call
+    isn't sent again while its version stays the same.
+
+    The cancelled call is dropped if it hasn't started yet, the call that runs in a worker can't be stopped.
+    """
+
+    def __init__(
+            self,
+            max_workers: t.Optional[int] = None,
+            worker_cache_size: int = 64,
+            mp_context: t.Optional[BaseContext] = None,
+    ) -> None:
+        self.__pool = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(worker_cache_size,),
+        )
+        self.__lock = Lock()
+        self.__tokens: t.Dict[int, str] = {}
+        self.__keyed_tokens: OrderedDict[t.Hashable, str] = OrderedDict()
+        self.__keyed_tokens_limit = worker_cache_size
+
+    @property
+    def uses_cache_keys(self) -> bool:
+        return True
+
+    def train(
+            self,
+            trainer: ModelTrainer[T_train_input, T_predict_input, T_predict_output],
+            input_: T_train_input,
+    ) -> "Future[Model[T_predict_input, T_predict_output]]":
+        return self.__submit(trainer, "train", input_)
+
+    def update(
+            self,
+            trainer: IncrementalModelTrainer[T_train_input, T_predict_input, T_predict_output],
+            model: Model[T_predict_input, T_predict_output],
+            input_: T_train_input,
+    ) -> "Future[Model[T_predict_input, T_predict_output]]":
+        # the model is changed by the update, so it is sent to the worker each time
+        return self.__submit(trainer, "update", model, input_)
+
+    def predict(
+            self,
+            model: Model[T_predict_input, T_predict_output],
+            input_: T_predict_input,
+            cache_key: t.Optional[t.Hashable] = None,
+    ) -> "Future[T_predict_output]":
+        return self.__submit(model, "predict", input_, cache_key=cache_key)
+
+    def predict_batch(
+            self,
+            model: Model[T_predict_input, T_predict_output],
+            inputs: t.Sequence[T_predict_input],
+            cache_key: t.Optional[t.Hashable] = None,
+    ) -> "Future[t.Sequence[T_predict_output]]":
+        return self.__submit(model, "predict_batch", inputs, cache_key=cache_key)
+
+    def shutdown(self) -> None:
+        self.__pool.shutdown(wait=False)
+
+    def __submit(self, target: object, method: str, *args: object,
+                 cache_key: t.Optional[t.Hashable] = None) -> "Future[T]":
+        future: _CallFuture[T] = _CallFuture()
+        token = self.__get_keyed_token(cache_key) if cache_key is not None else self.__get_token(target)
+
+        def handle_done(done: "Future[t.Tuple[bool, object]]") -> None:
+            if done.cancelled():
+                future.cancel()
+                return
+
+            try:
+                found, result = done.result()
+                if not found:
+                    if future.cancelled():
+                        return
+
+                    # the worker has not seen the target yet, send it along with the call
+                    retry = self.__pool.submit(_invoke, token, pickle.dumps(target, pickle.HIGHEST_PROTOCOL), method,
+                                               args)
+                    future.attach(retry)
+                    retry.add_done_callback(handle_done)
+                    return
+
+            except Exception as err:
+                # the result of the cancelled call is dropped
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(err)
+
+            else:
+                if future.set_running_or_notify_cancel():
+                    future.set_result(t.cast(T, result))
+
+        if token is None:
+            first = self.__pool.submit(_invoke, token, pickle.dumps(target, pickle.HIGHEST_PROTOCOL), method, args)
+
+        else:
+            first = self.__pool.submit(_invoke, token, None, method, args)
+
+        future.attach(first)
+        first.add_done_callback(handle_done)
+
+        return future
+
+    def __get_keyed_token(self, cache_key: t.Hashable) -> str:
+        with self.__lock:
+            token = self.__keyed_tokens.get(cache_key)
+            if token is not None:
+                self.__keyed_tokens.move_to_end(cache_key)
+                return token
+
+            token = self.__keyed_tokens[cache_key] = uuid4().hex
+
+            while len(self.__keyed_tokens) > self.__keyed_tokens_limit:
+                self.__keyed_tokens.popitem(last=False)
+
+            return token
+
+    def __get_token(self, target: object) -> t.Optional[str]:
+        target_id = id(target)
+
+        with self.__lock:
+            token = self.__tokens.get(target_id)
+            if token is not None:
+                return token
+
+            try:
+                weakref.finalize(target, self.__release_token, target_id)
+
+            except TypeError:
+                # the target can't be tracked, it will be sent to a worker on each call
+                return None
+
+            token = self.__tokens[target_id] = uuid4().hex
+
+            return token
+
+    def __release_token(self, target_id: int) -> None:
+        with self.__lock:
+            self.__tokens.pop(target_id, None)
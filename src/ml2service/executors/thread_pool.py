@@ -0,0 +1,49 @@
+import typing as t
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from ml2service.executors.base import ModelExecutor
+from ml2service.models.base import IncrementalModelTrainer, Model, ModelTrainer
+
+T_train_input = t.TypeVar("T_train_input")
+T_predict_input = t.TypeVar("T_predict_input")
+T_predict_output = t.TypeVar("T_predict_output")
+
+
+class ThreadPoolModelExecutor(ModelExecutor):
+
+    def __init__(self, max_workers: t.Optional[int] = None) -> None:
+        self.__pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model-executor")
+
+    def train(
+            self,
+            trainer: ModelTrainer[T_train_input, T_predict_input, T_predict_output],
+            input_: T_train_input,
+    ) -> "Future[Model[T_predict_input, T_predict_output]]":
+        return self.__pool.submit(trainer.train, input_)
+
+    def update(
+            self,
+            trainer: IncrementalModelTrainer[T_train_input, T_predict_input, T_predict_output],
+            model: Model[T_predict_input, T_predict_output],
+            input_: T_train_input,
+    ) -> "Future[Model[T_predict_input, T_predict_output]]":
+        return self.__pool.submit(trainer.update, model, input_)
+
+    def predict(
+            self,
+            model: Model[T_predict_input, T_predict_output],
+            input_: T_predict_input,
+            cache_key: t.Optional[t.Hashable] = None,
+    ) -> "Future[T_predict_output]":
+        return self.__pool.submit(model.predict, input_)
+
+    def predict_batch(
+            self,
+            model: Model[T_predict_input, T_predict_output],
+            inputs: t.Sequence[T_predict_input],
+            cache_key: t.Optional[t.Hashable] = None,
+    ) -> "Future[t.Sequence[T_predict_output]]":
+        return self.__pool.submit(model.predict_batch, inputs)
+
+    def shutdown(self) -> None:
+        self.__pool.shutdown(wait=False)
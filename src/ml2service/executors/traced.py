@@ -0,0 +1,79 @@
+import typing as t
+from concurrent.futures import Future
+
+from ml2service.executors.base import ModelExecutor
+from ml2service.models.base import IncrementalModelTrainer, Model, ModelTrainer
+from ml2service.monitoring.tracing import Span, Tracer
+
+T = t.TypeVar("T")
+T_train_input = t.TypeVar("T_train_input")
+T_predict_input = t.TypeVar("T_predict_input")
+T_predict_output = t.TypeVar("T_predict_output")
+
+
+class TracedModelExecutor(ModelExecutor):
+    """
+    Opens `model.train`, `model.update`, `model.predict` & `model.predict_batch` spans, each span ends when its future
+    is done.
+    """
+
+    def __init__(self, inner: ModelExecutor, tracer: Tracer) -> None:
+        self.__inner = inner
+        self.__tracer = tracer
+
+    @property
+    def uses_cache_keys(self) -> bool:
+        return self.__inner.uses_cache_keys
+
+    @property
+    def is_inline(self) -> bool:
+        return self.__inner.is_inline
+
+    def train(
+            self,
+            trainer: ModelTrainer[T_train_input, T_predict_input, T_predict_output],
+            input_: T_train_input,
+    ) -> "Future[Model[T_predict_input, T_predict_output]]":
+        span = self.__tracer.start_span("model.train")
+        return self.__end_on_done(span, self.__inner.train(trainer, input_))
+
+    def update(
+            self,
+            trainer: IncrementalModelTrainer[T_train_input, T_predict_input, T_predict_output],
+            model: Model[T_predict_input, T_predict_output],
+            input_: T_train_input,
+    ) -> "Future[Model[T_predict_input, T_predict_output]]":
+        span = self.__tracer.start_span("model.update")
+        return self.__end_on_done(span, self.__inner.update(trainer, model, input_))
+
+    def predict(
+            self,
+            model: Model[T_predict_input, T_predict_output],
+            input_: T_predict_input,
+            cache_key: t.Optional[t.Hashable] = None,
+    ) -> "Future[T_predict_output]":
+        span = self.__tracer.start_span("model.predict")
+        return self.__end_on_done(span, self.__inner.predict(model, input_, cache_key))
+
+    def predict_batch(
+            self,
+            model: Model[T_predict_input, T_predict_output],
+            inputs: t.Sequence[T_predict_input],
+            cache_key: t.Optional[t.Hashable] = None,
+    ) -> "Future[t.Sequence[T_predict_output]]":
+        span = self.__tracer.start_span("model.predict_batch", {"batch.size": len(inputs)})
+        return self.__end_on_done(span, self.__inner.predict_batch(model, inputs, cache_key))
+
+    def shutdown(self) -> None:
+        self.__inner.shutdown()
+
+    def __end_on_done(self, span: Span, future: "Future[T]") -> "Future[T]":
+        def end(done: "Future[T]") -> None:
+            err = done.exception() if not done.cancelled() else None
+            if err is not None:
+                span.record_error(err)
+
+            span.end()
+
+        future.add_done_callback(end)
+        return future
@@ -0,0 +1,38 @@
+import hashlib
+import typing as t
+from bisect import bisect_right
+
+N = t.TypeVar("N")
+
+
+def hash_key(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+
+
+class HashRing(t.Generic[N]):
+    """
+    Consistent hashing: each node is placed on the ring at `virtual_nodes` points (hashes of its name and the point
+    number), a key belongs to the node of the first point clockwise from the key hash. Adding or removing a node moves
+    only the keys of that node, virtual nodes spread them evenly over the other nodes.
+
+    Node names (`str(node)`) must be stable, so all the ring users place the nodes at the same points.
+    """
+
+    def __init__(self, nodes: t.Iterable[N], virtual_nodes: int = 128) -> None:
+        if virtual_nodes < 1:
+            raise ValueError("virtual nodes must be positive", virtual_nodes)
+
+        points = sorted(
+            (hash_key(f"{node}#{i}"), str(node), node)
+            for node in nodes
+            for i in range(virtual_nodes)
+        )
+        if not points:
+            raise ValueError("hash ring requires at least one node")
+
+        self.__hashes = [point_hash for point_hash, _, _ in points]
+        self.__nodes = [node for _, _, node in points]
+
+    def get_node(self, key: str) -> N:
+        index = bisect_right(self.__hashes, hash_key(key))
+        return self.__nodes[index % len(self.__nodes)]
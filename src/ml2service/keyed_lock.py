@@ -0,0 +1,62 @@
+import typing as t
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from threading import Lock
+
+K = t.TypeVar("K")
+
+
+@dataclass()
+class _Entry:
+    lock: Lock = field(default_factory=Lock)
+    users: int = 0
+
+
+class KeyedLock(t.Generic[K]):
+    """
+    A lock of each key: the operations on the same key are serialized, the operations on the other keys never wait,
+    even while the lock of the key is held for a long time. A lock is created on demand and dropped once no one holds
+    it or waits for it.
+    """
+
+    def __init__(self) -> None:
+        self.__lock = Lock()
+        self.__entries: t.Dict[K, _Entry] = {}
+
+    def acquire(self, key: K, timeout: t.Optional[float] = None) -> bool:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                entry = self.__entries[key] = _Entry()
+
+            entry.users += 1
+
+        if entry.lock.acquire(timeout=timeout if timeout is not None else -1):
+            return True
+
+        self.__leave(key, entry)
+
+        return False
+
+    def release(self, key: K) -> None:
+        with self.__lock:
+            entry = self.__entries[key]
+
+        entry.lock.release()
+        self.__leave(key, entry)
+
+    @contextmanager
+    def locked(self, key: K) -> t.Iterator[None]:
+        self.acquire(key)
+
+        try:
+            yield
+
+        finally:
+            self.release(key)
+
+    def __leave(self, key: K, entry: _Entry) -> None:
+        with self.__lock:
+            entry.users -= 1
+            if entry.users == 0:
+                del self.__entries[key]
@@ -11,6 +11,19 @@ class Model(t.Generic[T_predict_input, T_predict_output], metaclass=abc.ABCMeta)
     def predict(self, input_: T_predict_input) -> T_predict_output:
         raise NotImplementedError
 
+    def predict_batch(self, inputs: t.Sequence[T_predict_input]) -> t.Sequence[T_predict_output]:
+        """Predict many inputs at once. Override it in models that can vectorize the computation."""
+        return [self.predict(input_) for input_ in inputs]
+
+
+class StreamingModel(Model[T_predict_input, T_predict_output], metaclass=abc.ABCMeta):
+    """Model that predicts a stream of inputs by itself, e.g. keeps a state between the inputs."""
+
+    @abc.abstractmethod
+    def predict_stream(self, inputs: t.Iterable[T_predict_input]) -> t.Iterator[T_predict_output]:
+        """Yields the output of each input in order, the inputs are read lazily as the outputs are consumed."""
+        raise NotImplementedError
+
 
 class ModelTrainer(
     t.Generic[T_train_input, T_predict_input, T_predict_output],
@@ -19,3 +32,22 @@ class ModelTrainer(
     @abc.abstractmethod
     def train(self, input_: T_train_input) -> Model[T_predict_input, T_predict_output]:
         raise NotImplementedError
+
+
+class IncrementalModelTrainer(
+    ModelTrainer[T_train_input, T_predict_input, T_predict_output],
+    metaclass=abc.ABCMeta,
+):
+    """Trainer that also updates the trained models with new data (e.g. `partial_fit`) without the full retraining."""
+
+    @abc.abstractmethod
+    def update(
+            self,
+            model: Model[T_predict_input, T_predict_output],
+            input_: T_train_input,
+    ) -> Model[T_predict_input, T_predict_output]:
+        """
+        Returns the model updated with the input. The given model may serve the predictions at the same time, so it
+        must not be changed in place (unless the storage returns a new copy of the model on each read).
+        """
+        raise NotImplementedError
@@ -3,7 +3,7 @@ from dataclasses import dataclass
 # noinspection PyProtectedMember
 from pkgutil import resolve_name
 
-from ml2service.models.base import ModelTrainer
+from ml2service.models.base import IncrementalModelTrainer, ModelTrainer
 from ml2service.strict_typing import get_generic_type_vars
 
 T_train_input = t.TypeVar("T_train_input", contravariant=True)
@@ -19,6 +19,9 @@ class ModuleInfo(t.Generic[T_train_input, T_predict_input, T_predict_output]):
 
     trainer: ModelTrainer[T_train_input, T_predict_input, T_predict_output]
 
+    entrypoint: str = ""
+    args: t.Sequence[str] = ()
+
 
 class EntrypointLoader:
 
@@ -34,9 +37,13 @@ class EntrypointLoader:
         if not isinstance(obj, ModelTrainer):
             raise TypeError("model trainer expected", obj)
 
-        train_input_type, predict_input_type, predict_output_type = get_generic_type_vars(ModelTrainer, obj)
+        # the incremental trainer has the same type vars as the trainer
+        train_input_type, predict_input_type, predict_output_type = (
+                get_generic_type_vars(ModelTrainer, obj)
+                or get_generic_type_vars(IncrementalModelTrainer, obj)
+        )
 
-        return ModuleInfo(train_input_type, predict_input_type, predict_output_type, obj)
+        return ModuleInfo(train_input_type, predict_input_type, predict_output_type, obj, entrypoint, tuple(args))
 
     def __resolve_callable(self, entrypoint: str) -> t.Callable[..., object]:
         obj = resolve_name(entrypoint)
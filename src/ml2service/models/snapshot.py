@@ -0,0 +1,79 @@
+import hashlib
+import typing as t
+from dataclasses import dataclass
+from pathlib import Path
+
+from ml2service.models.base import Model
+from ml2service.models.loader import ModuleInfo
+from ml2service.storages.base import Storage
+
+T_predict_input = t.TypeVar("T_predict_input")
+T_predict_output = t.TypeVar("T_predict_output")
+
+
+def hash_path(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """Content hash of the file or of all the files in the directory (with their relative paths)."""
+
+    digest = hashlib.blake2b()
+    files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+
+    for file in files:
+        digest.update(str(file.relative_to(path)).encode() if file != path else b"")
+        digest.update(b"\0")
+
+        with file.open("rb") as f:
+            while chunk := f.read(chunk_size):
+                digest.update(chunk)
+
+        digest.update(b"\0")
+
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class ModelSnapshot:
+    digest: str
+    model: Model[object, object]
+
+
+class ModelSnapshotCache:
+    """
+    Keeps the models trained on input files, so the model is loaded rather than trained again when the entrypoint,
+    its args and the content of the input are the same as before.
+
+    A snapshot is kept by the input file name with the digest of the entrypoint, its args and the input content, so the
+    snapshot of the changed input replaces the old one rather than piles up next to it. Snapshots that fail to load
+    (e.g. model classes were changed since) are treated as missing and overwritten.
+    """
+
+    def __init__(self, storage: Storage[str, ModelSnapshot]) -> None:
+        self.__storage = storage
+
+    def get_digest(self, info: ModuleInfo[Path, object, object], input_: Path) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (info.entrypoint, *info.args, hash_path(input_)):
+            digest.update(part.encode())
+            digest.update(b"\0")
+
+        return digest.hexdigest()
+
+    def load_or_train(self, info: ModuleInfo[Path, T_predict_input, T_predict_output], input_: Path) -> Model[
+        T_predict_input,
+        T_predict_output,
+    ]:
+        digest = self.get_digest(t.cast(ModuleInfo[Path, object, object], info), input_)
+
+        try:
+            snapshot = self.__storage.get(input_.name)
+            model = snapshot.model if snapshot is not None and snapshot.digest == digest else None
+
+        except Exception:
+            model = None
+
+        if model is not None:
+            return t.cast(Model[T_predict_input, T_predict_output], model)
+
+        trained = info.trainer.train(input_)
+        self.__storage.update(input_.name, ModelSnapshot(digest, t.cast(Model[object, object], trained)))
+
+        return trained
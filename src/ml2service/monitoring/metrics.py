@@ -0,0 +1,249 @@
+import abc
+import math
+import typing as t
+from bisect import bisect_left
+from threading import Lock
+
+DEFAULT_LATENCY_BUCKETS: t.Final[t.Sequence[float]] = (
+    0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+C = t.TypeVar("C")
+
+
+class _Metric(t.Generic[C], metaclass=abc.ABCMeta):
+    """Base of the metrics: children with their values are kept by the label values."""
+
+    type_: t.ClassVar[str]
+
+    def __init__(self, name: str, help_: str, label_names: t.Sequence[str]) -> None:
+        self.name = name
+        self.help = help_
+        self.label_names = tuple(label_names)
+        self.__lock = Lock()
+        self.__children: t.Dict[t.Tuple[str, ...], C] = {}
+
+    def labels(self, *values: str) -> C:
+        child = self.__children.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError("label values don't match label names", values, self.label_names)
+
+            with self.__lock:
+                child = self.__children.setdefault(values, self._create_child())
+
+        return child
+
+    def render(self) -> t.Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type_}"
+
+        with self.__lock:
+            children = list(self.__children.items())
+
+        for values, child in children:
+            yield from self._render_child(dict(zip(self.label_names, values)), child)
+
+    @abc.abstractmethod
+    def _create_child(self) -> C:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def _render_child(self, labels: t.Mapping[str, str], child: C) -> t.Iterable[str]:
+        raise NotImplementedError
+
+
+class CounterChild:
+
+    def __init__(self) -> None:
+        self.__lock = Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self.__lock:
+            self.value += amount
+
+
+class GaugeChild:
+
+    def __init__(self) -> None:
+        self.__lock = Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self.__lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self.__lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class HistogramChild:
+
+    def __init__(self, buckets: t.Sequence[float]) -> None:
+        self.__lock = Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+
+        with self.__lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Counter(_Metric[CounterChild]):
+    type_ = "counter"
+
+    def _create_child(self) -> CounterChild:
+        return CounterChild()
+
+    def _render_child(self, labels: t.Mapping[str, str], child: CounterChild) -> t.Iterable[str]:
+        yield f"{self.name}_total{_format_labels(labels)} {_format_value(child.value)}"
+
+
+class Gauge(_Metric[GaugeChild]):
+    type_ = "gauge"
+
+    def _create_child(self) -> GaugeChild:
+        return GaugeChild()
+
+    def _render_child(self, labels: t.Mapping[str, str], child: GaugeChild) -> t.Iterable[str]:
+        yield f"{self.name}{_format_labels(labels)} {_format_value(child.value)}"
+
+
+class Histogram(_Metric[HistogramChild]):
+    type_ = "histogram"
+
+    def __init__(
+            self,
+            name: str,
+            help_: str,
+            label_names: t.Sequence[str],
+            buckets: t.Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, help_, label_names)
+        self.buckets = tuple(sorted(bucket for bucket in buckets if not math.isinf(bucket)))
+
+    def _create_child(self) -> HistogramChild:
+        return HistogramChild(self.buckets)
+
+    def _render_child(self, labels: t.Mapping[str, str], child: HistogramChild) -> t.Iterable[str]:
+        cumulative = 0
+        for bound, count in zip((*self.buckets, math.inf), child.counts):
+            cumulative += count
+            yield f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}"
+
+        yield f"{self.name}_sum{_format_labels(labels)} {_format_value(child.sum)}"
+        yield f"{self.name}_count{_format_labels(labels)} {cumulative}"
+
+
+class MetricsRegistry:
+    """Keeps the metrics and renders them in prometheus text exposition format."""
+
+    CONTENT_TYPE: t.Final[str] = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self) -> None:
+        self.__metrics: t.List[t.Union[Counter, Gauge, Histogram]] = []
+
+    def counter(self, name: str, help_: str, label_names: t.Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help_, label_names)
+        self.__metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, help_: str, label_names: t.Sequence[str] = ()) -> Gauge:
+        metric = Gauge(name, help_, label_names)
+        self.__metrics.append(metric)
+        return metric
+
+    def histogram(
+            self,
+            name: str,
+            help_: str,
+            label_names: t.Sequence[str] = (),
+            buckets: t.Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, help_, label_names, buckets)
+        self.__metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "".join(f"{line}\n" for metric in self.__metrics for line in metric.render())
+
+
+class ServiceMetrics:
+    """
+    The metrics of ml2service: latency of each stage of request processing, requests, errors and in flight requests.
+
+    Model keys are grouped into classes by `key_classifier`, so the label cardinality stays bounded.
+    """
+
+    def __init__(
+            self,
+            registry: t.Optional[MetricsRegistry] = None,
+            key_classifier: t.Optional[t.Callable[[object], str]] = None,
+    ) -> None:
+        self.registry = registry or MetricsRegistry()
+        self.__key_classifier = key_classifier
+
+        self.stage_duration = self.registry.histogram(
+            "ml2service_stage_duration_seconds",
+            "Duration of request processing stages: decode, storage operations, train, predict, encode.",
+            ("stage",),
+        )
+        self.requests = self.registry.counter(
+            "ml2service_requests",
+            "Handled requests.",
+            ("route", "key_class"),
+        )
+        self.errors = self.registry.counter(
+            "ml2service_request_errors",
+            "Requests that failed.",
+            ("route", "key_class", "status"),
+        )
+        self.in_flight = self.registry.gauge(
+            "ml2service_requests_in_flight",
+            "Requests being handled.",
+            ("route", "key_class"),
+        )
+
+    def classify_key(self, key: object) -> str:
+        return self.__key_classifier(key) if self.__key_classifier is not None else ""
+
+    def observe_stage(self, stage: str, seconds: float) -> None:
+        self.stage_duration.labels(stage).observe(seconds)
+
+
+def make_prefix_key_classifier(separator: str) -> t.Callable[[object], str]:
+    """Key class is the part of the key before the first separator, keys without the separator have an empty class."""
+
+    def classify(key: object) -> str:
+        prefix, found, _ = str(key).partition(separator)
+        return prefix if found else ""
+
+    return classify
+
+
+def _format_labels(labels: t.Mapping[str, str]) -> str:
+    if not labels:
+        return ""
+
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+    return f"{{{pairs}}}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+
+    return repr(float(value))
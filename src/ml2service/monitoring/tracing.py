@@ -0,0 +1,235 @@
+import abc
+import json
+import random
+import re
+import typing as t
+from collections import deque
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from threading import Lock
+from time import time_ns
+from types import TracebackType
+
+AttributeValue = t.Union[str, int, float, bool]
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    trace_id: str
+    span_id: str
+    sampled: bool
+
+    __TRACEPARENT: t.ClassVar[t.Pattern[str]] = re.compile(
+        r"^00-(?P<trace_id>[0-9a-f]{32})-(?P<span_id>[0-9a-f]{16})-(?P<flags>[0-9a-f]{2})$")
+
+    @classmethod
+    def from_traceparent(cls, value: str) -> t.Optional["SpanContext"]:
+        """Parses W3C trace context `traceparent` header value."""
+
+        match = cls.__TRACEPARENT.match(value.strip().lower())
+        if match is None:
+            return None
+
+        return cls(
+            trace_id=match.group("trace_id"),
+            span_id=match.group("span_id"),
+            sampled=bool(int(match.group("flags"), 16) & 1),
+        )
+
+    def to_traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+@dataclass()
+class Span:
+    name: str
+    context: SpanContext
+    parent_id: t.Optional[str]
+    start_ns: int
+    end_ns: t.Optional[int] = None
+    attributes: t.Dict[str, AttributeValue] = field(default_factory=dict)
+    error: t.Optional[str] = None
+    exporter: t.Optional["SpanExporter"] = field(default=None, repr=False, compare=False)
+
+    @property
+    def recording(self) -> bool:
+        return self.context.sampled
+
+    @property
+    def duration_ns(self) -> t.Optional[int]:
+        return self.end_ns - self.start_ns if self.end_ns is not None else None
+
+    def set_attribute(self, name: str, value: AttributeValue) -> None:
+        if self.context.sampled:
+            self.attributes[name] = value
+
+    def record_error(self, err: BaseException) -> None:
+        if self.context.sampled:
+            self.error = repr(err)
+
+    def end(self) -> None:
+        if self.end_ns is not None or not self.context.sampled:
+            return
+
+        self.end_ns = time_ns()
+        if self.exporter is not None:
+            self.exporter.export(self)
+
+    def to_dict(self) -> t.Mapping[str, object]:
+        return {
+            "name": self.name,
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class SpanExporter(metaclass=abc.ABCMeta):
+    """Receives the ended sampled spans. Called in the thread that ended the span, so it should be fast."""
+
+    @abc.abstractmethod
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps the last `max_spans` spans in process, no collector needed."""
+
+    def __init__(self, max_spans: int = 10_000) -> None:
+        self.__spans: t.Deque[Span] = deque(maxlen=max_spans)
+
+    @property
+    def spans(self) -> t.Sequence[Span]:
+        return list(self.__spans)
+
+    def export(self, span: Span) -> None:
+        self.__spans.append(span)
+
+    def clear(self) -> None:
+        self.__spans.clear()
+
+
+class JsonLinesSpanExporter(SpanExporter):
+    """Writes each span as a JSON line to the stream."""
+
+    def __init__(self, stream: t.TextIO) -> None:
+        self.__stream = stream
+        self.__lock = Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+
+        with self.__lock:
+            self.__stream.write(line + "\n")
+            self.__stream.flush()
+
+
+_current_span: ContextVar[t.Optional[Span]] = ContextVar("_current_span", default=None)
+
+
+def get_current_span() -> t.Optional[Span]:
+    return _current_span.get()
+
+
+def set_span_attribute(name: str, value: AttributeValue) -> None:
+    """Sets the attribute of the current span, does nothing if there is no span."""
+
+    span = _current_span.get()
+    if span is not None:
+        span.set_attribute(name, value)
+
+
+class _SpanScope:
+    __slots__ = ("__span", "__token",)
+
+    def __init__(self, span: Span) -> None:
+        self.__span = span
+        self.__token: t.Optional[Token[t.Optional[Span]]] = None
+
+    def __enter__(self) -> Span:
+        self.__token = _current_span.set(self.__span)
+        return self.__span
+
+    def __exit__(
+            self,
+            exc_type: t.Optional[t.Type[BaseException]],
+            exc_val: t.Optional[BaseException],
+            exc_tb: t.Optional[TracebackType],
+    ) -> None:
+        if self.__token is not None:
+            _current_span.reset(self.__token)
+
+        if exc_val is not None:
+            self.__span.record_error(exc_val)
+
+        self.__span.end()
+
+
+class Tracer:
+    """
+    Creates spans as children of the current span of the context.
+
+    Sampling is head based: the decision is made once for the root span of the trace (with `sample_ratio`
+    probability, unless the remote parent made it already) and is inherited by all its children. Spans of not sampled
+    traces are not recorded and not exported, that costs only a few context variable lookups.
+    """
+
+    def __init__(
+            self,
+            exporter: SpanExporter,
+            sample_ratio: float = 1.0,
+            rand: t.Optional[random.Random] = None,
+    ) -> None:
+        if not 0.0 <= sample_ratio <= 1.0:
+            raise ValueError("sample ratio must be in [0.0; 1.0]", sample_ratio)
+
+        self.__exporter = exporter
+        self.__sample_ratio = sample_ratio
+        self.__rand = rand or random.Random()
+
+    def start_span(
+            self,
+            name: str,
+            attributes: t.Optional[t.Mapping[str, AttributeValue]] = None,
+            parent: t.Optional[SpanContext] = None,
+    ) -> Span:
+        """Starts the span without making it current, the caller must end it."""
+
+        if parent is None:
+            current = _current_span.get()
+            parent = current.context if current is not None else None
+
+        if parent is not None:
+            context = SpanContext(trace_id=parent.trace_id, span_id=self.__generate_id(64), sampled=parent.sampled)
+            parent_id: t.Optional[str] = parent.span_id
+
+        else:
+            context = SpanContext(trace_id=self.__generate_id(128), span_id=self.__generate_id(64),
+                                  sampled=self.__rand.random() < self.__sample_ratio)
+            parent_id = None
+
+        return Span(
+            name=name,
+            context=context,
+            parent_id=parent_id,
+            start_ns=time_ns(),
+            attributes=dict(attributes) if attributes is not None and context.sampled else {},
+            exporter=self.__exporter,
+        )
+
+    def span(
+            self,
+            name: str,
+            attributes: t.Optional[t.Mapping[str, AttributeValue]] = None,
+            parent: t.Optional[SpanContext] = None,
+    ) -> t.ContextManager[Span]:
+        """Starts the span and makes it current until the end of the `with` block."""
+
+        return _SpanScope(self.start_span(name, attributes, parent))
+
+    def __generate_id(self, bits: int) -> str:
+        return f"{self.__rand.getrandbits(bits):0{bits // 4}x}"
@@ -1,8 +1,12 @@
 import abc
+import mmap
 import typing as t
 
 T = t.TypeVar("T")
 
+# serialized data, storages may return the views of their memory (e.g. memory mapped files) instead of bytes copies
+Buffer = t.Union[bytes, memoryview, mmap.mmap]
+
 
 class Serializer(t.Generic[T], metaclass=abc.ABCMeta):
     @abc.abstractmethod
@@ -10,5 +14,5 @@ class Serializer(t.Generic[T], metaclass=abc.ABCMeta):
         raise NotImplementedError
 
     @abc.abstractmethod
-    def decode(self, data: bytes) -> T:
+    def decode(self, data: Buffer) -> T:
         raise NotImplementedError
@@ -0,0 +1,16 @@
+import typing as t
+
+from pydantic.json import pydantic_encoder
+
+
+def to_jsonable(obj: object) -> object:
+    """
+    Encodes the objects unknown to `json` (as its `default`): numpy arrays & scalars as lists & numbers, the rest by
+    pydantic (e.g. pydantic models by their fields).
+    """
+
+    tolist = t.cast(t.Optional[t.Callable[[], object]], getattr(obj, "tolist", None))
+    if callable(tolist):
+        return tolist()
+
+    return t.cast(t.Callable[[object], object], pydantic_encoder)(obj)
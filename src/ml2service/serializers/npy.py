@@ -0,0 +1,105 @@
+import io
+import math
+import struct
+import typing as t
+
+import numpy as np
+import numpy.typing as npt
+from numpy.lib import format as npy_format
+
+from ml2service.serializers.base import Buffer, Serializer
+
+NDArray = npt.NDArray[t.Any]
+
+NPY_MEDIA_TYPE: t.Final[str] = "application/x-npy"
+
+_HEADER_LENGTH_FORMATS: t.Final[t.Mapping[int, struct.Struct]] = {
+    1: struct.Struct("<H"),
+    2: struct.Struct("<I"),
+    3: struct.Struct("<I"),
+}
+
+
+def decode_raw(data: Buffer, dtype: str, shape: t.Optional[t.Sequence[int]] = None) -> NDArray:
+    """Decodes C ordered array data of the dtype (e.g. `<f4`) and shape (one dimension by default) without copying."""
+
+    array_dtype = np.dtype(dtype)
+    if array_dtype.hasobject:
+        raise ValueError("object arrays are not supported", dtype)
+
+    view = memoryview(data).cast("B")
+    count = math.prod(shape) if shape is not None else -1
+
+    if count >= 0 and count * array_dtype.itemsize != len(view):
+        raise ValueError("data size doesn't match the shape", len(view), dtype, tuple(shape or ()))
+
+    array = np.frombuffer(view, dtype=array_dtype, count=count)
+
+    return array.reshape(shape) if shape is not None else array
+
+
+def decode_npy(data: Buffer) -> NDArray:
+    """Decodes NPY format data into an array over the data buffer (no copy), the array is read only then."""
+
+    view = memoryview(data).cast("B")
+    prefix_size = npy_format.MAGIC_LEN
+
+    if len(view) < prefix_size or bytes(view[:len(npy_format.MAGIC_PREFIX)]) != npy_format.MAGIC_PREFIX:
+        raise ValueError("not a NPY data")
+
+    length_format = _HEADER_LENGTH_FORMATS.get(view[len(npy_format.MAGIC_PREFIX)])
+    if length_format is None:
+        raise ValueError("unsupported NPY version", view[len(npy_format.MAGIC_PREFIX)])
+
+    (header_length,) = length_format.unpack_from(view, prefix_size)
+    offset = prefix_size + length_format.size + header_length
+
+    # only the header is copied to be parsed by numpy
+    stream = io.BytesIO(view[:offset])
+    version = npy_format.read_magic(stream)
+    shape, fortran_order, dtype = (
+        npy_format.read_array_header_1_0(stream) if version == (1, 0)
+        else npy_format.read_array_header_2_0(stream)
+    )
+
+    if dtype.hasobject:
+        raise ValueError("object arrays are not supported", dtype)
+
+    count = math.prod(shape)
+    if count * dtype.itemsize != len(view) - offset:
+        raise ValueError("data size doesn't match the shape", len(view) - offset, dtype, shape)
+
+    array = np.frombuffer(view, dtype=dtype, count=count, offset=offset)
+
+    return array.reshape(shape[::-1]).transpose() if fortran_order else array.reshape(shape)
+
+
+def encode_npy(array: NDArray) -> bytes:
+    """Encodes the array in NPY format, the data is copied once (C ordered arrays only)."""
+
+    contiguous = array if array.flags.c_contiguous else np.array(array, order="C")
+    if contiguous.dtype.hasobject:
+        raise ValueError("object arrays are not supported", contiguous.dtype)
+
+    header_data = npy_format.header_data_from_array_1_0(contiguous)
+    header = io.BytesIO()
+
+    try:
+        npy_format.write_array_header_1_0(header, header_data)
+
+    except ValueError:
+        # the header of the structured dtype with many fields doesn't fit version 1.0
+        header = io.BytesIO()
+        npy_format.write_array_header_2_0(header, header_data)
+
+    return b"".join((header.getbuffer(), contiguous.reshape(-1).view(np.uint8).data))
+
+
+class NpySerializer(Serializer[NDArray]):
+    """Encodes arrays in NPY format, decoded arrays refer to the data buffer (see `decode_npy`)."""
+
+    def encode(self, obj: NDArray) -> bytes:
+        return encode_npy(obj)
+
+    def decode(self, data: Buffer) -> NDArray:
+        return decode_npy(data)
@@ -0,0 +1,120 @@
+import lzma
+import pickle
+import struct
+import typing as t
+import zlib
+from enum import Enum
+
+from ml2service.serializers.base import Buffer, Serializer
+
+T = t.TypeVar("T")
+
+
+class Compression(str, Enum):
+    NONE = "none"
+    ZLIB = "zlib"
+    LZMA = "lzma"
+
+
+class PickleSerializer(t.Generic[T], Serializer[T]):
+    """
+    Pickle protocol 5 serializer that keeps large buffers (e.g. numpy arrays, bytearray) out of band.
+
+    Encoded data layout: header, buffer sizes, pickle stream and the out of band buffers aligned by `ALIGNMENT` bytes.
+    On decode the buffers are passed to pickle as views of the data, so objects that support out of band pickling are
+    restored without copying (that is zero copy for memory mapped values from `FileStorage`).
+
+    Optionally, the data is compressed when it is not smaller than `compression_threshold` bytes. Compressed data has
+    to be decompressed before unpickling, so zero copy decoding is not possible for it.
+    """
+
+    ALIGNMENT: t.Final[int] = 64
+
+    __MAGIC: t.Final[bytes] = b"M2SP"
+    __VERSION: t.Final[int] = 1
+    __HEADER: t.Final[struct.Struct] = struct.Struct("<4sBBxxIQ")
+    __SIZE: t.Final[struct.Struct] = struct.Struct("<Q")
+    __CODECS: t.Final[t.Sequence[Compression]] = (Compression.NONE, Compression.ZLIB, Compression.LZMA)
+
+    def __init__(
+            self,
+            compression: Compression = Compression.NONE,
+            compression_level: t.Optional[int] = None,
+            compression_threshold: int = 64 * 1024,
+    ) -> None:
+        self.__compression = compression
+        self.__compression_level = compression_level
+        self.__compression_threshold = compression_threshold
+
+    def encode(self, obj: T) -> bytes:
+        buffers: t.List[pickle.PickleBuffer] = []
+        stream = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+        raws = [buffer.raw() for buffer in buffers]
+
+        parts: t.List[t.Union[bytes, memoryview]] = [self.__SIZE.pack(raw.nbytes) for raw in raws]
+        parts.append(stream)
+        offset = self.__HEADER.size + sum(len(part) for part in parts)
+
+        for raw in raws:
+            padding = -offset % self.ALIGNMENT
+            parts.append(b"\0" * padding)
+            parts.append(raw)
+            offset += padding + raw.nbytes
+
+        compression = self.__compression if offset >= self.__compression_threshold else Compression.NONE
+        header = self.__HEADER.pack(self.__MAGIC, self.__VERSION, self.__CODECS.index(compression), len(raws),
+                                    len(stream))
+
+        if compression is Compression.NONE:
+            return b"".join([header, *parts])
+
+        return header + self.__compress(compression, b"".join(parts))
+
+    def decode(self, data: Buffer) -> T:
+        view = memoryview(data)
+        magic, version, codec, count, stream_size = t.cast(t.Tuple[bytes, int, int, int, int],
+                                                           self.__HEADER.unpack_from(view))
+        if magic != self.__MAGIC or version != self.__VERSION:
+            raise ValueError("unsupported serialized data", magic, version)
+
+        # offsets are counted from the start of the encoded data, the view may start after the header
+        offset = base = self.__HEADER.size
+        compression = self.__CODECS[codec]
+        view = view[base:]
+        if compression is not Compression.NONE:
+            view = memoryview(self.__decompress(compression, view))
+
+        sizes: t.List[int] = []
+        for _ in range(count):
+            size, = t.cast(t.Tuple[int], self.__SIZE.unpack_from(view, offset - base))
+            sizes.append(size)
+            offset += self.__SIZE.size
+
+        stream = view[offset - base:offset - base + stream_size]
+        offset += stream_size
+
+        buffers: t.List[memoryview] = []
+        for size in sizes:
+            offset += -offset % self.ALIGNMENT
+            buffers.append(view[offset - base:offset - base + size])
+            offset += size
+
+        return t.cast(T, pickle.loads(stream, buffers=buffers))
+
+    def __compress(self, compression: Compression, data: bytes) -> bytes:
+        if compression is Compression.ZLIB:
+            return zlib.compress(data, self.__compression_level if self.__compression_level is not None else -1)
+
+        elif compression is Compression.LZMA:
+            return lzma.compress(data, preset=self.__compression_level)
+
+        raise ValueError("unsupported compression", compression)
+
+    def __decompress(self, compression: Compression, data: memoryview) -> bytes:
+        if compression is Compression.ZLIB:
+            return zlib.decompress(data)
+
+        elif compression is Compression.LZMA:
+            return lzma.decompress(data)
+
+        raise ValueError("unsupported compression", compression)
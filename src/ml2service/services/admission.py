@@ -0,0 +1,142 @@
+import typing as t
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from threading import Lock
+
+K = t.TypeVar("K")
+
+
+@dataclass(frozen=True)
+class AdmissionOptions:
+    max_in_flight: int
+    max_in_flight_per_key: t.Optional[int] = None
+    max_queued: int = 0
+    max_wait: t.Optional[float] = None
+    retry_after: int = 1
+
+    def __post_init__(self) -> None:
+        if self.max_in_flight < 1:
+            raise ValueError("max in flight must be positive", self.max_in_flight)
+
+        if self.max_in_flight_per_key is not None and self.max_in_flight_per_key < 1:
+            raise ValueError("max in flight per key must be positive", self.max_in_flight_per_key)
+
+        if self.max_queued < 0:
+            raise ValueError("max queued must not be negative", self.max_queued)
+
+        if self.max_wait is not None and self.max_wait <= 0.0:
+            raise ValueError("max wait must be positive", self.max_wait)
+
+
+class AdmissionLimiter(t.Generic[K]):
+    """
+    Caps the requests in flight globally and per key. Requests over the caps wait in a bounded FIFO queue, requests
+    that don't fit the queue are rejected at once, so under overload a few requests fail fast rather than all of them
+    time out. A queued request of a key at its cap doesn't hold back the requests of the other keys.
+
+    Waiting is up to the caller: `acquire` returns a future that is done when the request is admitted, so it may be
+    awaited by the event loop without holding a thread. Each admitted request must be released, a request that gave up
+    waiting must be abandoned.
+    """
+
+    def __init__(self, options: AdmissionOptions) -> None:
+        self.__options = options
+        self.__lock = Lock()
+        self.__in_flight = 0
+        self.__in_flight_by_key: t.Dict[K, int] = {}
+        self.__queue: t.Deque[t.Tuple[K, Future[None]]] = deque()
+
+    @property
+    def options(self) -> AdmissionOptions:
+        return self.__options
+
+    @property
+    def in_flight(self) -> int:
+        with self.__lock:
+            return self.__in_flight
+
+    @property
+    def queued(self) -> int:
+        with self.__lock:
+            return len(self.__queue)
+
+    def acquire(self, key: K) -> t.Optional[Future[None]]:
+        """Returns None if the request is rejected, otherwise a future that is done when the request is admitted."""
+
+        future: Future[None] = Future()
+
+        with self.__lock:
+            # the queued requests are those that can't be admitted, so the request doesn't overtake them
+            if self.__can_admit(key):
+                self.__admit(key)
+                future.set_result(None)
+
+            elif len(self.__queue) < self.__options.max_queued:
+                self.__queue.append((key, future))
+
+            else:
+                return None
+
+        return future
+
+    def release(self, key: K) -> None:
+        with self.__lock:
+            self.__in_flight -= 1
+
+            count = self.__in_flight_by_key[key] - 1
+            if count > 0:
+                self.__in_flight_by_key[key] = count
+
+            else:
+                del self.__in_flight_by_key[key]
+
+            admitted = self.__admit_queued()
+
+        for future in admitted:
+            future.set_result(None)
+
+    def abandon(self, key: K, future: Future[None]) -> None:
+        """Withdraws the request that stopped waiting, releases it if it was admitted meanwhile."""
+
+        with self.__lock:
+            try:
+                self.__queue.remove((key, future))
+                return
+
+            except ValueError:
+                # the waiter cancelled its future and was skipped, or it was admitted
+                if future.cancelled():
+                    return
+
+        self.release(key)
+
+    def __can_admit(self, key: K) -> bool:
+        max_per_key = self.__options.max_in_flight_per_key
+
+        return self.__in_flight < self.__options.max_in_flight and (
+                max_per_key is None or self.__in_flight_by_key.get(key, 0) < max_per_key
+        )
+
+    def __admit(self, key: K) -> None:
+        self.__in_flight += 1
+        self.__in_flight_by_key[key] = self.__in_flight_by_key.get(key, 0) + 1
+
+    def __admit_queued(self) -> t.Sequence[Future[None]]:
+        admitted: t.List[Future[None]] = []
+        skipped: t.List[t.Tuple[K, Future[None]]] = []
+
+        while self.__queue and self.__in_flight < self.__options.max_in_flight:
+            key, future = self.__queue.popleft()
+
+            if not self.__can_admit(key):
+                if not future.cancelled():
+                    skipped.append((key, future))
+
+            elif future.set_running_or_notify_cancel():
+                self.__admit(key)
+                admitted.append(future)
+
+        self.__queue.extendleft(reversed(skipped))
+
+        return admitted
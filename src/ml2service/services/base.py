@@ -1,6 +1,7 @@
 import abc
 import typing as t
 from dataclasses import dataclass
+from enum import Enum
 
 K = t.TypeVar("K")
 T = t.TypeVar("T")
@@ -15,6 +16,8 @@ T_predict_output = t.TypeVar("T_predict_output", covariant=True)
 class TrainRequest(t.Generic[K, T]):
     key: K
     input_: T
+    # `time.monotonic()` time after which the caller doesn't wait for the response anymore
+    deadline: t.Optional[float] = None
 
 
 @dataclass(frozen=True)
@@ -28,10 +31,99 @@ class TrainInternalErrorResponse(t.Generic[K]):
     error: Exception
 
 
+@dataclass(frozen=True)
+class TrainDeadlineExceededErrorResponse(t.Generic[K]):
+    key: K
+
+
+# noinspection DuplicatedCode
+@dataclass(frozen=True)
+class UpdateRequest(t.Generic[K, T]):
+    key: K
+    input_: T
+    # `time.monotonic()` time after which the caller doesn't wait for the response anymore
+    deadline: t.Optional[float] = None
+
+
+@dataclass(frozen=True)
+class UpdateSuccessResponse(t.Generic[K]):
+    key: K
+
+
+@dataclass(frozen=True)
+class UpdateModelNotFoundErrorResponse(t.Generic[K]):
+    key: K
+
+
+@dataclass(frozen=True)
+class UpdateInternalErrorResponse(t.Generic[K]):
+    key: K
+    error: Exception
+
+
+@dataclass(frozen=True)
+class UpdateDeadlineExceededErrorResponse(t.Generic[K]):
+    key: K
+
+
+class TrainJobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+@dataclass(frozen=True)
+class TrainJobSubmittedResponse(t.Generic[K]):
+    key: K
+    job_id: str
+
+
+@dataclass(frozen=True)
+class TrainJobRejectedErrorResponse(t.Generic[K]):
+    key: K
+
+
+@dataclass(frozen=True)
+class TrainJobRequest(t.Generic[K]):
+    key: K
+    job_id: str
+
+
+@dataclass(frozen=True)
+class TrainJobStatusResponse(t.Generic[K]):
+    key: K
+    job_id: str
+    status: TrainJobStatus
+    error: t.Optional[Exception] = None
+
+
+@dataclass(frozen=True)
+class TrainJobCancelledResponse(t.Generic[K]):
+    key: K
+    job_id: str
+
+
+@dataclass(frozen=True)
+class TrainJobNotFoundErrorResponse(t.Generic[K]):
+    key: K
+    job_id: str
+
+
+@dataclass(frozen=True)
+class TrainJobFinishedErrorResponse(t.Generic[K]):
+    key: K
+    job_id: str
+    status: TrainJobStatus
+
+
 @dataclass(frozen=True)
 class PredictRequest(t.Generic[K, T]):
     key: K
     input_: T
+    # `time.monotonic()` time after which the caller doesn't wait for the response anymore
+    deadline: t.Optional[float] = None
 
 
 # noinspection DuplicatedCode
@@ -52,6 +144,47 @@ class PredictModelInternalErrorResponse(t.Generic[K]):
     error: Exception
 
 
+@dataclass(frozen=True)
+class PredictDeadlineExceededErrorResponse(t.Generic[K]):
+    key: K
+
+
+@dataclass(frozen=True)
+class PredictManyRequest(t.Generic[K, T]):
+    key: K
+    inputs: t.Sequence[T]
+    # `time.monotonic()` time after which the caller doesn't wait for the response anymore
+    deadline: t.Optional[float] = None
+
+
+@dataclass(frozen=True)
+class PredictManySuccessResponse(t.Generic[K, T]):
+    key: K
+    results: t.Sequence[t.Union[
+        PredictSuccessResponse[K, T],
+        PredictModelInternalErrorResponse[K],
+    ]]
+
+
+@dataclass(frozen=True)
+class PredictStreamRequest(t.Generic[K, T]):
+    key: K
+    # read lazily, so the stream may be longer than the memory allows
+    inputs: t.Iterable[T]
+    # the inputs are predicted by chunks of this size (unless the model predicts the stream by itself)
+    chunk_size: int = 64
+
+
+@dataclass(frozen=True)
+class PredictStreamSuccessResponse(t.Generic[K, T]):
+    key: K
+    # the result of each input in order, the inputs are predicted as the results are consumed
+    results: t.Iterator[t.Union[
+        PredictSuccessResponse[K, T],
+        PredictModelInternalErrorResponse[K],
+    ]]
+
+
 @dataclass(frozen=True)
 class RemoveRequest(t.Generic[K]):
     key: K
@@ -67,8 +200,15 @@ class RemoveModelNotFoundErrorResponse(t.Generic[K]):
     key: K
 
 
+@dataclass(frozen=True)
+class RemoveInternalErrorResponse(t.Generic[K]):
+    key: K
+    error: Exception
+
+
 class ModelService(metaclass=abc.ABCMeta):
-    pass
+    def close(self) -> None:
+        """Releases the resources of the service (e.g. its threads), the runner calls it on shutdown."""
 
 
 class ModelTrainingService(t.Generic[K, T_train_input], ModelService, metaclass=abc.ABCMeta):
@@ -79,6 +219,55 @@ class ModelTrainingService(t.Generic[K, T_train_input], ModelService, metaclass=
     ) -> t.Union[
         TrainSuccessResponse[K],
         TrainInternalErrorResponse[K],
+        TrainDeadlineExceededErrorResponse[K],
+    ]:
+        raise NotImplementedError
+
+
+class ModelUpdatingService(t.Generic[K, T_train_input], ModelService, metaclass=abc.ABCMeta):
+    @abc.abstractmethod
+    def update(
+            self,
+            request: UpdateRequest[K, T_train_input],
+    ) -> t.Union[
+        UpdateSuccessResponse[K],
+        UpdateModelNotFoundErrorResponse[K],
+        UpdateInternalErrorResponse[K],
+        UpdateDeadlineExceededErrorResponse[K],
+    ]:
+        """Updates the stored model with the input and stores the result, the updates of a key don't interleave."""
+        raise NotImplementedError
+
+
+class ModelTrainingJobService(t.Generic[K, T_train_input], ModelService, metaclass=abc.ABCMeta):
+    @abc.abstractmethod
+    def submit_train(
+            self,
+            request: TrainRequest[K, T_train_input],
+    ) -> t.Union[
+        TrainJobSubmittedResponse[K],
+        TrainJobRejectedErrorResponse[K],
+    ]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_train_job(
+            self,
+            request: TrainJobRequest[K],
+    ) -> t.Union[
+        TrainJobStatusResponse[K],
+        TrainJobNotFoundErrorResponse[K],
+    ]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def cancel_train_job(
+            self,
+            request: TrainJobRequest[K],
+    ) -> t.Union[
+        TrainJobCancelledResponse[K],
+        TrainJobNotFoundErrorResponse[K],
+        TrainJobFinishedErrorResponse[K],
     ]:
         raise NotImplementedError
 
@@ -92,6 +281,34 @@ class ModelPredictionService(t.Generic[K, T_predict_input, T_predict_output], Mo
         PredictSuccessResponse[K, T_predict_output],
         PredictModelNotFoundErrorResponse[K],
         PredictModelInternalErrorResponse[K],
+        PredictDeadlineExceededErrorResponse[K],
+    ]:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def predict_many(
+            self,
+            request: PredictManyRequest[K, T_predict_input],
+    ) -> t.Union[
+        PredictManySuccessResponse[K, T_predict_output],
+        PredictModelNotFoundErrorResponse[K],
+        PredictDeadlineExceededErrorResponse[K],
+    ]:
+        raise NotImplementedError
+
+
+class ModelStreamingPredictionService(
+    t.Generic[K, T_predict_input, T_predict_output],
+    ModelService,
+    metaclass=abc.ABCMeta,
+):
+    @abc.abstractmethod
+    def predict_stream(
+            self,
+            request: PredictStreamRequest[K, T_predict_input],
+    ) -> t.Union[
+        PredictStreamSuccessResponse[K, T_predict_output],
+        PredictModelNotFoundErrorResponse[K],
     ]:
         raise NotImplementedError
 
@@ -104,5 +321,6 @@ class ModelRemovingService(t.Generic[K], ModelService, metaclass=abc.ABCMeta):
     ) -> t.Union[
         RemoveSuccessResponse[K],
         RemoveModelNotFoundErrorResponse[K],
+        RemoveInternalErrorResponse[K],
     ]:
         raise NotImplementedError
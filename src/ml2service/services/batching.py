@@ -0,0 +1,128 @@
+import typing as t
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from functools import partial
+from threading import Event, Lock
+
+K = t.TypeVar("K")
+T = t.TypeVar("T")
+R = t.TypeVar("R")
+
+
+@dataclass(frozen=True)
+class BatchingOptions:
+    max_batch_size: int = 32
+    max_wait_ms: float = 5.0
+
+    def __post_init__(self) -> None:
+        if self.max_batch_size < 1:
+            raise ValueError("max batch size must be positive", self.max_batch_size)
+
+        if self.max_wait_ms < 0:
+            raise ValueError("max wait must not be negative", self.max_wait_ms)
+
+
+@dataclass()
+class _Batch(t.Generic[T, R]):
+    items: t.List[T] = field(default_factory=list)
+    futures: t.List["Future[R]"] = field(default_factory=list)
+    closed: Event = field(default_factory=Event)
+
+
+class MicroBatcher(t.Generic[K, T, R]):
+    """
+    Collects items submitted concurrently for the same key and passes them to the handler as one batch.
+
+    The first caller of a batch becomes its leader: it waits until the batch is full or the wait window passes, then
+    runs the handler in its own thread and hands the results out to the other callers. Thus, no background threads are
+    required, and the callers are blocked until their results are ready. The leader doesn't wait when no other item of
+    the key is in flight (e.g. handled by the previous batch), so a lone item isn't delayed for the batch that won't
+    come.
+
+    The handler failure (or the wrong number of its results) is raised to each caller of the batch, unless `on_error`
+    turns it into the result of each item.
+
+    The leader that has a timeout may pass its batch to `offload` (e.g. `Executor.submit`), then it waits for its result
+    up to the timeout like the other callers, and the batch goes on without it.
+    """
+
+    def __init__(
+            self,
+            handler: t.Callable[[K, t.Sequence[T]], t.Sequence[R]],
+            options: BatchingOptions,
+            on_error: t.Optional[t.Callable[[K, Exception], R]] = None,
+            offload: t.Optional[t.Callable[[t.Callable[[], None]], object]] = None,
+    ) -> None:
+        self.__handler = handler
+        self.__on_error = on_error
+        self.__offload = offload
+        self.__max_batch_size = options.max_batch_size
+        self.__max_wait = options.max_wait_ms / 1000.0
+        self.__lock = Lock()
+        self.__pending: t.Dict[K, _Batch[T, R]] = {}
+        self.__in_flight: t.Dict[K, int] = {}
+
+    def submit(self, key: K, item: T, timeout: t.Optional[float] = None) -> R:
+        """Returns the result of the item, raises `concurrent.futures.TimeoutError` if it isn't ready in time."""
+
+        future: Future[R] = Future()
+
+        with self.__lock:
+            in_flight = self.__in_flight[key] = self.__in_flight.get(key, 0) + 1
+
+            batch = self.__pending.get(key)
+            is_leader = batch is None
+            if batch is None:
+                batch = self.__pending[key] = _Batch()
+
+            batch.items.append(item)
+            batch.futures.append(future)
+
+            if len(batch.items) >= self.__max_batch_size or in_flight == 1:
+                self.__close(key, batch)
+
+        try:
+            if is_leader:
+                batch.closed.wait(self.__max_wait)
+
+                with self.__lock:
+                    self.__close(key, batch)
+
+                if timeout is not None and self.__offload is not None:
+                    self.__offload(partial(self.__run, key, batch))
+
+                else:
+                    self.__run(key, batch)
+
+            return future.result(timeout)
+
+        finally:
+            with self.__lock:
+                self.__in_flight[key] -= 1
+                if self.__in_flight[key] == 0:
+                    del self.__in_flight[key]
+
+    def __close(self, key: K, batch: _Batch[T, R]) -> None:
+        if self.__pending.get(key) is batch:
+            del self.__pending[key]
+
+        batch.closed.set()
+
+    def __run(self, key: K, batch: _Batch[T, R]) -> None:
+        try:
+            results = self.__handler(key, batch.items)
+            if len(results) != len(batch.items):
+                raise RuntimeError("batch handler returned unexpected number of results", len(results),
+                                   len(batch.items))
+
+        except Exception as err:
+            for future in batch.futures:
+                if self.__on_error is not None:
+                    future.set_result(self.__on_error(key, err))
+
+                else:
+                    future.set_exception(err)
+
+        else:
+            for future, result in zip(batch.futures, results):
+                future.set_result(result)
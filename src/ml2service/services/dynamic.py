@@ -1,21 +1,54 @@
 import typing as t
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 
-from ml2service.models.base import Model, ModelTrainer
+from ml2service.deadlines import DeadlineExecutor, get_timeout, is_expired
+from ml2service.executors.base import ModelExecutor
+from ml2service.executors.inline import InlineModelExecutor
+from ml2service.keyed_lock import KeyedLock
+from ml2service.models.base import IncrementalModelTrainer, Model, ModelTrainer
 from ml2service.services.base import (
     ModelPredictionService,
     ModelRemovingService,
+    ModelStreamingPredictionService,
+    ModelTrainingJobService,
     ModelTrainingService,
+    ModelUpdatingService,
+    PredictDeadlineExceededErrorResponse,
     PredictModelInternalErrorResponse,
+    PredictManyRequest,
+    PredictManySuccessResponse,
     PredictModelNotFoundErrorResponse,
     PredictRequest,
+    PredictStreamRequest,
+    PredictStreamSuccessResponse,
     PredictSuccessResponse,
+    RemoveInternalErrorResponse,
     RemoveModelNotFoundErrorResponse,
     RemoveRequest,
     RemoveSuccessResponse,
+    TrainDeadlineExceededErrorResponse,
     TrainInternalErrorResponse,
+    TrainJobCancelledResponse,
+    TrainJobFinishedErrorResponse,
+    TrainJobNotFoundErrorResponse,
+    TrainJobRejectedErrorResponse,
+    TrainJobRequest,
+    TrainJobStatus,
+    TrainJobStatusResponse,
+    TrainJobSubmittedResponse,
     TrainRequest,
     TrainSuccessResponse,
+    UpdateDeadlineExceededErrorResponse,
+    UpdateInternalErrorResponse,
+    UpdateModelNotFoundErrorResponse,
+    UpdateRequest,
+    UpdateSuccessResponse,
 )
+from ml2service.services.batching import BatchingOptions
+from ml2service.services.jobs import TrainingJobOptions, TrainingJobQueue
+from ml2service.services.prediction_cache import PredictionCacheOptions, hash_input
+from ml2service.services.predictor import ModelPredictor
+from ml2service.single_flight import SingleFlight
 from ml2service.storages.base import Storage
 
 K = t.TypeVar("K")
@@ -29,55 +62,227 @@ T_predict_output = t.TypeVar("T_predict_output")
 class DynamicModelService(
     t.Generic[K, T_train_input, T_predict_input, T_predict_output],
     ModelTrainingService[K, T_train_input],
+    ModelTrainingJobService[K, T_train_input],
+    ModelUpdatingService[K, T_train_input],
     ModelPredictionService[K, T_predict_input, T_predict_output],
+    ModelStreamingPredictionService[K, T_predict_input, T_predict_output],
     ModelRemovingService[K],
 ):
     def __init__(
             self,
             trainer: ModelTrainer[T_train_input, T_predict_input, T_predict_output],
             storage: Storage[K, Model[T_predict_input, T_predict_output]],
+            batching: t.Optional[BatchingOptions] = None,
+            executor: t.Optional[ModelExecutor] = None,
+            prediction_cache: t.Optional[PredictionCacheOptions] = None,
+            train_jobs: t.Optional[TrainingJobOptions] = None,
     ) -> None:
         self.__trainer = trainer
         self.__storage = storage
+        self.__writes: KeyedLock[K] = KeyedLock()
+        self.__fits: SingleFlight[t.Tuple[K, str], Model[T_predict_input, T_predict_output]] = SingleFlight()
+        self.__train_jobs: TrainingJobQueue[K] = TrainingJobQueue(train_jobs or TrainingJobOptions())
+        self.__executor = executor or InlineModelExecutor()
+        self.__deadlines = DeadlineExecutor()
+        self.__predictor: ModelPredictor[K, T_predict_input, T_predict_output] = ModelPredictor(
+            self.__get_model,
+            self.__executor,
+            self.__deadlines,
+            batching,
+            prediction_cache,
+        )
 
     def train(self, request: TrainRequest[K, T_train_input]) -> t.Union[
         TrainSuccessResponse[K],
         TrainInternalErrorResponse[K],
+        TrainDeadlineExceededErrorResponse[K],
     ]:
+        if is_expired(request.deadline):
+            return TrainDeadlineExceededErrorResponse(key=request.key)
+
+        try:
+            future = self.__predictor.call(lambda: self.__fit(request), request.deadline)
+            model = future.result(get_timeout(request.deadline))
+
+        except FutureTimeoutError:
+            # the fit goes on (it may be shared with the other requests), but its model won't reach the storage
+            return TrainDeadlineExceededErrorResponse(key=request.key)
+
+        except Exception as err:
+            return TrainInternalErrorResponse(key=request.key, error=err)
+
         try:
-            model = self.__trainer.train(request.input_)
+            with self.__writes.locked(request.key):
+                self.__storage.update(request.key, model)
 
         except Exception as err:
+            # e.g. the storage is full
             return TrainInternalErrorResponse(key=request.key, error=err)
 
-        self.__storage.update(request.key, model)
+        self.__predictor.invalidate(request.key)
 
         return TrainSuccessResponse(key=request.key)
 
+    def update(self, request: UpdateRequest[K, T_train_input]) -> t.Union[
+        UpdateSuccessResponse[K],
+        UpdateModelNotFoundErrorResponse[K],
+        UpdateInternalErrorResponse[K],
+        UpdateDeadlineExceededErrorResponse[K],
+    ]:
+        if is_expired(request.deadline):
+            return UpdateDeadlineExceededErrorResponse(key=request.key)
+
+        if not isinstance(self.__trainer, IncrementalModelTrainer):
+            return UpdateInternalErrorResponse(key=request.key,
+                                               error=TypeError("trainer doesn't support updates", self.__trainer))
+
+        trainer = t.cast(IncrementalModelTrainer[T_train_input, T_predict_input, T_predict_output], self.__trainer)
+
+        # the model is read, updated & written back under the lock of its key, so the concurrent writes of the key are
+        # not lost, while the writes of the other keys don't wait for the update
+        if not self.__writes.acquire(request.key, get_timeout(request.deadline)):
+            return UpdateDeadlineExceededErrorResponse(key=request.key)
+
+        try:
+            model = self.__storage.get(request.key)
+            if model is None:
+                return UpdateModelNotFoundErrorResponse(key=request.key)
+
+            future = self.__predictor.call(lambda: self.__executor.update(trainer, model, request.input_),
+                                           request.deadline)
+
+            try:
+                updated = future.result(get_timeout(request.deadline))
+                self.__storage.update(request.key, updated)
+
+            except FutureTimeoutError:
+                # the update is dropped, the stored model stays as it was
+                future.cancel()
+                return UpdateDeadlineExceededErrorResponse(key=request.key)
+
+            except Exception as err:
+                return UpdateInternalErrorResponse(key=request.key, error=err)
+
+        finally:
+            self.__writes.release(request.key)
+
+        self.__predictor.invalidate(request.key)
+
+        return UpdateSuccessResponse(key=request.key)
+
+    def submit_train(self, request: TrainRequest[K, T_train_input]) -> t.Union[
+        TrainJobSubmittedResponse[K],
+        TrainJobRejectedErrorResponse[K],
+    ]:
+        def run(is_cancelled: t.Callable[[], bool]) -> t.Optional[Exception]:
+            try:
+                model = self.__fit(request).result()
+
+            except Exception as err:
+                return err
+
+            # the model reaches the storage only when the fit is complete and the job is still wanted
+            if not is_cancelled():
+                with self.__writes.locked(request.key):
+                    self.__storage.update(request.key, model)
+
+                self.__predictor.invalidate(request.key)
+
+            return None
+
+        job_id = self.__train_jobs.submit(request.key, run)
+        if job_id is None:
+            return TrainJobRejectedErrorResponse(key=request.key)
+
+        return TrainJobSubmittedResponse(key=request.key, job_id=job_id)
+
+    def get_train_job(self, request: TrainJobRequest[K]) -> t.Union[
+        TrainJobStatusResponse[K],
+        TrainJobNotFoundErrorResponse[K],
+    ]:
+        response = self.__train_jobs.get(request.key, request.job_id)
+        if response is None:
+            return TrainJobNotFoundErrorResponse(key=request.key, job_id=request.job_id)
+
+        return response
+
+    def cancel_train_job(self, request: TrainJobRequest[K]) -> t.Union[
+        TrainJobCancelledResponse[K],
+        TrainJobNotFoundErrorResponse[K],
+        TrainJobFinishedErrorResponse[K],
+    ]:
+        status = self.__train_jobs.cancel(request.key, request.job_id)
+        if status is None:
+            return TrainJobNotFoundErrorResponse(key=request.key, job_id=request.job_id)
+
+        elif status in (TrainJobStatus.PENDING, TrainJobStatus.RUNNING):
+            return TrainJobCancelledResponse(key=request.key, job_id=request.job_id)
+
+        return TrainJobFinishedErrorResponse(key=request.key, job_id=request.job_id, status=status)
+
     def predict(self, request: PredictRequest[K, T_predict_input]) -> t.Union[
         PredictSuccessResponse[K, T_predict_output],
         PredictModelNotFoundErrorResponse[K],
         PredictModelInternalErrorResponse[K],
+        PredictDeadlineExceededErrorResponse[K],
     ]:
-        model = self.__storage.get(request.key)
-
-        if model is None:
-            return PredictModelNotFoundErrorResponse(key=request.key)
+        return self.__predictor.predict(request)
 
-        try:
-            output = model.predict(request.input_)
-
-        except Exception as err:
-            return PredictModelInternalErrorResponse(key=request.key, error=err)
+    def predict_many(self, request: PredictManyRequest[K, T_predict_input]) -> t.Union[
+        PredictManySuccessResponse[K, T_predict_output],
+        PredictModelNotFoundErrorResponse[K],
+        PredictDeadlineExceededErrorResponse[K],
+    ]:
+        return self.__predictor.predict_many(request)
 
-        return PredictSuccessResponse(key=request.key, output=output)
+    def predict_stream(self, request: PredictStreamRequest[K, T_predict_input]) -> t.Union[
+        PredictStreamSuccessResponse[K, T_predict_output],
+        PredictModelNotFoundErrorResponse[K],
+    ]:
+        return self.__predictor.predict_stream(request)
 
     def remove(self, request: RemoveRequest[K]) -> t.Union[
         RemoveSuccessResponse[K],
         RemoveModelNotFoundErrorResponse[K],
+        RemoveInternalErrorResponse[K],
     ]:
-        model = self.__storage.remove(request.key)
+        try:
+            with self.__writes.locked(request.key):
+                model = self.__storage.remove(request.key)
+
+        except Exception as err:
+            return RemoveInternalErrorResponse(key=request.key, error=err)
+
+        self.__predictor.invalidate(request.key)
+
         if model is None:
             return RemoveModelNotFoundErrorResponse(key=request.key)
 
         return RemoveSuccessResponse(key=request.key)
+
+    def close(self) -> None:
+        self.__train_jobs.shutdown()
+        self.__deadlines.shutdown()
+
+    def __fit(self, request: TrainRequest[K, T_train_input]) -> "Future[Model[T_predict_input, T_predict_output]]":
+        digest = hash_input(request.input_)
+        if digest is None:
+            return self.__executor.train(self.__trainer, request.input_)
+
+        # concurrent trainings of the same key with the same input share a single fit, each waits for it up to its
+        # own deadline
+        return self.__fits.share(
+            (request.key, digest),
+            lambda: self.__executor.train(self.__trainer, request.input_),
+        )
+
+    def __get_model(self, key: K) -> t.Tuple[
+        t.Optional[Model[T_predict_input, T_predict_output]],
+        t.Optional[t.Hashable],
+    ]:
+        if not self.__executor.uses_cache_keys:
+            return self.__storage.get(key), None
+
+        # the models decoded by the storage on each get are told apart by their versions, not by the objects
+        model, version = self.__storage.get_versioned(key)
+        return model, (key, version) if version is not None else None
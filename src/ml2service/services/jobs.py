@@ -0,0 +1,132 @@
+import typing as t
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from threading import Lock
+from uuid import uuid4
+
+from ml2service.services.base import TrainJobStatus, TrainJobStatusResponse
+
+K = t.TypeVar("K")
+
+TrainingJobRunner = t.Callable[[t.Callable[[], bool]], t.Optional[Exception]]
+
+
+@dataclass(frozen=True)
+class TrainingJobOptions:
+    max_workers: int = 1
+    max_pending: int = 16
+    max_finished: int = 1024
+
+    def __post_init__(self) -> None:
+        if self.max_workers < 1:
+            raise ValueError("max workers must be positive", self.max_workers)
+
+        if self.max_pending < 0:
+            raise ValueError("max pending must not be negative", self.max_pending)
+
+
+@dataclass()
+class _Job(t.Generic[K]):
+    key: K
+    status: TrainJobStatus = TrainJobStatus.PENDING
+    error: t.Optional[Exception] = None
+
+
+class TrainingJobQueue(t.Generic[K]):
+    """
+    Runs training jobs on a bounded thread pool and keeps track of their statuses.
+
+    A job runner receives a callable that tells whether the job was cancelled, so that a runner may discard its result
+    when the job was cancelled while running. Statuses of the latest finished jobs are kept for polling.
+
+    The thread pool is created by the first job, so the queue of the service that never gets jobs costs nothing.
+    """
+
+    def __init__(self, options: TrainingJobOptions) -> None:
+        self.__max_workers = options.max_workers
+        self.__executor: t.Optional[ThreadPoolExecutor] = None
+        self.__max_active = options.max_workers + options.max_pending
+        self.__max_finished = options.max_finished
+        self.__lock = Lock()
+        self.__jobs: t.Dict[str, _Job[K]] = {}
+        self.__finished: t.Deque[str] = deque()
+        self.__active = 0
+
+    def submit(self, key: K, runner: TrainingJobRunner) -> t.Optional[str]:
+        with self.__lock:
+            if self.__active >= self.__max_active:
+                return None
+
+            job_id = uuid4().hex
+            job = self.__jobs[job_id] = _Job(key)
+            self.__active += 1
+
+            if self.__executor is None:
+                self.__executor = ThreadPoolExecutor(max_workers=self.__max_workers, thread_name_prefix="train-job")
+
+            executor = self.__executor
+
+        executor.submit(self.__run, job_id, job, runner)
+
+        return job_id
+
+    def get(self, key: K, job_id: str) -> t.Optional[TrainJobStatusResponse[K]]:
+        with self.__lock:
+            job = self.__find(key, job_id)
+            if job is None:
+                return None
+
+            return TrainJobStatusResponse(key=key, job_id=job_id, status=job.status, error=job.error)
+
+    def cancel(self, key: K, job_id: str) -> t.Optional[TrainJobStatus]:
+        """Cancels pending or running job. Returns the status that job had before the cancellation."""
+
+        with self.__lock:
+            job = self.__find(key, job_id)
+            if job is None:
+                return None
+
+            status = job.status
+            if status in (TrainJobStatus.PENDING, TrainJobStatus.RUNNING):
+                job.status = TrainJobStatus.CANCELLED
+
+            return status
+
+    def shutdown(self) -> None:
+        with self.__lock:
+            executor, self.__executor = self.__executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def __find(self, key: K, job_id: str) -> t.Optional[_Job[K]]:
+        job = self.__jobs.get(job_id)
+        return job if job is not None and job.key == key else None
+
+    def __run(self, job_id: str, job: _Job[K], runner: TrainingJobRunner) -> None:
+        try:
+            with self.__lock:
+                if job.status is TrainJobStatus.CANCELLED:
+                    return
+
+                job.status = TrainJobStatus.RUNNING
+
+            try:
+                error = runner(lambda: job.status is TrainJobStatus.CANCELLED)
+
+            except Exception as err:
+                error = err
+
+            with self.__lock:
+                if job.status is TrainJobStatus.RUNNING:
+                    job.status = TrainJobStatus.FAILED if error is not None else TrainJobStatus.SUCCEEDED
+                    job.error = error
+
+        finally:
+            with self.__lock:
+                self.__active -= 1
+                self.__finished.append(job_id)
+
+                while len(self.__finished) > self.__max_finished:
+                    self.__jobs.pop(self.__finished.popleft(), None)
@@ -0,0 +1,111 @@
+import dataclasses
+import hashlib
+import json
+import typing as t
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import PurePath
+from threading import Lock
+
+from pydantic import BaseModel
+
+K = t.TypeVar("K")
+T = t.TypeVar("T")
+
+
+@dataclass(frozen=True)
+class PredictionCacheOptions:
+    max_entries: int = 10_000
+
+    def __post_init__(self) -> None:
+        if self.max_entries < 1:
+            raise ValueError("max entries must be positive", self.max_entries)
+
+
+def _to_json_compatible(obj: object) -> object:
+    if isinstance(obj, BaseModel):  # type: ignore[misc]
+        return t.cast(object, obj.dict())
+
+    elif dataclasses.is_dataclass(obj) and not isinstance(obj, type):  # type: ignore[misc]
+        return t.cast(object, dataclasses.asdict(obj))
+
+    elif isinstance(obj, Enum):
+        return t.cast(object, obj.value)
+
+    elif isinstance(obj, (set, frozenset)):
+        return sorted(t.cast(t.AbstractSet[object], obj), key=repr)
+
+    elif isinstance(obj, PurePath):
+        return str(obj)
+
+    elif isinstance(obj, (bytes, bytearray, memoryview)) or hasattr(obj, "__array_interface__"):
+        # buffers & numpy arrays
+        view = memoryview(obj)  # type: ignore[arg-type]
+        return {"format": view.format, "shape": view.shape, "data": hashlib.blake2b(view.tobytes()).hexdigest()}
+
+    raise TypeError("can't make a canonical representation", obj)
+
+
+def hash_input(input_: object) -> t.Optional[str]:
+    """Returns a digest of canonical JSON representation of the input or None if the input can't be represented."""
+
+    try:
+        data = json.dumps(input_, sort_keys=True, separators=(",", ":"), default=_to_json_compatible)
+
+    except (TypeError, ValueError):
+        return None
+
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+
+class PredictionCache(t.Generic[K, T]):
+    """
+    LRU cache of prediction outputs by model key and input digest.
+
+    Outputs computed before the invalidation of a model key must not get into the cache, so each lookup returns a
+    generation, and the output is stored only if no invalidation happened since that lookup.
+    """
+
+    def __init__(self, options: PredictionCacheOptions) -> None:
+        self.__max_entries = options.max_entries
+        self.__lock = Lock()
+        self.__outputs: OrderedDict[t.Tuple[K, str], T] = OrderedDict()
+        self.__digests: t.Dict[K, t.Set[str]] = {}
+        self.__generation = 0
+
+    def get(self, key: K, digest: str) -> t.Tuple[bool, t.Optional[T], int]:
+        with self.__lock:
+            entry_key = (key, digest)
+
+            if entry_key in self.__outputs:
+                self.__outputs.move_to_end(entry_key)
+                return True, self.__outputs[entry_key], self.__generation
+
+            return False, None, self.__generation
+
+    def put(self, key: K, digest: str, output: T, generation: int) -> None:
+        with self.__lock:
+            if generation != self.__generation:
+                return
+
+            self.__outputs[(key, digest)] = output
+            self.__digests.setdefault(key, set()).add(digest)
+
+            while len(self.__outputs) > self.__max_entries:
+                (evicted_key, evicted_digest), _ = self.__outputs.popitem(last=False)
+                self.__discard_digest(evicted_key, evicted_digest)
+
+    def invalidate(self, key: K) -> None:
+        with self.__lock:
+            self.__generation += 1
+
+            for digest in self.__digests.pop(key, ()):
+                self.__outputs.pop((key, digest), None)
+
+    def __discard_digest(self, key: K, digest: str) -> None:
+        digests = self.__digests.get(key)
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                del self.__digests[key]
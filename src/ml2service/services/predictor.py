@@ -0,0 +1,238 @@
+import typing as t
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from ml2service.deadlines import DeadlineExecutor, get_timeout, is_expired
+from ml2service.executors.base import ModelExecutor
+from ml2service.models.base import Model
+from ml2service.monitoring.tracing import set_span_attribute
+from ml2service.services.base import (
+    PredictDeadlineExceededErrorResponse,
+    PredictManyRequest,
+    PredictManySuccessResponse,
+    PredictModelInternalErrorResponse,
+    PredictModelNotFoundErrorResponse,
+    PredictRequest,
+    PredictStreamRequest,
+    PredictStreamSuccessResponse,
+    PredictSuccessResponse,
+)
+from ml2service.services.batching import BatchingOptions, MicroBatcher
+from ml2service.services.prediction_cache import PredictionCache, PredictionCacheOptions, hash_input
+from ml2service.services.streaming import stream_predictions
+
+K = t.TypeVar("K")
+T = t.TypeVar("T")
+T_predict_input = t.TypeVar("T_predict_input")
+T_predict_output = t.TypeVar("T_predict_output")
+
+# returns the model of the key (None if there is no model) & the key of the model the executor may cache it by
+ModelGetter = t.Callable[[K], t.Tuple[
+    t.Optional[Model[T_predict_input, T_predict_output]],
+    t.Optional[t.Hashable],
+]]
+
+
+class ModelPredictor(t.Generic[K, T_predict_input, T_predict_output]):
+    """
+    Predicts the inputs by the models of their keys with the executor: caches the predictions, groups the single
+    predictions into batches and stops waiting for the predictions at the deadlines of the requests.
+
+    The model of the key is got once per request (or batch), thus the stream is predicted by the model got at its start.
+    """
+
+    def __init__(
+            self,
+            get_model: ModelGetter[K, T_predict_input, T_predict_output],
+            executor: ModelExecutor,
+            deadlines: DeadlineExecutor,
+            batching: t.Optional[BatchingOptions] = None,
+            prediction_cache: t.Optional[PredictionCacheOptions] = None,
+    ) -> None:
+        self.__get_model = get_model
+        self.__executor = executor
+        self.__deadlines = deadlines
+        self.__prediction_cache: t.Optional[PredictionCache[K, T_predict_output]] = (
+            PredictionCache(prediction_cache) if prediction_cache is not None else None
+        )
+        self.__batcher: t.Optional[MicroBatcher[K, T_predict_input, t.Union[
+            PredictSuccessResponse[K, T_predict_output],
+            PredictModelNotFoundErrorResponse[K],
+            PredictModelInternalErrorResponse[K],
+        ]]] = MicroBatcher(
+            self.__predict_batch,
+            batching,
+            lambda key, err: PredictModelInternalErrorResponse(key=key, error=err),
+            self.__deadlines.submit,
+        ) if batching is not None else None
+
+    def predict(self, request: PredictRequest[K, T_predict_input]) -> t.Union[
+        PredictSuccessResponse[K, T_predict_output],
+        PredictModelNotFoundErrorResponse[K],
+        PredictModelInternalErrorResponse[K],
+        PredictDeadlineExceededErrorResponse[K],
+    ]:
+        if is_expired(request.deadline):
+            return PredictDeadlineExceededErrorResponse(key=request.key)
+
+        digest = hash_input(request.input_) if self.__prediction_cache is not None else None
+        if self.__prediction_cache is None or digest is None:
+            return self.__predict(request)
+
+        found, output, generation = self.__prediction_cache.get(request.key, digest)
+        set_span_attribute("prediction_cache.hit", found)
+
+        if found:
+            return PredictSuccessResponse(key=request.key, output=t.cast(T_predict_output, output))
+
+        response = self.__predict(request)
+        if isinstance(response, PredictSuccessResponse):
+            self.__prediction_cache.put(request.key, digest, response.output, generation)
+
+        return response
+
+    def predict_many(self, request: PredictManyRequest[K, T_predict_input]) -> t.Union[
+        PredictManySuccessResponse[K, T_predict_output],
+        PredictModelNotFoundErrorResponse[K],
+        PredictDeadlineExceededErrorResponse[K],
+    ]:
+        if is_expired(request.deadline):
+            return PredictDeadlineExceededErrorResponse(key=request.key)
+
+        model, cache_key = self.__get_model(request.key)
+
+        if model is None:
+            return PredictModelNotFoundErrorResponse(key=request.key)
+
+        try:
+            results = self.__predict_many(request.key, model, request.inputs, request.deadline, cache_key)
+
+        except FutureTimeoutError:
+            return PredictDeadlineExceededErrorResponse(key=request.key)
+
+        return PredictManySuccessResponse(key=request.key, results=results)
+
+    def predict_stream(self, request: PredictStreamRequest[K, T_predict_input]) -> t.Union[
+        PredictStreamSuccessResponse[K, T_predict_output],
+        PredictModelNotFoundErrorResponse[K],
+    ]:
+        model, cache_key = self.__get_model(request.key)
+
+        if model is None:
+            return PredictModelNotFoundErrorResponse(key=request.key)
+
+        return PredictStreamSuccessResponse(key=request.key, results=stream_predictions(
+            request.key,
+            model,
+            request.inputs,
+            request.chunk_size,
+            lambda chunk: self.__predict_many(request.key, model, chunk, cache_key=cache_key),
+        ))
+
+    def invalidate(self, key: K) -> None:
+        """Drops the cached predictions of the key, e.g. when its model is replaced."""
+
+        if self.__prediction_cache is not None:
+            self.__prediction_cache.invalidate(key)
+
+    def call(self, call: t.Callable[[], "Future[T]"], deadline: t.Optional[float]) -> "Future[T]":
+        """Makes the executor call (e.g. a training), so the caller may stop waiting for it at the deadline."""
+
+        # the inline executor is done with the call before its future is returned, so the call that has a deadline is
+        # made in another thread, and the caller stops waiting for it at the deadline
+        if deadline is None or not self.__executor.is_inline:
+            return call()
+
+        return self.__deadlines.submit(lambda: call().result())
+
+    def __predict(self, request: PredictRequest[K, T_predict_input]) -> t.Union[
+        PredictSuccessResponse[K, T_predict_output],
+        PredictModelNotFoundErrorResponse[K],
+        PredictModelInternalErrorResponse[K],
+        PredictDeadlineExceededErrorResponse[K],
+    ]:
+        try:
+            if self.__batcher is not None:
+                return self.__batcher.submit(request.key, request.input_, get_timeout(request.deadline))
+
+            model, cache_key = self.__get_model(request.key)
+
+            if model is None:
+                return PredictModelNotFoundErrorResponse(key=request.key)
+
+            return self.__predict_one(request.key, model, request.input_, request.deadline, cache_key)
+
+        except FutureTimeoutError:
+            return PredictDeadlineExceededErrorResponse(key=request.key)
+
+    def __predict_batch(self, key: K, inputs: t.Sequence[T_predict_input]) -> t.Sequence[t.Union[
+        PredictSuccessResponse[K, T_predict_output],
+        PredictModelNotFoundErrorResponse[K],
+        PredictModelInternalErrorResponse[K],
+    ]]:
+        model, cache_key = self.__get_model(key)
+
+        if model is None:
+            return [PredictModelNotFoundErrorResponse(key=key) for _ in inputs]
+
+        return self.__predict_many(key, model, inputs, cache_key=cache_key)
+
+    def __predict_many(
+            self,
+            key: K,
+            model: Model[T_predict_input, T_predict_output],
+            inputs: t.Sequence[T_predict_input],
+            deadline: t.Optional[float] = None,
+            cache_key: t.Optional[t.Hashable] = None,
+    ) -> t.Sequence[t.Union[
+        PredictSuccessResponse[K, T_predict_output],
+        PredictModelInternalErrorResponse[K],
+    ]]:
+        """Raises `concurrent.futures.TimeoutError` when the deadline passes."""
+
+        future = self.call(lambda: self.__executor.predict_batch(model, inputs, cache_key), deadline)
+
+        try:
+            outputs = future.result(get_timeout(deadline))
+
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+
+        except Exception:
+            # find out which inputs failed, so the rest of the batch still gets its outputs
+            return [self.__predict_one(key, model, input_, deadline, cache_key) for input_ in inputs]
+
+        if len(outputs) != len(inputs):
+            error = RuntimeError("model returned unexpected number of outputs", len(outputs), len(inputs))
+            return [PredictModelInternalErrorResponse(key=key, error=error) for _ in inputs]
+
+        return [PredictSuccessResponse(key=key, output=output) for output in outputs]
+
+    def __predict_one(
+            self,
+            key: K,
+            model: Model[T_predict_input, T_predict_output],
+            input_: T_predict_input,
+            deadline: t.Optional[float] = None,
+            cache_key: t.Optional[t.Hashable] = None,
+    ) -> t.Union[
+        PredictSuccessResponse[K, T_predict_output],
+        PredictModelInternalErrorResponse[K],
+    ]:
+        """Raises `concurrent.futures.TimeoutError` when the deadline passes."""
+
+        future = self.call(lambda: self.__executor.predict(model, input_, cache_key), deadline)
+
+        try:
+            output = future.result(get_timeout(deadline))
+
+        except FutureTimeoutError:
+            # the prediction that hasn't started yet is dropped from the queue, the running one goes on & its output is
+            # dropped
+            future.cancel()
+            raise
+
+        except Exception as err:
+            return PredictModelInternalErrorResponse(key=key, error=err)
+
+        return PredictSuccessResponse(key=key, output=output)
@@ -0,0 +1,463 @@
+import http.client
+import json
+import typing as t
+from queue import Empty, Queue
+from threading import Thread, local
+from urllib.parse import quote, urlsplit
+
+from pydantic import parse_obj_as
+
+from ml2service.deadlines import TIMEOUT_HEADER, get_timeout, is_expired
+from ml2service.serializers.jsonable import to_jsonable
+from ml2service.services.base import (
+    ModelPredictionService,
+    ModelRemovingService,
+    ModelStreamingPredictionService,
+    ModelTrainingService,
+    ModelUpdatingService,
+    PredictDeadlineExceededErrorResponse,
+    PredictManyRequest,
+    PredictManySuccessResponse,
+    PredictModelInternalErrorResponse,
+    PredictModelNotFoundErrorResponse,
+    PredictRequest,
+    PredictStreamRequest,
+    PredictStreamSuccessResponse,
+    PredictSuccessResponse,
+    RemoveInternalErrorResponse,
+    RemoveModelNotFoundErrorResponse,
+    RemoveRequest,
+    RemoveSuccessResponse,
+    TrainDeadlineExceededErrorResponse,
+    TrainInternalErrorResponse,
+    TrainRequest,
+    TrainSuccessResponse,
+    UpdateDeadlineExceededErrorResponse,
+    UpdateInternalErrorResponse,
+    UpdateModelNotFoundErrorResponse,
+    UpdateRequest,
+    UpdateSuccessResponse,
+)
+from ml2service.services.streaming import iter_chunks
+
+T_train_input = t.TypeVar("T_train_input")
+T_predict_input = t.TypeVar("T_predict_input")
+T_predict_output = t.TypeVar("T_predict_output")
+
+FORWARDED_HEADER: t.Final[str] = "X-ML2Service-Forwarded"
+
+_StreamItem = t.Union[bytes, Exception, None]
+
+
+class RemoteServiceError(Exception):
+    pass
+
+
+class _Socket(t.Protocol):
+    def sendall(self, data: bytes) -> None:
+        ...
+
+
+class RemoteModelService(
+    t.Generic[T_train_input, T_predict_input, T_predict_output],
+    ModelTrainingService[str, T_train_input],
+    ModelUpdatingService[str, T_train_input],
+    ModelPredictionService[str, T_predict_input, T_predict_output],
+    ModelStreamingPredictionService[str, T_predict_input, T_predict_output],
+    ModelRemovingService[str],
+):
+    """
+    Client of the dynamic models service served by the fastapi runner on another node.
+
+    Requests are marked with `FORWARDED_HEADER` of the cluster secret, so the peer handles them by itself rather than
+    routes them further.
+    The time left until the request deadline is passed to the peer in `TIMEOUT_HEADER`.
+    Each thread keeps its own connection to the peer, so the connections are reused between the requests. A stream is
+    sent over its own connection, the results are read from it while the inputs are sent.
+    """
+
+    def __init__(
+            self,
+            base_url: str,
+            output_type: t.Type[T_predict_output],
+            secret: str,
+            timeout: float = 30.0,
+    ) -> None:
+        url = urlsplit(base_url)
+        if url.scheme not in ("http", "https") or not url.hostname:
+            raise ValueError("invalid base url", base_url)
+
+        self.__scheme = url.scheme
+        self.__host = url.hostname
+        self.__port = url.port
+        self.__path = url.path.rstrip("/")
+        self.__output_type = output_type
+        self.__secret = secret
+        self.__timeout = timeout
+        self.__local = local()
+
+    def train(self, request: TrainRequest[str, T_train_input]) -> t.Union[
+        TrainSuccessResponse[str],
+        TrainInternalErrorResponse[str],
+        TrainDeadlineExceededErrorResponse[str],
+    ]:
+        if is_expired(request.deadline):
+            return TrainDeadlineExceededErrorResponse(key=request.key)
+
+        try:
+            status, data = self.__request("PUT", request.key, "/", request.input_, request.deadline)
+
+        except (OSError, http.client.HTTPException) as err:
+            if is_expired(request.deadline):
+                return TrainDeadlineExceededErrorResponse(key=request.key)
+
+            return TrainInternalErrorResponse(key=request.key, error=err)
+
+        if status == 201:
+            return TrainSuccessResponse(key=request.key)
+
+        elif status == 504:
+            return TrainDeadlineExceededErrorResponse(key=request.key)
+
+        return TrainInternalErrorResponse(key=request.key, error=self.__make_error(status, data))
+
+    def update(self, request: UpdateRequest[str, T_train_input]) -> t.Union[
+        UpdateSuccessResponse[str],
+        UpdateModelNotFoundErrorResponse[str],
+        UpdateInternalErrorResponse[str],
+        UpdateDeadlineExceededErrorResponse[str],
+    ]:
+        if is_expired(request.deadline):
+            return UpdateDeadlineExceededErrorResponse(key=request.key)
+
+        try:
+            # the update of the model isn't idempotent, it is not repeated once it may have reached the peer
+            status, data = self.__request("PATCH", request.key, "/", request.input_, request.deadline, idempotent=False)
+
+        except (OSError, http.client.HTTPException) as err:
+            if is_expired(request.deadline):
+                return UpdateDeadlineExceededErrorResponse(key=request.key)
+
+            return UpdateInternalErrorResponse(key=request.key, error=err)
+
+        if status == 200:
+            return UpdateSuccessResponse(key=request.key)
+
+        elif status == 404:
+            return UpdateModelNotFoundErrorResponse(key=request.key)
+
+        elif status == 504:
+            return UpdateDeadlineExceededErrorResponse(key=request.key)
+
+        return UpdateInternalErrorResponse(key=request.key, error=self.__make_error(status, data))
+
+    def predict(self, request: PredictRequest[str, T_predict_input]) -> t.Union[
+        PredictSuccessResponse[str, T_predict_output],
+        PredictModelNotFoundErrorResponse[str],
+        PredictModelInternalErrorResponse[str],
+        PredictDeadlineExceededErrorResponse[str],
+    ]:
+        if is_expired(request.deadline):
+            return PredictDeadlineExceededErrorResponse(key=request.key)
+
+        try:
+            status, data = self.__request("POST", request.key, "/", request.input_, request.deadline)
+
+        except (OSError, http.client.HTTPException) as err:
+            if is_expired(request.deadline):
+                return PredictDeadlineExceededErrorResponse(key=request.key)
+
+            return PredictModelInternalErrorResponse(key=request.key, error=err)
+
+        if status == 200:
+            try:
+                return PredictSuccessResponse(key=request.key, output=self.__parse_output(data))
+
+            except ValueError as err:
+                return PredictModelInternalErrorResponse(key=request.key, error=err)
+
+        elif status == 404:
+            return PredictModelNotFoundErrorResponse(key=request.key)
+
+        elif status == 504:
+            return PredictDeadlineExceededErrorResponse(key=request.key)
+
+        return PredictModelInternalErrorResponse(key=request.key, error=self.__make_error(status, data))
+
+    def predict_many(self, request: PredictManyRequest[str, T_predict_input]) -> t.Union[
+        PredictManySuccessResponse[str, T_predict_output],
+        PredictModelNotFoundErrorResponse[str],
+        PredictDeadlineExceededErrorResponse[str],
+    ]:
+        if is_expired(request.deadline):
+            return PredictDeadlineExceededErrorResponse(key=request.key)
+
+        try:
+            status, data = self.__request("POST", request.key, "/batch", request.inputs, request.deadline)
+
+        except (OSError, http.client.HTTPException) as err:
+            if is_expired(request.deadline):
+                return PredictDeadlineExceededErrorResponse(key=request.key)
+
+            return PredictManySuccessResponse(
+                key=request.key,
+                results=[PredictModelInternalErrorResponse(key=request.key, error=err) for _ in request.inputs],
+            )
+
+        if status == 404:
+            return PredictModelNotFoundErrorResponse(key=request.key)
+
+        elif status == 504:
+            return PredictDeadlineExceededErrorResponse(key=request.key)
+
+        elif status != 200 or not isinstance(data, list) or len(data) != len(request.inputs):
+            error = self.__make_error(status, data)
+            return PredictManySuccessResponse(
+                key=request.key,
+                results=[PredictModelInternalErrorResponse(key=request.key, error=error) for _ in request.inputs],
+            )
+
+        results: t.List[t.Union[PredictSuccessResponse[str, T_predict_output], PredictModelInternalErrorResponse[str]]]
+        results = []
+
+        for item in t.cast(t.Sequence[object], data):
+            results.append(self.__parse_item(request.key, item))
+
+        return PredictManySuccessResponse(key=request.key, results=results)
+
+    def predict_stream(self, request: PredictStreamRequest[str, T_predict_input]) -> t.Union[
+        PredictStreamSuccessResponse[str, T_predict_output],
+        PredictModelNotFoundErrorResponse[str],
+    ]:
+        connection = self.__create_connection()
+
+        try:
+            connection.putrequest("POST", f"{self.__path}/{quote(request.key, safe='')}/stream"
+                                          f"?chunk_size={request.chunk_size}")
+            connection.putheader("Content-Type", "application/x-ndjson")
+            connection.putheader("Transfer-Encoding", "chunked")
+            connection.putheader(FORWARDED_HEADER, self.__secret)
+            connection.endheaders()
+            sock = t.cast(_Socket, connection.sock)
+            # the peer responds before it reads the inputs
+            response = connection.getresponse()
+
+            if response.status != 200:
+                data = self.__decode(response.read())
+                connection.close()
+
+        except (OSError, http.client.HTTPException) as err:
+            connection.close()
+            return PredictStreamSuccessResponse(key=request.key, results=iter([
+                PredictModelInternalErrorResponse(key=request.key, error=err),
+            ]))
+
+        if response.status == 404:
+            return PredictModelNotFoundErrorResponse(key=request.key)
+
+        elif response.status != 200:
+            return PredictStreamSuccessResponse(key=request.key, results=iter([
+                PredictModelInternalErrorResponse(key=request.key, error=self.__make_error(response.status, data)),
+            ]))
+
+        return PredictStreamSuccessResponse(key=request.key, results=self.__stream(request, connection, sock, response))
+
+    def remove(self, request: RemoveRequest[str]) -> t.Union[
+        RemoveSuccessResponse[str],
+        RemoveModelNotFoundErrorResponse[str],
+        RemoveInternalErrorResponse[str],
+    ]:
+        try:
+            status, data = self.__request("DELETE", request.key, "/", None)
+
+        except (OSError, http.client.HTTPException) as err:
+            return RemoveInternalErrorResponse(key=request.key, error=err)
+
+        if status == 202:
+            return RemoveSuccessResponse(key=request.key)
+
+        elif status == 404:
+            return RemoveModelNotFoundErrorResponse(key=request.key)
+
+        return RemoveInternalErrorResponse(key=request.key, error=self.__make_error(status, data))
+
+    def __request(
+            self,
+            method: str,
+            key: str,
+            path: str,
+            body: object,
+            deadline: t.Optional[float] = None,
+            idempotent: bool = True,
+    ) -> t.Tuple[int, object]:
+        url = f"{self.__path}/{quote(key, safe='')}{path}"
+        payload = json.dumps(body, default=to_jsonable).encode() if body is not None else None
+        headers = {"Content-Type": "application/json", FORWARDED_HEADER: self.__secret}
+
+        timeout = get_timeout(deadline)
+        if timeout is not None:
+            headers[TIMEOUT_HEADER] = f"{timeout:.3f}"
+
+        for attempt in range(2):
+            connection = self.__get_connection()
+            is_idle = connection.sock is not None
+            is_sent = False
+            # zero timeout would make the socket non-blocking
+            self.__set_timeout(connection, max(min(self.__timeout, timeout), 1e-3) if timeout is not None
+                               else self.__timeout)
+
+            try:
+                connection.request(method, url, body=payload, headers=headers)
+                is_sent = True
+                response = connection.getresponse()
+                content = response.read()
+                break
+
+            except (ConnectionError, http.client.HTTPException):
+                connection.close()
+                self.__local.connection = None
+
+                # the peer may have closed the idle connection, reconnect once, unless the request that isn't
+                # idempotent may have reached the peer already
+                if attempt > 0 or not is_idle or (is_sent and not idempotent):
+                    raise
+
+        return response.status, self.__decode(content)
+
+    def __stream(
+            self,
+            request: PredictStreamRequest[str, T_predict_input],
+            connection: http.client.HTTPConnection,
+            sock: _Socket,
+            response: http.client.HTTPResponse,
+    ) -> t.Iterator[t.Union[
+        PredictSuccessResponse[str, T_predict_output],
+        PredictModelInternalErrorResponse[str],
+    ]]:
+        key = request.key
+        lines: Queue[_StreamItem] = Queue()
+        ended = False
+
+        def read() -> None:
+            try:
+                for line in iter(response.readline, b""):
+                    lines.put(line)
+
+            except (OSError, http.client.HTTPException) as err:
+                lines.put(err)
+
+            finally:
+                lines.put(None)
+
+        def take(block: bool) -> t.Iterator[t.Union[
+            PredictSuccessResponse[str, T_predict_output],
+            PredictModelInternalErrorResponse[str],
+        ]]:
+            nonlocal ended
+
+            while not ended:
+                try:
+                    item = lines.get(block)
+
+                except Empty:
+                    return
+
+                if item is None:
+                    ended = True
+
+                elif isinstance(item, Exception):
+                    yield PredictModelInternalErrorResponse(key=key, error=item)
+
+                elif item.strip():
+                    try:
+                        yield self.__parse_item(key, t.cast(object, json.loads(item)))
+
+                    except ValueError as err:
+                        yield PredictModelInternalErrorResponse(key=key, error=err)
+
+        def send(data: bytes) -> None:
+            sock.sendall(b"%x\r\n%s\r\n" % (len(data), data))
+
+        def send_end() -> None:
+            sock.sendall(b"0\r\n\r\n")
+
+        # the results are read by another thread, so the peer isn't blocked by the results while it reads the inputs
+        Thread(target=read, name="remote-stream", daemon=True).start()
+
+        try:
+            try:
+                for chunk in iter_chunks(request.inputs, request.chunk_size):
+                    send(b"".join(json.dumps(input_, default=to_jsonable).encode() + b"\n" for input_ in chunk))
+                    yield from take(False)
+
+            except ValueError:
+                # the inputs can't be read further, the results of the inputs sent already come first
+                send_end()
+                yield from take(True)
+                raise
+
+            except OSError:
+                # the peer stopped reading the inputs, the rest of its results (or the error) is still read
+                pass
+
+            else:
+                send_end()
+
+            yield from take(True)
+
+        finally:
+            response.close()
+            connection.close()
+
+    def __create_connection(self) -> http.client.HTTPConnection:
+        connection_type = http.client.HTTPSConnection if self.__scheme == "https" else http.client.HTTPConnection
+        return connection_type(self.__host, self.__port, timeout=self.__timeout)
+
+    def __get_connection(self) -> http.client.HTTPConnection:
+        connection = t.cast(t.Optional[http.client.HTTPConnection], getattr(self.__local, "connection", None))
+        if connection is None:
+            connection = self.__local.connection = self.__create_connection()
+
+        return connection
+
+    def __set_timeout(self, connection: http.client.HTTPConnection, timeout: float) -> None:
+        connection.timeout = timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+
+    def __decode(self, content: bytes) -> object:
+        if not content:
+            return None
+
+        try:
+            return t.cast(object, json.loads(content))
+
+        except ValueError:
+            # e.g. the error page of a proxy, it is kept for the error message
+            return content.decode("utf-8", "replace")
+
+    def __parse_output(self, data: object) -> T_predict_output:
+        return parse_obj_as(self.__output_type, data)
+
+    def __parse_item(self, key: str, item: object) -> t.Union[
+        PredictSuccessResponse[str, T_predict_output],
+        PredictModelInternalErrorResponse[str],
+    ]:
+        """Parses the result item of the batch (or the stream), `{"output": ...}` or `{"error": ...}`."""
+
+        if not isinstance(item, dict):
+            return PredictModelInternalErrorResponse(key=key, error=RemoteServiceError("invalid result", item))
+
+        fields = t.cast(t.Mapping[str, object], item)
+        item_error = fields.get("error")
+        if item_error is not None:
+            return PredictModelInternalErrorResponse(key=key, error=RemoteServiceError(item_error))
+
+        try:
+            return PredictSuccessResponse(key=key, output=self.__parse_output(fields.get("output")))
+
+        except ValueError as err:
+            return PredictModelInternalErrorResponse(key=key, error=err)
+
+    def __make_error(self, status: int, data: object) -> RemoteServiceError:
+        return RemoteServiceError(status, data)
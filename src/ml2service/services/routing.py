@@ -0,0 +1,145 @@
+import hmac
+import typing as t
+from contextvars import ContextVar
+
+from ml2service.hash_ring import HashRing
+from ml2service.services.base import (
+    ModelPredictionService,
+    ModelRemovingService,
+    ModelStreamingPredictionService,
+    ModelTrainingService,
+    ModelUpdatingService,
+    PredictDeadlineExceededErrorResponse,
+    PredictManyRequest,
+    PredictManySuccessResponse,
+    PredictModelInternalErrorResponse,
+    PredictModelNotFoundErrorResponse,
+    PredictRequest,
+    PredictStreamRequest,
+    PredictStreamSuccessResponse,
+    PredictSuccessResponse,
+    RemoveInternalErrorResponse,
+    RemoveModelNotFoundErrorResponse,
+    RemoveRequest,
+    RemoveSuccessResponse,
+    TrainDeadlineExceededErrorResponse,
+    TrainInternalErrorResponse,
+    TrainRequest,
+    TrainSuccessResponse,
+    UpdateDeadlineExceededErrorResponse,
+    UpdateInternalErrorResponse,
+    UpdateModelNotFoundErrorResponse,
+    UpdateRequest,
+    UpdateSuccessResponse,
+)
+from ml2service.services.dynamic import DynamicModelService
+from ml2service.services.remote import RemoteModelService
+
+T_train_input = t.TypeVar("T_train_input")
+T_predict_input = t.TypeVar("T_predict_input")
+T_predict_output = t.TypeVar("T_predict_output")
+
+# set by the transport for the requests forwarded by the other nodes, such requests are never forwarded again
+forwarded_request: ContextVar[bool] = ContextVar("forwarded_request", default=False)
+
+
+class RoutingModelService(
+    t.Generic[T_train_input, T_predict_input, T_predict_output],
+    ModelTrainingService[str, T_train_input],
+    ModelUpdatingService[str, T_train_input],
+    ModelPredictionService[str, T_predict_input, T_predict_output],
+    ModelStreamingPredictionService[str, T_predict_input, T_predict_output],
+    ModelRemovingService[str],
+):
+    """
+    Partitions the models over the nodes: keys are assigned to the nodes by consistent hashing, the requests for the
+    keys of this node are handled by the local service, the others are forwarded to the owning peer.
+
+    All the nodes must be configured with the same node names, so they agree on the owners, and with the same secret,
+    so they trust the requests forwarded by each other (see `is_forwarded`).
+    """
+
+    def __init__(
+            self,
+            node: str,
+            local: DynamicModelService[str, T_train_input, T_predict_input, T_predict_output],
+            peers: t.Mapping[str, RemoteModelService[T_train_input, T_predict_input, T_predict_output]],
+            secret: str,
+            virtual_nodes: int = 128,
+    ) -> None:
+        if node in peers:
+            raise ValueError("node can't be its own peer", node)
+
+        self.__node = node
+        self.__local = local
+        self.__peers = dict(peers)
+        self.__secret = secret.encode()
+        self.__ring: HashRing[str] = HashRing([node, *self.__peers], virtual_nodes)
+
+    def get_owner(self, key: str) -> str:
+        return self.__ring.get_node(key)
+
+    def is_forwarded(self, token: bytes) -> bool:
+        """Tells whether the request marked by the token was forwarded by a peer, the clients don't know the secret."""
+        return hmac.compare_digest(token, self.__secret)
+
+    def is_local(self, key: str) -> bool:
+        """Tells whether the request for the key is handled by this node."""
+        return self.__route(key) is self.__local
+
+    def train(self, request: TrainRequest[str, T_train_input]) -> t.Union[
+        TrainSuccessResponse[str],
+        TrainInternalErrorResponse[str],
+        TrainDeadlineExceededErrorResponse[str],
+    ]:
+        return self.__route(request.key).train(request)
+
+    def update(self, request: UpdateRequest[str, T_train_input]) -> t.Union[
+        UpdateSuccessResponse[str],
+        UpdateModelNotFoundErrorResponse[str],
+        UpdateInternalErrorResponse[str],
+        UpdateDeadlineExceededErrorResponse[str],
+    ]:
+        return self.__route(request.key).update(request)
+
+    def predict(self, request: PredictRequest[str, T_predict_input]) -> t.Union[
+        PredictSuccessResponse[str, T_predict_output],
+        PredictModelNotFoundErrorResponse[str],
+        PredictModelInternalErrorResponse[str],
+        PredictDeadlineExceededErrorResponse[str],
+    ]:
+        return self.__route(request.key).predict(request)
+
+    def predict_many(self, request: PredictManyRequest[str, T_predict_input]) -> t.Union[
+        PredictManySuccessResponse[str, T_predict_output],
+        PredictModelNotFoundErrorResponse[str],
+        PredictDeadlineExceededErrorResponse[str],
+    ]:
+        return self.__route(request.key).predict_many(request)
+
+    def predict_stream(self, request: PredictStreamRequest[str, T_predict_input]) -> t.Union[
+        PredictStreamSuccessResponse[str, T_predict_output],
+        PredictModelNotFoundErrorResponse[str],
+    ]:
+        return self.__route(request.key).predict_stream(request)
+
+    def remove(self, request: RemoveRequest[str]) -> t.Union[
+        RemoveSuccessResponse[str],
+        RemoveModelNotFoundErrorResponse[str],
+        RemoveInternalErrorResponse[str],
+    ]:
+        return self.__route(request.key).remove(request)
+
+    def close(self) -> None:
+        self.__local.close()
+
+    def __route(self, key: str) -> t.Union[
+        DynamicModelService[str, T_train_input, T_predict_input, T_predict_output],
+        RemoteModelService[T_train_input, T_predict_input, T_predict_output],
+    ]:
+        if forwarded_request.get():
+            return self.__local
+
+        owner = self.__ring.get_node(key)
+
+        return self.__local if owner == self.__node else self.__peers[owner]
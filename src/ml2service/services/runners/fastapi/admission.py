@@ -0,0 +1,118 @@
+import asyncio
+import typing as t
+
+# noinspection PyPackageRequirements
+from fastapi import HTTPException, Request, Response
+# noinspection PyPackageRequirements
+from fastapi.responses import StreamingResponse
+# noinspection PyPackageRequirements
+from fastapi.routing import APIRoute
+# noinspection PyPackageRequirements
+from starlette import status
+# noinspection PyPackageRequirements
+from starlette.types import Receive, Scope, Send
+
+from ml2service.deadlines import get_timeout, is_expired
+from ml2service.services.admission import AdmissionLimiter
+from ml2service.services.runners.fastapi.deadlines import get_request_deadline
+
+_Handler = t.Callable[[Request], t.Coroutine[object, object, Response]]
+
+
+def _reject(limiter: AdmissionLimiter[str]) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                         headers={"Retry-After": str(limiter.options.retry_after)})
+
+
+def _get_wait_timeout(limiter: AdmissionLimiter[str], deadline: t.Optional[float]) -> t.Optional[float]:
+    max_wait, timeout = limiter.options.max_wait, get_timeout(deadline)
+    if max_wait is None or timeout is None:
+        return max_wait if timeout is None else timeout
+
+    return min(max_wait, timeout)
+
+
+class _ReleasingResponse(Response):
+    """Sends the inner response, then releases the admission (the streaming work is done while it is sent)."""
+
+    def __init__(self, inner: Response, release: t.Callable[[], None]) -> None:
+        # the inner response renders itself, the attributes are there for the outer route layers
+        self.__inner = inner
+        self.__release = release
+        self.status_code = inner.status_code
+        self.background = inner.background
+        self.raw_headers = inner.raw_headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.__inner(scope, receive, send)
+
+        finally:
+            self.__release()
+
+
+def _admit_handler(handler: _Handler, limiter: AdmissionLimiter[str]) -> _Handler:
+    async def handle(request: Request) -> Response:
+        key = t.cast(str, request.path_params.get("key", ""))
+        deadline = get_request_deadline(request)
+
+        admission = limiter.acquire(key)
+        if admission is None:
+            raise _reject(limiter)
+
+        if not admission.done():
+            # the request waits in the event loop, it doesn't hold a threadpool thread until it is admitted
+            try:
+                await asyncio.wait_for(asyncio.wrap_future(admission), _get_wait_timeout(limiter, deadline))
+
+            except asyncio.TimeoutError:
+                limiter.abandon(key, admission)
+                if is_expired(deadline):
+                    raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                                        detail={"error": "deadline exceeded"})
+
+                raise _reject(limiter)
+
+            except BaseException:
+                limiter.abandon(key, admission)
+                raise
+
+        try:
+            response = await handler(request)
+
+        except BaseException:
+            limiter.release(key)
+            raise
+
+        if isinstance(response, StreamingResponse):
+            # the request is in flight until its stream ends
+            return _ReleasingResponse(response, lambda: limiter.release(key))
+
+        limiter.release(key)
+
+        return response
+
+    return handle
+
+
+def create_admission_route_class(
+        limiters: t.Mapping[str, AdmissionLimiter[str]],
+        base: t.Type[APIRoute] = APIRoute,
+) -> t.Type[APIRoute]:
+    """
+    Creates a route class that admits the requests of the routes by their HTTP method limiters (see
+    `AdmissionLimiter`), the rejected requests get 503 response with `Retry-After` header.
+    """
+
+    class AdmissionAPIRoute(base):  # type: ignore[valid-type,misc]
+        def get_route_handler(self) -> _Handler:
+            handler = t.cast(_Handler, super().get_route_handler())
+
+            for method in sorted(self.methods):
+                limiter = limiters.get(method)
+                if limiter is not None:
+                    return _admit_handler(handler, limiter)
+
+            return handler
+
+    return AdmissionAPIRoute
@@ -0,0 +1,223 @@
+import asyncio
+import inspect
+import typing as t
+
+import numpy as np
+# noinspection PyPackageRequirements
+from fastapi import HTTPException, Request, Response
+# noinspection PyPackageRequirements
+from fastapi.encoders import jsonable_encoder
+# noinspection PyPackageRequirements
+from fastapi.responses import JSONResponse
+# noinspection PyPackageRequirements
+from fastapi.routing import APIRoute
+# noinspection PyPackageRequirements
+from starlette import status
+# noinspection PyPackageRequirements
+from starlette.concurrency import run_in_threadpool
+
+from ml2service.serializers.npy import NPY_MEDIA_TYPE, NDArray, decode_npy, decode_raw, encode_npy
+from ml2service.services.runners.fastapi.deadlines import get_request_deadline
+from ml2service.services.runners.fastapi.responses import unwrap_fast_response
+
+T = t.TypeVar("T")
+
+OCTET_STREAM_MEDIA_TYPE: t.Final[str] = "application/octet-stream"
+DTYPE_HEADER: t.Final[str] = "X-Array-Dtype"
+SHAPE_HEADER: t.Final[str] = "X-Array-Shape"
+
+_BINARY_MEDIA_TYPES: t.Final[t.AbstractSet[str]] = frozenset((NPY_MEDIA_TYPE, OCTET_STREAM_MEDIA_TYPE))
+
+_Handler = t.Callable[[Request], t.Coroutine[object, object, Response]]
+
+
+def is_array_type(type_: object) -> bool:
+    """Checks if the type is `np.ndarray` (or its parametrized alias, e.g. `npt.NDArray[np.float32]`)."""
+
+    origin = t.get_origin(type_) or type_
+    return isinstance(origin, type) and issubclass(origin, np.ndarray)
+
+
+class ArrayInput:
+    """JSON field type of array inputs: nested lists are converted to an array, the schema is an array."""
+
+    @classmethod
+    def __get_validators__(cls) -> t.Iterator[t.Callable[[object], NDArray]]:
+        yield cls.validate
+
+    @classmethod
+    def __modify_schema__(cls, schema: t.Dict[str, object]) -> None:
+        schema.update(type="array", items={})
+
+    @classmethod
+    def validate(cls, value: object) -> NDArray:
+        try:
+            array = np.asarray(value)
+
+        except ValueError as err:
+            raise TypeError("array expected") from err
+
+        if array.dtype.hasobject:
+            raise TypeError("array of numbers expected")
+
+        return array
+
+
+class ArrayOutput:
+    """JSON field type of array outputs: the array is converted to nested lists."""
+
+    @classmethod
+    def __get_validators__(cls) -> t.Iterator[t.Callable[[object], object]]:
+        yield cls.validate
+
+    @classmethod
+    def __modify_schema__(cls, schema: t.Dict[str, object]) -> None:
+        schema.update(type="array", items={})
+
+    @classmethod
+    def validate(cls, value: object) -> object:
+        return value.tolist() if isinstance(value, (np.ndarray, np.generic)) else value
+
+
+def to_input_type(type_: t.Type[T]) -> t.Type[T]:
+    return t.cast(t.Type[T], ArrayInput) if is_array_type(type_) else type_
+
+
+def to_output_type(type_: t.Type[T]) -> t.Type[T]:
+    return t.cast(t.Type[T], ArrayOutput) if is_array_type(type_) else type_
+
+
+def _get_media_type(value: t.Optional[str]) -> str:
+    return value.split(";", 1)[0].strip().lower() if value else ""
+
+
+def _decode_body(request: Request, media_type: str, body: bytes) -> NDArray:
+    try:
+        if media_type == NPY_MEDIA_TYPE:
+            return decode_npy(body)
+
+        dtype = request.headers.get(DTYPE_HEADER)
+        if dtype is None:
+            raise ValueError(f"{DTYPE_HEADER} header is required")
+
+        shape_value = request.headers.get(SHAPE_HEADER)
+        shape = tuple(int(dim) for dim in shape_value.split(",") if dim.strip()) if shape_value is not None else None
+
+        return decode_raw(body, dtype, shape)
+
+    except (TypeError, ValueError) as err:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail={"error": str(err)}) from err
+
+
+def _get_response_media_type(request: Request, request_media_type: str) -> str:
+    accept = {_get_media_type(value) for value in request.headers.get("accept", "").split(",")}
+
+    for media_type in (NPY_MEDIA_TYPE, OCTET_STREAM_MEDIA_TYPE):
+        if media_type in accept:
+            return media_type
+
+    # the array is sent back in the format of the request, unless the client asks for JSON
+    return "application/json" if "application/json" in accept else request_media_type
+
+
+def _encode_array(array: NDArray, media_type: str, status_code: int) -> Response:
+    if media_type == NPY_MEDIA_TYPE:
+        return Response(content=encode_npy(array), status_code=status_code, media_type=NPY_MEDIA_TYPE)
+
+    return Response(
+        content=array.tobytes(),
+        status_code=status_code,
+        media_type=OCTET_STREAM_MEDIA_TYPE,
+        headers={DTYPE_HEADER: array.dtype.str, SHAPE_HEADER: ",".join(str(dim) for dim in array.shape)},
+    )
+
+
+def _encode_json(value: object, status_code: int) -> Response:
+    content = jsonable_encoder(value, custom_encoder={
+        np.ndarray: lambda array: array.tolist(),
+        np.generic: lambda scalar: scalar.item(),
+    })
+
+    return JSONResponse(content=content, status_code=status_code)
+
+
+def create_array_route_class(base: t.Type[APIRoute] = APIRoute) -> t.Type[APIRoute]:
+    """
+    Creates a route class that accepts array bodies in NPY format (`application/x-npy`) or raw C ordered data
+    (`application/octet-stream` with `DTYPE_HEADER` & `SHAPE_HEADER` headers) for the routes with `ArrayInput` input,
+    the other bodies are handled by the base route.
+
+    Binary bodies are decoded into read only arrays over the request body (no copy) and passed to the endpoint as is,
+    skipping the JSON parsing & the validation. Batch routes get the rows of the array as inputs. Array outputs are
+    encoded in the format the client accepts (the format of the request by default), the other outputs are JSON.
+    """
+
+    class ArrayAPIRoute(base):  # type: ignore[valid-type,misc]
+        def __init__(self, path: str, endpoint: t.Callable[..., t.Any], **kwargs: t.Any) -> None:
+            # the arrays are encoded here, not by the fast response of the base route
+            self.__endpoint = unwrap_fast_response(endpoint)
+            super().__init__(path, endpoint, **kwargs)
+
+        def get_route_handler(self) -> _Handler:
+            handler = t.cast(_Handler, super().get_route_handler())
+            endpoint = self.__endpoint
+            parameters = inspect.signature(endpoint).parameters
+
+            input_parameter = parameters.get("input_")
+            inputs_parameter = parameters.get("inputs")
+            if input_parameter is not None and input_parameter.annotation is ArrayInput:
+                batch = False
+
+            elif inputs_parameter is not None and t.get_args(inputs_parameter.annotation) == (ArrayInput,):
+                batch = True
+
+            else:
+                return handler
+
+            is_async = asyncio.iscoroutinefunction(endpoint)
+            status_code = self.status_code or status.HTTP_200_OK
+            takes_key = "key" in parameters
+            takes_deadline = "deadline" in parameters
+
+            async def handle(request: Request) -> Response:
+                media_type = _get_media_type(request.headers.get("content-type"))
+                if media_type not in _BINARY_MEDIA_TYPES:
+                    return await handler(request)
+
+                array = _decode_body(request, media_type, await request.body())
+
+                kwargs: t.Dict[str, object] = {}
+                if takes_key:
+                    kwargs["key"] = request.path_params.get("key", "")
+
+                if takes_deadline:
+                    kwargs["deadline"] = get_request_deadline(request)
+
+                if batch:
+                    if array.ndim < 1:
+                        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                            detail={"error": "array of inputs expected"})
+
+                    kwargs["inputs"] = list(array)
+
+                else:
+                    kwargs["input_"] = array
+
+                result = (
+                    await t.cast(t.Awaitable[object], endpoint(**kwargs)) if is_async
+                    else await run_in_threadpool(endpoint, **kwargs)
+                )
+
+                if result is None:
+                    return Response(status_code=status_code)
+
+                elif isinstance(result, np.ndarray):
+                    response_media_type = _get_response_media_type(request, media_type)
+                    if response_media_type in _BINARY_MEDIA_TYPES:
+                        return _encode_array(result, response_media_type, status_code)
+
+                return _encode_json(result, status_code)
+
+            return handle
+
+    return ArrayAPIRoute
@@ -0,0 +1,71 @@
+import typing as t
+from time import monotonic
+
+# noinspection PyPackageRequirements
+from fastapi import Header, Query, Request, Response
+# noinspection PyPackageRequirements
+from fastapi.routing import APIRoute
+
+from ml2service.deadlines import TIMEOUT_HEADER, make_deadline
+
+TIMEOUT_QUERY: t.Final[str] = "timeout"
+
+_Handler = t.Callable[[Request], t.Coroutine[object, object, Response]]
+
+
+def _parse_timeout(value: t.Optional[str]) -> t.Optional[float]:
+    if value is None:
+        return None
+
+    try:
+        timeout = float(value)
+
+    except ValueError:
+        return None
+
+    return timeout if timeout > 0.0 else None
+
+
+def get_request_deadline(request: Request) -> t.Optional[float]:
+    return t.cast(t.Optional[float], getattr(request.state, "deadline", None))
+
+
+def request_deadline_dependency(
+        request: Request,
+        timeout: t.Optional[float] = Query(None, alias=TIMEOUT_QUERY, gt=0.0,
+                                           description="seconds the client waits for the response"),
+        header_timeout: t.Optional[float] = Header(None, alias=TIMEOUT_HEADER, gt=0.0,
+                                                   description="seconds the client waits for the response"),
+) -> t.Optional[float]:
+    # the parameters are declared for the validation & the docs, the deadline is counted from the request arrival
+    return get_request_deadline(request)
+
+
+def _deadline_handler(handler: _Handler, default_timeout: t.Optional[float]) -> _Handler:
+    async def handle(request: Request) -> Response:
+        now = monotonic()
+        timeout = _parse_timeout(request.headers.get(TIMEOUT_HEADER))
+        if timeout is None:
+            timeout = _parse_timeout(request.query_params.get(TIMEOUT_QUERY))
+
+        request.state.deadline = make_deadline(timeout if timeout is not None else default_timeout, now)
+
+        return await handler(request)
+
+    return handle
+
+
+def create_deadline_route_class(
+        default_timeout: t.Optional[float] = None,
+        base: t.Type[APIRoute] = APIRoute,
+) -> t.Type[APIRoute]:
+    """
+    Creates a route class that sets the request deadline (see `get_request_deadline`) on the request arrival, from the
+    timeout of `TIMEOUT_HEADER` header, `TIMEOUT_QUERY` query parameter or `default_timeout`.
+    """
+
+    class DeadlineAPIRoute(base):  # type: ignore[valid-type,misc]
+        def get_route_handler(self) -> _Handler:
+            return _deadline_handler(t.cast(_Handler, super().get_route_handler()), default_timeout)
+
+    return DeadlineAPIRoute
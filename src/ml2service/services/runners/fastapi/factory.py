@@ -1,31 +1,79 @@
+import pathlib
+import sys
 import typing as t
 
 # noinspection PyPackageRequirements
-from fastapi import APIRouter, Body, Depends, FastAPI, HTTPException, Path
+from fastapi import APIRouter, Body, Depends, FastAPI, HTTPException, Path, Query, Request, Response
+# noinspection PyPackageRequirements
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, create_model
 # noinspection PyPackageRequirements
 from starlette import status
 # noinspection PyPackageRequirements
+from starlette.concurrency import run_in_threadpool
+# noinspection PyPackageRequirements
 from uvicorn import Config, Server
 
+from ml2service.models.base import IncrementalModelTrainer
 from ml2service.models.loader import ModuleInfo
+from ml2service.monitoring.metrics import MetricsRegistry, ServiceMetrics
+from ml2service.monitoring.tracing import Tracer
+from ml2service.services.admission import AdmissionLimiter, AdmissionOptions
 from ml2service.services.base import (
     ModelPredictionService,
     ModelRemovingService,
     ModelService,
+    ModelStreamingPredictionService,
+    ModelTrainingJobService,
     ModelTrainingService,
+    ModelUpdatingService,
+    PredictDeadlineExceededErrorResponse,
+    PredictManyRequest,
+    PredictManySuccessResponse,
     PredictModelInternalErrorResponse,
     PredictModelNotFoundErrorResponse,
     PredictRequest,
+    PredictStreamRequest,
+    PredictStreamSuccessResponse,
     PredictSuccessResponse,
+    RemoveInternalErrorResponse,
     RemoveModelNotFoundErrorResponse,
     RemoveRequest,
     RemoveSuccessResponse,
+    TrainDeadlineExceededErrorResponse,
     TrainInternalErrorResponse,
+    TrainJobCancelledResponse,
+    TrainJobFinishedErrorResponse,
+    TrainJobNotFoundErrorResponse,
+    TrainJobRejectedErrorResponse,
+    TrainJobRequest,
+    TrainJobStatus,
+    TrainJobStatusResponse,
+    TrainJobSubmittedResponse,
     TrainRequest,
     TrainSuccessResponse,
+    UpdateDeadlineExceededErrorResponse,
+    UpdateInternalErrorResponse,
+    UpdateModelNotFoundErrorResponse,
+    UpdateRequest,
+    UpdateSuccessResponse,
 )
+from ml2service.services.routing import RoutingModelService
 from ml2service.services.runners.base import ServiceRunner, ServiceRunnerFactory
+from ml2service.services.runners.fastapi.admission import create_admission_route_class
+from ml2service.services.runners.fastapi.deadlines import create_deadline_route_class, request_deadline_dependency
+from ml2service.services.runners.fastapi.forwarding import ForwardedRequestMiddleware
+from ml2service.services.runners.fastapi.instrumentation import create_instrumented_route_class
+from ml2service.services.runners.fastapi.prefork import PreforkUvicornServiceRunner
+from ml2service.services.runners.fastapi.responses import create_fast_response_route_class
 from ml2service.services.runners.fastapi.runner import UvicornServiceRunner
+from ml2service.services.runners.fastapi.uploads import spool_upload
+from ml2service.services.runners.fastapi.streaming import (
+    NDJSON_MEDIA_TYPE,
+    NDJSONStreamingResponse,
+    encode_results,
+    read_inputs,
+)
 from ml2service.services.static import StaticModelService
 from ml2service.strict_typing import raise_not_exhaustive
 
@@ -35,6 +83,12 @@ T_predict_input = t.TypeVar("T_predict_input")
 T_predict_output = t.TypeVar("T_predict_output")
 
 
+class TrainJobInfo(BaseModel):
+    job_id: str
+    status: TrainJobStatus
+    error: t.Optional[str] = None
+
+
 class FastAPIServiceRunnerFactory(
     t.Generic[T_train_input, T_predict_input, T_predict_output],
     ServiceRunnerFactory,
@@ -47,8 +101,28 @@ class FastAPIServiceRunnerFactory(
             api_router_factory: t.Optional[t.Callable[[str], APIRouter]] = None,
             server_config_factory: t.Optional[t.Callable[[FastAPI], Config]] = None,
             server_factory: t.Optional[t.Callable[[Config], Server]] = None,
+            train_jobs_enabled: bool = False,
+            metrics: t.Optional[ServiceMetrics] = None,
+            tracer: t.Optional[Tracer] = None,
+            workers: int = 1,
+            admission: t.Optional[AdmissionOptions] = None,
+            train_admission: t.Optional[AdmissionOptions] = None,
+            default_timeout: t.Optional[float] = None,
+            fast_responses: bool = False,
+            upload_dir: t.Optional[pathlib.Path] = None,
+            max_upload_size: t.Optional[int] = None,
     ) -> None:
         self.__info = info
+        self.__upload_dir = upload_dir
+        self.__max_upload_size = max_upload_size
+        self.__fast_responses = fast_responses
+        self.__default_timeout = default_timeout
+        self.__admission = admission
+        self.__train_admission = train_admission
+        self.__train_jobs_enabled = train_jobs_enabled
+        self.__metrics = metrics
+        self.__tracer = tracer
+        self.__workers = workers
         self.__fast_api_factory = fast_api_factory
         self.__api_router_factory = api_router_factory
         self.__server_config_factory = server_config_factory
@@ -60,9 +134,24 @@ class FastAPIServiceRunnerFactory(
     ) -> ServiceRunner:
         app = self.__create_fastapi()
 
+        if self.__metrics is not None:
+            registry = self.__metrics.registry
+
+            @app.get("/metrics", include_in_schema=False)
+            def handle_metrics() -> Response:
+                return Response(content=registry.render(), media_type=MetricsRegistry.CONTENT_TYPE)
+
+        if isinstance(service, RoutingModelService):
+            app.add_middleware(ForwardedRequestMiddleware, is_forwarded=service.is_forwarded)
+
         app.router.include_router(self.__create_service_router(service))
+        app.add_event_handler("shutdown", service.close)
 
         config = self.__create_server_config(app)
+
+        if self.__workers > 1:
+            return PreforkUvicornServiceRunner(config, self.__workers, self.__server_factory)
+
         server = self.__create_server(config)
 
         return UvicornServiceRunner(server)
@@ -106,6 +195,17 @@ class FastAPIServiceRunnerFactory(
             self.__info.predict_output_type,
         )
 
+        arrays_enabled = self.__has_array_types()
+        if arrays_enabled:
+            from ml2service.services.runners.fastapi.arrays import to_input_type, to_output_type
+
+            # noinspection PyPep8Naming
+            TrainInput, PredictInput, PredictOutput = (
+                to_input_type(TrainInput),
+                to_input_type(PredictInput),
+                to_output_type(PredictOutput),
+            )
+
         if isinstance(service, StaticModelService):
             router = self.__create_api_router("")
             registrator = self.__create_router_registrator(router)
@@ -120,23 +220,161 @@ class FastAPIServiceRunnerFactory(
             registrator = self.__create_router_registrator(router)
             key_dependency = Path()
 
-        if isinstance(service, ModelTrainingService):
+        deadline_dependency = Depends(request_deadline_dependency)
+
+        router.route_class = self.__create_route_class(arrays_enabled)
+
+        if self.__train_jobs_enabled and isinstance(service, ModelTrainingJobService):
+            model_training_job_service: ModelTrainingJobService[  # type: ignore[valid-type]
+                str, TrainInput] = service
+
+            @registrator("/", "PUT", status.HTTP_202_ACCEPTED)
+            def handle_train_job_submit(
+                    key: str = key_dependency,
+                    input_: TrainInput = Body(alias="input"),  # type: ignore[valid-type]
+            ) -> TrainJobInfo:
+                response = model_training_job_service.submit_train(TrainRequest(key=key, input_=input_))
+                if isinstance(response, TrainJobSubmittedResponse):
+                    return TrainJobInfo(job_id=response.job_id, status=TrainJobStatus.PENDING)
+
+                elif isinstance(response, TrainJobRejectedErrorResponse):
+                    raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                        headers={"Retry-After": "1"})
+
+                else:
+                    raise_not_exhaustive(response)
+
+        elif isinstance(service, ModelTrainingService):
             model_training_service: ModelTrainingService[  # type: ignore[valid-type]
                 str, TrainInput] = service
 
+            def handle_train_response(response: t.Union[
+                TrainSuccessResponse[str],
+                TrainInternalErrorResponse[str],
+                TrainDeadlineExceededErrorResponse[str],
+            ]) -> None:
+                if isinstance(response, TrainSuccessResponse):
+                    return None
+
+                elif isinstance(response, TrainInternalErrorResponse):
+                    raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                        detail={"error": str(response.error)})
+
+                elif isinstance(response, TrainDeadlineExceededErrorResponse):
+                    raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                                        detail={"error": "deadline exceeded"})
+
+                else:
+                    raise_not_exhaustive(response)
+
             @registrator("/", "PUT", status.HTTP_201_CREATED)
             def handle_train(
                     key: str = key_dependency,
                     input_: TrainInput = Body(alias="input"),  # type: ignore[valid-type]
+                    deadline: t.Optional[float] = deadline_dependency,
             ) -> None:
-                response = model_training_service.train(TrainRequest(key=key, input_=input_))
-                if isinstance(response, TrainSuccessResponse):
+                return handle_train_response(
+                    model_training_service.train(TrainRequest(key=key, input_=input_, deadline=deadline)))
+
+            if isinstance(TrainInput, type) and issubclass(TrainInput, pathlib.PurePath):
+                upload_dir, max_upload_size = self.__upload_dir, self.__max_upload_size
+
+                @router.api_route(
+                    path="/upload",
+                    methods=["PUT"],
+                    status_code=status.HTTP_201_CREATED,
+                    openapi_extra={
+                        "requestBody": {
+                            "required": True,
+                            "description": "training data, the trainer gets the path of the file with it",
+                            "content": {"application/octet-stream": {"schema": {"type": "string", "format": "binary"}}},
+                        },
+                    },
+                )
+                async def handle_train_upload(
+                        request: Request,
+                        key: str = key_dependency,
+                        deadline: t.Optional[float] = deadline_dependency,
+                ) -> None:
+                    if isinstance(service, RoutingModelService) and not service.is_local(key):
+                        # the spooled file is local, the owner of the key can't read it
+                        raise HTTPException(
+                            status_code=status.HTTP_421_MISDIRECTED_REQUEST,
+                            detail={"error": "upload to the owner node", "owner": service.get_owner(key)},
+                        )
+
+                    # the body is spooled to the disk, the trainer reads the file the same way as the static one
+                    path = await spool_upload(request.stream(), upload_dir, max_upload_size)
+
+                    try:
+                        response = await run_in_threadpool(model_training_service.train,
+                                                           TrainRequest(key=key, input_=path, deadline=deadline))
+
+                    finally:
+                        await run_in_threadpool(path.unlink, True)
+
+                    return handle_train_response(response)
+
+        if isinstance(service, ModelUpdatingService) and isinstance(self.__info.trainer, IncrementalModelTrainer):
+            model_updating_service: ModelUpdatingService[  # type: ignore[valid-type]
+                str, TrainInput] = service
+
+            @registrator("/", "PATCH", status.HTTP_200_OK)
+            def handle_update(
+                    key: str = key_dependency,
+                    input_: TrainInput = Body(alias="input"),  # type: ignore[valid-type]
+                    deadline: t.Optional[float] = deadline_dependency,
+            ) -> None:
+                response = model_updating_service.update(UpdateRequest(key=key, input_=input_, deadline=deadline))
+                if isinstance(response, UpdateSuccessResponse):
                     return None
 
-                elif isinstance(response, TrainInternalErrorResponse):
+                elif isinstance(response, UpdateModelNotFoundErrorResponse):
+                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+                elif isinstance(response, UpdateInternalErrorResponse):
                     raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                                         detail={"error": str(response.error)})
 
+                elif isinstance(response, UpdateDeadlineExceededErrorResponse):
+                    raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                                        detail={"error": "deadline exceeded"})
+
+                else:
+                    raise_not_exhaustive(response)
+
+        if self.__train_jobs_enabled and isinstance(service, ModelTrainingJobService):
+            model_training_job_status_service: ModelTrainingJobService[str, object] = service
+
+            @registrator("/jobs/{job_id}", "GET", status.HTTP_200_OK)
+            def handle_train_job_get(job_id: str, key: str = key_dependency) -> TrainJobInfo:
+                response = model_training_job_status_service.get_train_job(TrainJobRequest(key=key, job_id=job_id))
+                if isinstance(response, TrainJobStatusResponse):
+                    return TrainJobInfo(
+                        job_id=response.job_id,
+                        status=response.status,
+                        error=str(response.error) if response.error is not None else None,
+                    )
+
+                elif isinstance(response, TrainJobNotFoundErrorResponse):
+                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+                else:
+                    raise_not_exhaustive(response)
+
+            @registrator("/jobs/{job_id}", "DELETE", status.HTTP_202_ACCEPTED)
+            def handle_train_job_cancel(job_id: str, key: str = key_dependency) -> None:
+                response = model_training_job_status_service.cancel_train_job(TrainJobRequest(key=key, job_id=job_id))
+                if isinstance(response, TrainJobCancelledResponse):
+                    return None
+
+                elif isinstance(response, TrainJobNotFoundErrorResponse):
+                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+                elif isinstance(response, TrainJobFinishedErrorResponse):
+                    raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                                        detail={"status": response.status.value})
+
                 else:
                     raise_not_exhaustive(response)
 
@@ -148,8 +386,9 @@ class FastAPIServiceRunnerFactory(
             def handle_predict(
                     key: str = key_dependency,
                     input_: PredictInput = Body(alias="input"),  # type: ignore[valid-type]
+                    deadline: t.Optional[float] = deadline_dependency,
             ) -> PredictOutput:  # type: ignore[valid-type]
-                response = model_prediction_service.predict(PredictRequest(key=key, input_=input_))
+                response = model_prediction_service.predict(PredictRequest(key=key, input_=input_, deadline=deadline))
                 if isinstance(response, PredictSuccessResponse):
                     return response.output
 
@@ -160,6 +399,95 @@ class FastAPIServiceRunnerFactory(
                     raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                                         detail={"error": str(response.error)})
 
+                elif isinstance(response, PredictDeadlineExceededErrorResponse):
+                    raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                                        detail={"error": "deadline exceeded"})
+
+                else:
+                    raise_not_exhaustive(response)
+
+            # noinspection PyPep8Naming
+            PredictManyOutputItem = create_model(
+                "PredictManyOutputItem",
+                output=(t.Optional[PredictOutput], None),
+                error=(t.Optional[str], None),
+            )
+
+            # the fast responses are not validated by the response model, so the items are not validated either
+            make_output_item = (
+                PredictManyOutputItem.construct
+                if self.__fast_responses
+                else PredictManyOutputItem
+            )
+
+            @registrator("/batch", "POST", status.HTTP_200_OK)
+            def handle_predict_many(
+                    key: str = key_dependency,
+                    inputs: t.List[PredictInput] = Body(alias="inputs"),  # type: ignore[valid-type]
+                    deadline: t.Optional[float] = deadline_dependency,
+            ) -> t.List[PredictManyOutputItem]:  # type: ignore[valid-type]
+                response = model_prediction_service.predict_many(
+                    PredictManyRequest(key=key, inputs=inputs, deadline=deadline))
+                if isinstance(response, PredictManySuccessResponse):
+                    items = []
+
+                    for result in response.results:
+                        if isinstance(result, PredictSuccessResponse):
+                            items.append(make_output_item(output=result.output))
+
+                        elif isinstance(result, PredictModelInternalErrorResponse):
+                            items.append(make_output_item(error=str(result.error)))
+
+                        else:
+                            raise_not_exhaustive(result)
+
+                    return items
+
+                elif isinstance(response, PredictModelNotFoundErrorResponse):
+                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+                elif isinstance(response, PredictDeadlineExceededErrorResponse):
+                    raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                                        detail={"error": "deadline exceeded"})
+
+                else:
+                    raise_not_exhaustive(response)
+
+        if isinstance(service, ModelStreamingPredictionService):
+            model_streaming_prediction_service: ModelStreamingPredictionService[  # type: ignore[valid-type]
+                str, PredictInput, PredictOutput] = service
+
+            @router.api_route(
+                path="/stream",
+                methods=["POST"],
+                status_code=status.HTTP_200_OK,
+                response_class=NDJSONStreamingResponse,
+                openapi_extra={
+                    "requestBody": {
+                        "required": True,
+                        "description": "JSON input on each line",
+                        "content": {NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}}},
+                    },
+                },
+            )
+            async def handle_predict_stream(
+                    request: Request,
+                    key: str = key_dependency,
+                    chunk_size: int = Query(64, ge=1, le=65536),
+            ) -> Response:
+                # neither the inputs nor the outputs are held in memory, they are predicted as the body is read
+                response = await run_in_threadpool(model_streaming_prediction_service.predict_stream,
+                                                   PredictStreamRequest(
+                                                       key=key,
+                                                       inputs=read_inputs(request.stream(), PredictInput),
+                                                       chunk_size=chunk_size,
+                                                   ))
+                if isinstance(response, PredictStreamSuccessResponse):
+                    return NDJSONStreamingResponse(encode_results(response.results, chunk_size))
+
+                elif isinstance(response, PredictModelNotFoundErrorResponse):
+                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
                 else:
                     raise_not_exhaustive(response)
 
@@ -175,11 +503,61 @@ class FastAPIServiceRunnerFactory(
                 elif isinstance(response, RemoveModelNotFoundErrorResponse):
                     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
 
+                elif isinstance(response, RemoveInternalErrorResponse):
+                    raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                                        detail={"error": str(response.error)})
+
                 else:
                     raise_not_exhaustive(response)
 
         return router
 
+    def __has_array_types(self) -> bool:
+        # numpy is imported already if the model types are arrays, the service doesn't require numpy otherwise
+        if "numpy" not in sys.modules:
+            return False
+
+        from ml2service.services.runners.fastapi.arrays import is_array_type
+
+        return any(is_array_type(type_) for type_ in (
+            self.__info.train_input_type,
+            self.__info.predict_input_type,
+            self.__info.predict_output_type,
+        ))
+
+    def __create_route_class(self, arrays_enabled: bool = False) -> t.Type[APIRoute]:
+        route_class = APIRoute
+
+        if self.__fast_responses:
+            route_class = create_fast_response_route_class(route_class)
+
+        if arrays_enabled:
+            from ml2service.services.runners.fastapi.arrays import create_array_route_class
+
+            # binary bodies are decoded after the admission, so the rejected requests are not read
+            route_class = create_array_route_class(route_class)
+
+        # trainings are admitted separately, so they can't take all the capacity of the predictions
+        limiters: t.Dict[str, AdmissionLimiter[str]] = {}
+        if self.__admission is not None:
+            limiters["POST"] = AdmissionLimiter(self.__admission)
+
+        if self.__train_admission is not None:
+            # the updates share the capacity of the trainings
+            limiters["PUT"] = limiters["PATCH"] = AdmissionLimiter(self.__train_admission)
+
+        if limiters:
+            route_class = create_admission_route_class(limiters, route_class)
+
+        # the deadline is set before the admission, so the requests don't wait in the queue past their deadlines
+        route_class = create_deadline_route_class(self.__default_timeout, route_class)
+
+        # admission is inside the instrumentation, so the rejected requests are measured and traced too
+        if self.__metrics is not None or self.__tracer is not None:
+            route_class = create_instrumented_route_class(self.__metrics, self.__tracer, route_class)
+
+        return route_class
+
     def __create_server_config(self, app: FastAPI) -> Config:
         if self.__server_config_factory is not None:
             return self.__server_config_factory(app)
@@ -0,0 +1,36 @@
+import typing as t
+
+# noinspection PyPackageRequirements
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ml2service.services.remote import FORWARDED_HEADER
+from ml2service.services.routing import forwarded_request
+
+
+class ForwardedRequestMiddleware:
+    """
+    Marks the requests forwarded by the other nodes (see `RoutingModelService`). The header is trusted only when its
+    value is the cluster secret, so the clients can't make the node handle the keys of the other nodes.
+    """
+
+    __HEADER: t.Final[bytes] = FORWARDED_HEADER.lower().encode()
+
+    def __init__(self, app: ASGIApp, is_forwarded: t.Callable[[bytes], bool]) -> None:
+        self.__app = app
+        self.__is_forwarded = is_forwarded
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.__app(scope, receive, send)
+            return
+
+        headers = t.cast(t.Sequence[t.Tuple[bytes, bytes]], scope["headers"])
+        token = forwarded_request.set(any(
+            name == self.__HEADER and self.__is_forwarded(value)
+            for name, value in headers
+        ))
+        try:
+            await self.__app(scope, receive, send)
+
+        finally:
+            forwarded_request.reset(token)
@@ -0,0 +1,190 @@
+import asyncio
+import functools
+import inspect
+import typing as t
+from contextvars import ContextVar
+from time import perf_counter
+
+# noinspection PyPackageRequirements
+from fastapi import HTTPException, Request, Response
+# noinspection PyPackageRequirements
+from fastapi.exceptions import RequestValidationError
+# noinspection PyPackageRequirements
+from fastapi.routing import APIRoute
+# noinspection PyPackageRequirements
+from starlette import status
+
+from ml2service.monitoring.metrics import ServiceMetrics
+from ml2service.monitoring.tracing import AttributeValue, SpanContext, Tracer
+
+
+class _Timings:
+    __slots__ = ("endpoint_start", "endpoint_end",)
+
+    def __init__(self) -> None:
+        self.endpoint_start: t.Optional[float] = None
+        self.endpoint_end: t.Optional[float] = None
+
+
+_current_timings: ContextVar[t.Optional[_Timings]] = ContextVar("_current_timings", default=None)
+
+
+def _start_endpoint() -> t.Optional[_Timings]:
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.endpoint_start = perf_counter()
+
+    return timings
+
+
+def _end_endpoint(timings: t.Optional[_Timings]) -> None:
+    if timings is not None:
+        timings.endpoint_end = perf_counter()
+
+
+_TIMED: t.Final[str] = "__timed__"
+
+
+def _time_endpoint(func: t.Callable[..., object]) -> t.Callable[..., object]:
+    # `include_router` creates the routes again with the endpoints wrapped already
+    def is_timed(wrapper: t.Callable[..., object]) -> bool:
+        # the mark refers to the wrapper itself, `functools.wraps` copies it to the outer wrappers
+        return getattr(wrapper, _TIMED, None) is wrapper
+
+    if is_timed(inspect.unwrap(func, stop=is_timed)):
+        return func
+
+    # fastapi reads the endpoint signature through `__wrapped__`, sync endpoints must stay sync to run in threadpool
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def handle_async(*args: object, **kwargs: object) -> object:
+            timings = _start_endpoint()
+            try:
+                return await t.cast(t.Awaitable[object], func(*args, **kwargs))
+
+            finally:
+                _end_endpoint(timings)
+
+        setattr(handle_async, _TIMED, handle_async)
+        return handle_async
+
+    @functools.wraps(func)
+    def handle(*args: object, **kwargs: object) -> object:
+        timings = _start_endpoint()
+        try:
+            return func(*args, **kwargs)
+
+        finally:
+            _end_endpoint(timings)
+
+    setattr(handle, _TIMED, handle)
+    return handle
+
+
+_Handler = t.Callable[[Request], t.Coroutine[object, object, Response]]
+
+
+def _measure_handler(handler: _Handler, route: str, metrics: ServiceMetrics) -> _Handler:
+    decode_duration = metrics.stage_duration.labels("decode")
+    encode_duration = metrics.stage_duration.labels("encode")
+
+    async def handle(request: Request) -> Response:
+        key_class = metrics.classify_key(request.path_params.get("key", ""))
+        in_flight = metrics.in_flight.labels(route, key_class)
+        timings = _Timings()
+        token = _current_timings.set(timings)
+        start = perf_counter()
+        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+
+        metrics.requests.labels(route, key_class).inc()
+        in_flight.inc()
+        try:
+            response = await handler(request)
+            status_code = response.status_code
+            return response
+
+        except HTTPException as err:
+            status_code = err.status_code
+            raise
+
+        except RequestValidationError:
+            # fastapi responds to it by the exception handler of the app
+            status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+            raise
+
+        finally:
+            end = perf_counter()
+            in_flight.dec()
+            _current_timings.reset(token)
+
+            if status_code >= status.HTTP_400_BAD_REQUEST:
+                metrics.errors.labels(route, key_class, str(status_code)).inc()
+
+            if timings.endpoint_start is not None:
+                decode_duration.observe(timings.endpoint_start - start)
+
+            if timings.endpoint_end is not None:
+                encode_duration.observe(end - timings.endpoint_end)
+
+    return handle
+
+
+def _trace_handler(handler: _Handler, route: str, tracer: Tracer) -> _Handler:
+    name = f"http {route}"
+
+    async def handle(request: Request) -> Response:
+        traceparent = request.headers.get("traceparent")
+        attributes: t.Dict[str, AttributeValue] = {"http.route": route}
+        key = request.path_params.get("key")
+        if key is not None:
+            attributes["key"] = key
+
+        with tracer.span(name, attributes, SpanContext.from_traceparent(traceparent) if traceparent else None) as span:
+            try:
+                response = await handler(request)
+
+            except HTTPException as err:
+                span.set_attribute("http.status_code", err.status_code)
+                raise
+
+            except RequestValidationError:
+                span.set_attribute("http.status_code", status.HTTP_422_UNPROCESSABLE_ENTITY)
+                raise
+
+            span.set_attribute("http.status_code", response.status_code)
+
+            return response
+
+    return handle
+
+
+def create_instrumented_route_class(
+        metrics: t.Optional[ServiceMetrics] = None,
+        tracer: t.Optional[Tracer] = None,
+        base: t.Type[APIRoute] = APIRoute,
+) -> t.Type[APIRoute]:
+    """
+    Creates a route class that records the metrics of the requests and opens a span for each request.
+
+    For the metrics the request is split into decode (from the start of request handling until the endpoint is called,
+    i.e. body reading, parsing and validation), the endpoint itself and encode (from the endpoint return until the
+    response is ready, i.e. response model validation and serialization).
+    """
+
+    class InstrumentedAPIRoute(base):  # type: ignore[valid-type,misc]
+        def __init__(self, path: str, endpoint: t.Callable[..., t.Any], **kwargs: t.Any) -> None:
+            super().__init__(path, _time_endpoint(endpoint) if metrics is not None else endpoint, **kwargs)
+
+        def get_route_handler(self) -> _Handler:
+            handler = t.cast(_Handler, super().get_route_handler())
+            route = f"{','.join(sorted(self.methods))} {self.path}"
+
+            if metrics is not None:
+                handler = _measure_handler(handler, route, metrics)
+
+            if tracer is not None:
+                handler = _trace_handler(handler, route, tracer)
+
+            return handler
+
+    return InstrumentedAPIRoute
@@ -0,0 +1,161 @@
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import traceback
+import typing as t
+from threading import Event, Lock, current_thread, main_thread
+from time import monotonic, sleep
+from types import FrameType
+
+# noinspection PyPackageRequirements
+from uvicorn import Config, Server
+
+from ml2service.services.runners.base import ServiceRunner
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class PreforkUvicornServiceRunner(ServiceRunner):
+    """
+    Runs uvicorn servers in `workers` processes forked from the current one, all accepting on the same socket.
+
+    Everything created before the start (the app, the service and its models) is shared with the workers copy on
+    write. Objects are frozen by `gc.freeze` before the fork, so garbage collections in the workers don't touch them
+    and don't copy their pages. Workers that exit are restarted after `restart_delay` seconds until the runner stops.
+    """
+
+    def __init__(
+            self,
+            config: Config,
+            workers: int,
+            server_factory: t.Optional[t.Callable[[Config], Server]] = None,
+            restart_delay: float = 1.0,
+            shutdown_timeout: float = 10.0,
+    ) -> None:
+        if not hasattr(os, "fork"):
+            raise RuntimeError("prefork requires os.fork support")
+
+        if workers < 1:
+            raise ValueError("workers must be positive", workers)
+
+        self.__config = config
+        self.__workers = workers
+        self.__server_factory = server_factory or Server
+        self.__restart_delay = restart_delay
+        self.__shutdown_timeout = shutdown_timeout
+        self.__should_exit = Event()
+        self.__pids_lock = Lock()
+        self.__pids: t.Set[int] = set()
+
+    @property
+    def pids(self) -> t.AbstractSet[int]:
+        with self.__pids_lock:
+            return frozenset(self.__pids)
+
+    def start(self) -> None:
+        self.__should_exit.clear()
+        sock = self.__config.bind_socket()
+
+        if current_thread() is main_thread():
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(sig, self.__handle_exit)
+
+        gc.collect()
+        gc.freeze()
+
+        try:
+            for _ in range(self.__workers):
+                self.__spawn(sock)
+
+            self.__supervise(sock)
+
+        finally:
+            self.__terminate()
+            gc.unfreeze()
+            sock.close()
+
+    def stop(self) -> None:
+        self.__should_exit.set()
+
+    def __handle_exit(self, sig: int, frame: t.Optional[FrameType]) -> None:
+        self.stop()
+
+    def __spawn(self, sock: socket.socket) -> None:
+        pid = os.fork()
+
+        if pid == 0:
+            code = 0
+
+            try:
+                for sig in (signal.SIGINT, signal.SIGTERM):
+                    signal.signal(sig, signal.SIG_DFL)
+
+                self.__server_factory(self.__config).run(sockets=[sock])
+
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+
+        with self.__pids_lock:
+            self.__pids.add(pid)
+
+    def __supervise(self, sock: socket.socket) -> None:
+        while not self.__should_exit.wait(0.1):
+            for pid in self.__reap():
+                logger.warning("worker %d exited, restarting in %s seconds", pid, self.__restart_delay)
+
+                if self.__should_exit.wait(self.__restart_delay):
+                    return
+
+                self.__spawn(sock)
+
+    def __reap(self) -> t.Sequence[int]:
+        exited: t.List[int] = []
+
+        for pid in self.pids:
+            try:
+                done, _ = os.waitpid(pid, os.WNOHANG)
+
+            except ChildProcessError:
+                done = pid
+
+            if done == pid:
+                exited.append(pid)
+
+                with self.__pids_lock:
+                    self.__pids.discard(pid)
+
+        return exited
+
+    def __terminate(self) -> None:
+        for pid in self.pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+
+            except ProcessLookupError:
+                pass
+
+        # graceful shutdown first, then kill the workers that are still there
+        deadline = monotonic() + self.__shutdown_timeout
+        while self.pids and monotonic() < deadline:
+            self.__reap()
+            sleep(0.1)
+
+        for pid in self.pids:
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+
+            except (ProcessLookupError, ChildProcessError):
+                pass
+
+        with self.__pids_lock:
+            self.__pids.clear()
@@ -0,0 +1,94 @@
+import asyncio
+import functools
+import json
+import typing as t
+
+# noinspection PyPackageRequirements
+from fastapi import Response
+# noinspection PyPackageRequirements
+from fastapi.responses import JSONResponse
+# noinspection PyPackageRequirements
+from fastapi.routing import APIRoute
+# noinspection PyPackageRequirements
+from starlette import status
+
+from ml2service.serializers.jsonable import to_jsonable
+
+
+try:
+    import orjson
+
+    def dumps(obj: object) -> bytes:
+        return orjson.dumps(obj, default=to_jsonable, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+except ImportError:  # pragma: no cover
+    def dumps(obj: object) -> bytes:
+        return json.dumps(obj, default=to_jsonable, ensure_ascii=False, allow_nan=False,
+                          separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """Encodes the content as is (by orjson if it is installed), pydantic models are encoded by their fields."""
+
+    def render(self, content: t.Any) -> bytes:
+        return dumps(content)
+
+
+_FAST_RESPONSE: t.Final[str] = "__fast_response__"
+
+
+def _is_fast_response(func: t.Callable[..., object]) -> bool:
+    # the mark refers to the wrapper itself, `functools.wraps` copies it to the outer wrappers
+    return getattr(func, _FAST_RESPONSE, None) is func
+
+
+def unwrap_fast_response(func: t.Callable[..., object]) -> t.Callable[..., object]:
+    """Returns the endpoint without the fast response wrapper, so its results may be encoded in another way."""
+
+    while _is_fast_response(func):
+        func = t.cast(t.Callable[..., object], getattr(func, "__wrapped__"))
+
+    return func
+
+
+def _respond_fast(func: t.Callable[..., object], status_code: int) -> t.Callable[..., object]:
+    # `include_router` creates the routes again with the endpoints wrapped already
+    if _is_fast_response(func):
+        return func
+
+    # fastapi returns the responses of the endpoint as is, so the result is not validated by the response model
+    def make_response(result: object) -> object:
+        return result if isinstance(result, Response) else FastJSONResponse(content=result, status_code=status_code)
+
+    # fastapi reads the endpoint signature through `__wrapped__`, sync endpoints must stay sync to run in threadpool
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def handle_async(*args: object, **kwargs: object) -> object:
+            return make_response(await t.cast(t.Awaitable[object], func(*args, **kwargs)))
+
+        setattr(handle_async, _FAST_RESPONSE, handle_async)
+        return handle_async
+
+    @functools.wraps(func)
+    def handle(*args: object, **kwargs: object) -> object:
+        return make_response(func(*args, **kwargs))
+
+    setattr(handle, _FAST_RESPONSE, handle)
+    return handle
+
+
+def create_fast_response_route_class(base: t.Type[APIRoute] = APIRoute) -> t.Type[APIRoute]:
+    """
+    Creates a route class that trusts the endpoint results: the results of the routes with the response model are
+    encoded to JSON at once by `FastJSONResponse`, without the validation by the response model and
+    `jsonable_encoder`. The response model is still used for the OpenAPI schema.
+    """
+
+    class FastResponseAPIRoute(base):  # type: ignore[valid-type,misc]
+        def __init__(self, path: str, endpoint: t.Callable[..., t.Any], **kwargs: t.Any) -> None:
+            if kwargs.get("response_model") is not None:
+                endpoint = _respond_fast(endpoint, kwargs.get("status_code") or status.HTTP_200_OK)
+
+            super().__init__(path, endpoint, **kwargs)
+
+    return FastResponseAPIRoute
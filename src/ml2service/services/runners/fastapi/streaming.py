@@ -0,0 +1,97 @@
+import json
+import typing as t
+
+import anyio.from_thread
+# noinspection PyPackageRequirements
+from fastapi.responses import StreamingResponse
+from pydantic import parse_obj_as
+# noinspection PyPackageRequirements
+from starlette.types import Receive, Scope, Send
+
+from ml2service.services.base import PredictModelInternalErrorResponse, PredictSuccessResponse
+from ml2service.services.runners.fastapi.responses import dumps
+from ml2service.strict_typing import raise_not_exhaustive
+
+T = t.TypeVar("T")
+
+NDJSON_MEDIA_TYPE: t.Final[str] = "application/x-ndjson"
+
+
+def read_lines(stream: t.AsyncIterator[bytes]) -> t.Iterator[bytes]:
+    """
+    Reads the lines of the request body stream as they come. The iterator is blocking, it must be consumed in the
+    threadpool of the event loop (e.g. by the streaming response).
+    """
+
+    async def receive() -> t.Optional[bytes]:
+        try:
+            return await stream.__anext__()
+
+        except StopAsyncIteration:
+            return None
+
+    rest = b""
+
+    while True:
+        chunk = anyio.from_thread.run(receive)
+        if chunk is None:
+            break
+
+        lines = (rest + chunk).split(b"\n")
+        rest = lines.pop()
+        yield from lines
+
+    yield rest
+
+
+def read_inputs(stream: t.AsyncIterator[bytes], input_type: t.Type[T]) -> t.Iterator[T]:
+    """Parses each non empty line of the request body stream as JSON input, raises `ValueError` on invalid line."""
+
+    for line in read_lines(stream):
+        if line.strip():
+            yield parse_obj_as(input_type, json.loads(line))
+
+
+def encode_results(
+        results: t.Iterator[t.Union[PredictSuccessResponse[str, T], PredictModelInternalErrorResponse[str]]],
+        chunk_size: int,
+) -> t.Iterator[bytes]:
+    """
+    Encodes the results as JSON lines (`{"output": ...}` or `{"error": ...}`, like the batch items), the lines are
+    sent by chunks. The stream ends with the error line if the inputs can't be read.
+    """
+
+    lines: t.List[bytes] = []
+
+    try:
+        for result in results:
+            if isinstance(result, PredictSuccessResponse):
+                lines.append(dumps({"output": result.output, "error": None}))
+
+            elif isinstance(result, PredictModelInternalErrorResponse):
+                lines.append(dumps({"output": None, "error": str(result.error)}))
+
+            else:
+                raise_not_exhaustive(result)
+
+            if len(lines) >= chunk_size:
+                yield b"\n".join(lines) + b"\n"
+                lines.clear()
+
+    except ValueError as err:
+        lines.append(dumps({"output": None, "error": f"invalid input: {err}"}))
+
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    media_type = NDJSON_MEDIA_TYPE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # the request body is still read while the response is streamed, so the messages are not listened for the
+        # client disconnect here (that would take the body messages), the body stream raises on the disconnect
+        await self.stream_response(send)
+
+        if self.background is not None:
+            await self.background()
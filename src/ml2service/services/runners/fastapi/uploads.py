@@ -0,0 +1,43 @@
+import os
+import tempfile
+import typing as t
+from pathlib import Path
+
+# noinspection PyPackageRequirements
+from fastapi import HTTPException
+# noinspection PyPackageRequirements
+from starlette import status
+# noinspection PyPackageRequirements
+from starlette.concurrency import run_in_threadpool
+
+
+async def spool_upload(
+        stream: t.AsyncIterator[bytes],
+        directory: t.Optional[Path] = None,
+        max_size: t.Optional[int] = None,
+) -> Path:
+    """
+    Writes the request body stream to a new temporary file in the directory and returns its path, only a chunk of the
+    body is in memory at a time. The caller must remove the file. The body over `max_size` bytes is rejected with 413
+    response.
+    """
+
+    fd, name = tempfile.mkstemp(prefix="ml2service-upload-", dir=directory)
+    path = Path(name)
+    size = 0
+
+    try:
+        with os.fdopen(fd, "wb") as file:
+            async for chunk in stream:
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                        detail={"error": f"upload is larger than {max_size} bytes"})
+
+                await run_in_threadpool(file.write, chunk)
+
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+
+    return path
@@ -1,13 +1,25 @@
 import typing as t
 
+from ml2service.deadlines import DeadlineExecutor
+from ml2service.executors.base import ModelExecutor
+from ml2service.executors.inline import InlineModelExecutor
 from ml2service.models.base import Model
 from ml2service.services.base import (
     ModelPredictionService,
+    ModelStreamingPredictionService,
+    PredictDeadlineExceededErrorResponse,
+    PredictManyRequest,
+    PredictManySuccessResponse,
     PredictModelInternalErrorResponse,
     PredictModelNotFoundErrorResponse,
     PredictRequest,
+    PredictStreamRequest,
+    PredictStreamSuccessResponse,
     PredictSuccessResponse,
 )
+from ml2service.services.batching import BatchingOptions
+from ml2service.services.prediction_cache import PredictionCacheOptions
+from ml2service.services.predictor import ModelPredictor
 
 K = t.TypeVar("K")
 T_train_input = t.TypeVar("T_train_input", contravariant=True)
@@ -18,22 +30,44 @@ T_predict_output = t.TypeVar("T_predict_output", covariant=True)
 class StaticModelService(
     t.Generic[K, T_predict_input, T_predict_output],
     ModelPredictionService[K, T_predict_input, T_predict_output],
+    ModelStreamingPredictionService[K, T_predict_input, T_predict_output],
 ):
     def __init__(
             self,
             model: Model[T_predict_input, T_predict_output],
+            batching: t.Optional[BatchingOptions] = None,
+            executor: t.Optional[ModelExecutor] = None,
+            prediction_cache: t.Optional[PredictionCacheOptions] = None,
     ) -> None:
-        self.__model = model
+        self.__deadlines = DeadlineExecutor()
+        self.__predictor: ModelPredictor[K, T_predict_input, T_predict_output] = ModelPredictor(
+            lambda key: (model, None),
+            executor or InlineModelExecutor(),
+            self.__deadlines,
+            batching,
+            prediction_cache,
+        )
 
     def predict(self, request: PredictRequest[K, T_predict_input]) -> t.Union[
         PredictSuccessResponse[K, T_predict_output],
         PredictModelNotFoundErrorResponse[K],
         PredictModelInternalErrorResponse[K],
+        PredictDeadlineExceededErrorResponse[K],
     ]:
-        try:
-            output = self.__model.predict(request.input_)
+        return self.__predictor.predict(request)
 
-        except Exception as err:
-            return PredictModelInternalErrorResponse(key=request.key, error=err)
+    def predict_many(self, request: PredictManyRequest[K, T_predict_input]) -> t.Union[
+        PredictManySuccessResponse[K, T_predict_output],
+        PredictModelNotFoundErrorResponse[K],
+        PredictDeadlineExceededErrorResponse[K],
+    ]:
+        return self.__predictor.predict_many(request)
+
+    def predict_stream(self, request: PredictStreamRequest[K, T_predict_input]) -> t.Union[
+        PredictStreamSuccessResponse[K, T_predict_output],
+        PredictModelNotFoundErrorResponse[K],
+    ]:
+        return self.__predictor.predict_stream(request)
 
-        return PredictSuccessResponse(key=request.key, output=output)
+    def close(self) -> None:
+        self.__deadlines.shutdown()
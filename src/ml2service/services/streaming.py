@@ -0,0 +1,87 @@
+import typing as t
+from itertools import islice
+
+from ml2service.models.base import Model, StreamingModel
+from ml2service.services.base import PredictModelInternalErrorResponse, PredictSuccessResponse
+
+K = t.TypeVar("K")
+T = t.TypeVar("T")
+T_predict_input = t.TypeVar("T_predict_input")
+T_predict_output = t.TypeVar("T_predict_output")
+
+
+def iter_chunks(items: t.Iterable[T], size: int) -> t.Iterator[t.Sequence[T]]:
+    """Yields the items by chunks, the items read before a failure of the items are yielded before it is raised."""
+
+    if size < 1:
+        raise ValueError("chunk size must be positive", size)
+
+    iterator = iter(items)
+
+    while True:
+        chunk: t.List[T] = []
+
+        try:
+            for item in islice(iterator, size):
+                chunk.append(item)
+
+        except Exception:
+            if chunk:
+                yield chunk
+
+            raise
+
+        if not chunk:
+            return
+
+        yield chunk
+
+
+def stream_predictions(
+        key: K,
+        model: Model[T_predict_input, T_predict_output],
+        inputs: t.Iterable[T_predict_input],
+        chunk_size: int,
+        predict_many: t.Callable[[t.Sequence[T_predict_input]], t.Sequence[t.Union[
+            PredictSuccessResponse[K, T_predict_output],
+            PredictModelInternalErrorResponse[K],
+        ]]],
+) -> t.Iterator[t.Union[
+    PredictSuccessResponse[K, T_predict_output],
+    PredictModelInternalErrorResponse[K],
+]]:
+    """
+    Predicts the inputs chunk by chunk with `predict_many`, or by `StreamingModel.predict_stream` if the model
+    supports it. Only one chunk of the inputs & the outputs is in memory at a time.
+
+    The stream of the streaming model ends with the error result if the model fails, the inputs after the failure are
+    not predicted. If the inputs fail (e.g. a malformed line), the inputs read before the failure are predicted, then
+    the failure is raised.
+    """
+
+    if isinstance(model, StreamingModel):
+        input_errors: t.List[Exception] = []
+
+        def read_inputs() -> t.Iterator[T_predict_input]:
+            # the failure of the inputs ends the inputs of the model, so it is not taken for the failure of the model
+            try:
+                yield from inputs
+
+            except Exception as err:
+                input_errors.append(err)
+
+        try:
+            for output in model.predict_stream(read_inputs()):
+                yield PredictSuccessResponse(key=key, output=output)
+
+        except Exception as err:
+            yield PredictModelInternalErrorResponse(key=key, error=err)
+            return
+
+        if input_errors:
+            raise input_errors[0]
+
+        return
+
+    for chunk in iter_chunks(inputs, chunk_size):
+        yield from predict_many(chunk)
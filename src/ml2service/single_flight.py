@@ -0,0 +1,79 @@
+import typing as t
+from concurrent.futures import CancelledError, Future
+from threading import Lock
+
+K = t.TypeVar("K")
+V = t.TypeVar("V")
+
+
+class SingleFlight(t.Generic[K, V]):
+    """
+    Coalesces concurrent calls with the same key: only the first caller invokes the function, the others wait for its
+    result (or its error). The result is not kept after the call completes.
+    """
+
+    def __init__(self) -> None:
+        self.__lock = Lock()
+        self.__calls: t.Dict[K, Future[V]] = {}
+
+    def do(self, key: K, func: t.Callable[[], V]) -> V:
+        with self.__lock:
+            future = self.__calls.get(key)
+            is_leader = future is None
+            if future is None:
+                future = self.__calls[key] = Future()
+
+        if not is_leader:
+            return future.result()
+
+        try:
+            result = func()
+
+        except BaseException as err:
+            self.__release(key)
+            future.set_exception(err)
+            raise
+
+        self.__release(key)
+        future.set_result(result)
+
+        return result
+
+    def share(self, key: K, submit: t.Callable[[], "Future[V]"]) -> "Future[V]":
+        """
+        Like `do`, but for the asynchronous calls: only the first caller submits the call, all the callers get a future
+        of its result, so each of them may wait for it as long as it wants.
+        """
+
+        with self.__lock:
+            future = self.__calls.get(key)
+            if future is not None:
+                return future
+
+            future = self.__calls[key] = Future()
+
+        try:
+            submitted = submit()
+
+        except BaseException as err:
+            self.__release(key)
+            future.set_exception(err)
+            raise
+
+        def resolve(done: "Future[V]") -> None:
+            self.__release(key)
+
+            err = done.exception() if not done.cancelled() else CancelledError()
+            if err is not None:
+                future.set_exception(err)
+
+            else:
+                future.set_result(done.result())
+
+        submitted.add_done_callback(resolve)
+
+        return future
+
+    def __release(self, key: K) -> None:
+        with self.__lock:
+            del self.__calls[key]
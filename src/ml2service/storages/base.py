@@ -17,3 +17,11 @@ class Storage(t.Generic[K, V], metaclass=abc.ABCMeta):
     @abc.abstractmethod
     def remove(self, key: K) -> t.Optional[V]:
         raise NotImplementedError
+
+    def get_versioned(self, key: K) -> t.Tuple[t.Optional[V], t.Optional[bytes]]:
+        """
+        Returns the value with its version, the version changes whenever the stored value does. The version is `None`
+        if the storage doesn't know it.
+        """
+
+        return self.get(key), None
@@ -0,0 +1,90 @@
+import hashlib
+import mmap
+import os
+import typing as t
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from urllib.parse import quote
+
+from ml2service.serializers.base import Buffer
+from ml2service.storages.base import Storage
+
+K = t.TypeVar("K")
+
+
+class FileStorage(t.Generic[K], Storage[K, Buffer]):
+    """
+    Keeps each value in its own file in the directory.
+
+    Values are written to a temporary file first and then renamed over the old one, so readers never see partially
+    written values. Files are read only on `get`: files not smaller than `mmap_threshold` bytes are memory mapped
+    rather than read into the heap, the mapping stays valid even after the value was replaced or removed.
+    """
+
+    __MAX_FILENAME_LENGTH: t.Final[int] = 200
+
+    def __init__(
+            self,
+            root: Path,
+            mmap_threshold: t.Optional[int] = 1024 * 1024,
+            fsync: bool = True,
+            suffix: str = ".bin",
+    ) -> None:
+        self.__root = root
+        self.__mmap_threshold = mmap_threshold
+        self.__fsync = fsync
+        self.__suffix = suffix
+
+        self.__root.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: K) -> t.Optional[Buffer]:
+        return self.__read(self.__get_path(key))
+
+    def update(self, key: K, value: Buffer) -> None:
+        path = self.__get_path(key)
+
+        with NamedTemporaryFile(dir=self.__root, prefix=".", suffix=".tmp", delete=False) as tmp:
+            try:
+                tmp.write(value)
+                tmp.flush()
+
+                if self.__fsync:
+                    os.fsync(tmp.fileno())
+
+            except BaseException:
+                os.unlink(tmp.name)
+                raise
+
+        os.replace(tmp.name, path)
+
+    def remove(self, key: K) -> t.Optional[Buffer]:
+        path = self.__get_path(key)
+        value = self.__read(path)
+
+        try:
+            path.unlink()
+
+        except FileNotFoundError:
+            return None
+
+        return value
+
+    def __get_path(self, key: K) -> Path:
+        name = quote(str(key), safe="")
+        if len(name) > self.__MAX_FILENAME_LENGTH:
+            name = hashlib.sha256(name.encode()).hexdigest()
+
+        return self.__root / f"{name}{self.__suffix}"
+
+    def __read(self, path: Path) -> t.Optional[Buffer]:
+        try:
+            with path.open("rb") as f:
+                size = os.fstat(f.fileno()).st_size
+
+                if self.__mmap_threshold is not None and size >= self.__mmap_threshold and size > 0:
+                    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+                return f.read()
+
+        except FileNotFoundError:
+            return None
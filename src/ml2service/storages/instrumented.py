@@ -0,0 +1,50 @@
+import typing as t
+from time import perf_counter
+
+from ml2service.monitoring.metrics import ServiceMetrics
+from ml2service.storages.base import Storage
+
+K = t.TypeVar("K")
+V = t.TypeVar("V")
+
+
+class InstrumentedStorage(t.Generic[K, V], Storage[K, V]):
+    """Records the durations of the inner storage operations as `<stage>_get`, `<stage>_update` & `<stage>_remove`."""
+
+    def __init__(self, inner: Storage[K, V], metrics: ServiceMetrics, stage: str = "storage") -> None:
+        self.__inner = inner
+        self.__get_duration = metrics.stage_duration.labels(f"{stage}_get")
+        self.__update_duration = metrics.stage_duration.labels(f"{stage}_update")
+        self.__remove_duration = metrics.stage_duration.labels(f"{stage}_remove")
+
+    def get(self, key: K) -> t.Optional[V]:
+        start = perf_counter()
+        try:
+            return self.__inner.get(key)
+
+        finally:
+            self.__get_duration.observe(perf_counter() - start)
+
+    def get_versioned(self, key: K) -> t.Tuple[t.Optional[V], t.Optional[bytes]]:
+        start = perf_counter()
+        try:
+            return self.__inner.get_versioned(key)
+
+        finally:
+            self.__get_duration.observe(perf_counter() - start)
+
+    def update(self, key: K, value: V) -> None:
+        start = perf_counter()
+        try:
+            self.__inner.update(key, value)
+
+        finally:
+            self.__update_duration.observe(perf_counter() - start)
+
+    def remove(self, key: K) -> t.Optional[V]:
+        start = perf_counter()
+        try:
+            return self.__inner.remove(key)
+
+        finally:
+            self.__remove_duration.observe(perf_counter() - start)
@@ -0,0 +1,214 @@
+import inspect
+import sys
+import typing as t
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from threading import Lock
+from time import monotonic
+
+from ml2service.monitoring.tracing import set_span_attribute
+from ml2service.single_flight import SingleFlight
+from ml2service.storages.base import Storage
+from ml2service.striped_lock import StripedLock
+
+K = t.TypeVar("K")
+V = t.TypeVar("V")
+
+
+def estimate_deep_size(value: object, max_objects: int = 10_000) -> int:
+    """
+    A size estimator that walks the object graph of the value (unlike the shallow `sys.getsizeof`): the items of the
+    containers, the attributes of the objects and the memory under the views (e.g. numpy arrays) are accounted, each
+    object once. Classes, modules & functions are shared, so they are not accounted.
+
+    The estimate is approximate: the walk stops after `max_objects` objects, so the cost of the estimate is bounded,
+    and the objects left are accounted by the average size of the walked objects (except the value itself).
+    """
+
+    seen: t.Set[int] = set()
+    pending: t.List[object] = [value]
+    size = 0
+    value_size = 0
+
+    while pending and len(seen) < max_objects:
+        obj = pending.pop()
+        if id(obj) in seen or inspect.isclass(obj) or inspect.ismodule(obj) or inspect.isroutine(obj):
+            continue
+
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if obj is value:
+            value_size = size
+
+        if isinstance(obj, dict):
+            items = t.cast(t.Dict[object, object], obj)
+            pending.extend(items.keys())
+            pending.extend(items.values())
+
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            pending.extend(t.cast(t.Iterable[object], obj))
+
+        elif isinstance(obj, memoryview):
+            pending.append(t.cast(object, obj.obj))
+
+        # the array view doesn't own its memory, its base does
+        base = t.cast(object, getattr(obj, "base", None))
+        if base is not None:
+            pending.append(base)
+
+        attrs = t.cast(object, getattr(obj, "__dict__", None))
+        if isinstance(attrs, dict):
+            pending.append(attrs)
+
+        for cls in type(obj).__mro__:
+            for name in t.cast(t.Iterable[str], getattr(cls, "__slots__", ())):
+                pending.append(t.cast(object, getattr(obj, name, None)))
+
+    if pending and len(seen) > 1:
+        size += len(pending) * (size - value_size) // (len(seen) - 1)
+
+    return size
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size: int
+
+
+@dataclass(frozen=True)
+class _Entry(t.Generic[V]):
+    value: t.Optional[V]
+    size: int
+    expires_at: t.Optional[float]
+
+
+class LRUCacheStorage(t.Generic[K, V], Storage[K, V]):
+    """
+    Bounded cache in front of the inner storage.
+
+    The least recently used entries are evicted when there are more than `max_entries` entries or when the total size
+    of the cached values (as estimated by `size_estimator`) exceeds `max_size`. Entries older than `ttl` seconds are
+    reloaded from the inner storage. Missing keys are cached too, unless `cache_missing` is disabled.
+
+    Values loaded while their keys were updated or removed are not cached (see `MemoizeStorage`).
+    """
+
+    def __init__(
+            self,
+            inner: Storage[K, V],
+            max_entries: t.Optional[int] = None,
+            max_size: t.Optional[int] = None,
+            ttl: t.Optional[float] = None,
+            size_estimator: t.Callable[[V], int] = estimate_deep_size,
+            cache_missing: bool = True,
+            clock: t.Callable[[], float] = monotonic,
+            stripes: int = 64,
+    ) -> None:
+        if max_entries is None and max_size is None:
+            raise ValueError("either max entries or max size must be specified to bound the cache")
+
+        self.__inner = inner
+        self.__max_entries = max_entries
+        self.__max_size = max_size
+        self.__ttl = ttl
+        self.__size_estimator = size_estimator
+        self.__cache_missing = cache_missing
+        self.__clock = clock
+
+        self.__lock = Lock()
+        self.__stripes: StripedLock[K] = StripedLock(stripes)
+        self.__loads: SingleFlight[t.Tuple[K, int], t.Optional[V]] = SingleFlight()
+        self.__cached: OrderedDict[K, _Entry[V]] = OrderedDict()
+        self.__size = 0
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    @property
+    def stats(self) -> CacheStats:
+        with self.__lock:
+            return CacheStats(
+                hits=self.__hits,
+                misses=self.__misses,
+                evictions=self.__evictions,
+                entries=len(self.__cached),
+                size=self.__size,
+            )
+
+    def get(self, key: K) -> t.Optional[V]:
+        now = self.__clock()
+        stripe = self.__stripes.get_stripe(key)
+        generation = self.__stripes.get_generation(stripe)
+
+        with self.__lock:
+            entry = self.__cached.get(key)
+
+            if entry is not None and (entry.expires_at is None or entry.expires_at > now):
+                self.__cached.move_to_end(key)
+                self.__hits += 1
+                set_span_attribute("cache.hit", True)
+                return entry.value
+
+            if entry is not None:
+                self.__discard(key)
+
+            self.__misses += 1
+
+        set_span_attribute("cache.hit", False)
+        value = self.__loads.do((key, generation), lambda: self.__inner.get(key))
+
+        if value is not None or self.__cache_missing:
+            self.__put(key, value, now, stripe, generation)
+
+        return value
+
+    def update(self, key: K, value: V) -> None:
+        self.__inner.update(key, value)
+        self.__invalidate(key)
+
+    def remove(self, key: K) -> t.Optional[V]:
+        value = self.__inner.remove(key)
+        self.__invalidate(key)
+
+        return value
+
+    def __invalidate(self, key: K) -> None:
+        stripe = self.__stripes.get_stripe(key)
+
+        with self.__stripes.get_lock(stripe):
+            self.__stripes.advance(stripe)
+
+            with self.__lock:
+                self.__discard(key)
+
+    def __put(self, key: K, value: t.Optional[V], now: float, stripe: int, generation: int) -> None:
+        size = self.__size_estimator(value) if value is not None else 0
+        if self.__max_size is not None and size > self.__max_size:
+            return
+
+        entry = _Entry(value, size, now + self.__ttl if self.__ttl is not None else None)
+
+        with self.__stripes.get_lock(stripe), self.__lock:
+            if self.__stripes.get_generation(stripe) != generation:
+                return
+
+            self.__discard(key)
+            self.__cached[key] = entry
+            self.__size += size
+
+            while self.__cached and (
+                    (self.__max_entries is not None and len(self.__cached) > self.__max_entries)
+                    or (self.__max_size is not None and self.__size > self.__max_size)
+            ):
+                _, evicted = self.__cached.popitem(last=False)
+                self.__size -= evicted.size
+                self.__evictions += 1
+
+    def __discard(self, key: K) -> None:
+        entry = self.__cached.pop(key, None)
+        if entry is not None:
+            self.__size -= entry.size
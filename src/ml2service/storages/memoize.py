@@ -1,35 +1,63 @@
 import typing as t
 
+from ml2service.monitoring.tracing import set_span_attribute
+from ml2service.single_flight import SingleFlight
 from ml2service.storages.base import Storage
+from ml2service.striped_lock import StripedLock
 
 K = t.TypeVar("K")
 V = t.TypeVar("V")
 
 
 class MemoizeStorage(t.Generic[K, V], Storage[K, V]):
+    """
+    Keeps all the values loaded from the inner storage.
+
+    A value loaded while the key was updated or removed may be already stale, so it is not cached: loads & writes of
+    a key are ordered by the generation of its lock stripe, the keys of the other stripes don't wait for each other.
+    """
 
     __MISSED: t.Final[object] = object()
 
-    def __init__(self, inner: Storage[K, V]) -> None:
+    def __init__(self, inner: Storage[K, V], stripes: int = 64) -> None:
         self.__inner = inner
         self.__cached: t.Dict[K, t.Union[t.Optional[V], object]] = {}
+        self.__stripes: StripedLock[K] = StripedLock(stripes)
+        self.__loads: SingleFlight[t.Tuple[K, int], t.Optional[V]] = SingleFlight()
 
     def get(self, key: K) -> t.Optional[V]:
+        stripe = self.__stripes.get_stripe(key)
+        generation = self.__stripes.get_generation(stripe)
+
         found = self.__cached.get(key, self.__MISSED)
-        if found is self.__MISSED:
-            value = self.__cached[key] = self.__inner.get(key)
+        set_span_attribute("cache.hit", found is not self.__MISSED)
+
+        if found is not self.__MISSED:
+            return t.cast(t.Optional[V], found)
 
-        else:
-            value = t.cast(t.Optional[V], found)
+        # concurrent misses of the same key wait for a single load from the inner storage, loads started after a
+        # write don't join the loads started before it
+        value = self.__loads.do((key, generation), lambda: self.__inner.get(key))
+
+        with self.__stripes.get_lock(stripe):
+            if self.__stripes.get_generation(stripe) == generation:
+                self.__cached[key] = value
 
         return value
 
     def update(self, key: K, value: V) -> None:
         self.__inner.update(key, value)
-        self.__cached.pop(key, None)
+        self.__invalidate(key)
 
     def remove(self, key: K) -> t.Optional[V]:
         value = self.__inner.remove(key)
-        self.__cached.pop(key, None)
+        self.__invalidate(key)
 
         return value
+
+    def __invalidate(self, key: K) -> None:
+        stripe = self.__stripes.get_stripe(key)
+
+        with self.__stripes.get_lock(stripe):
+            self.__stripes.advance(stripe)
+            self.__cached.pop(key, None)
@@ -1,6 +1,7 @@
+import hashlib
 import typing as t
 
-from ml2service.serializers.base import Serializer
+from ml2service.serializers.base import Buffer, Serializer
 from ml2service.storages.base import Storage
 
 K = t.TypeVar("K")
@@ -8,7 +9,7 @@ V = t.TypeVar("V")
 
 
 class SerializedStorage(Storage[K, V]):
-    def __init__(self, inner: Storage[K, bytes], serializer: Serializer[V]) -> None:
+    def __init__(self, inner: Storage[K, Buffer], serializer: Serializer[V]) -> None:
         self.__inner = inner
         self.__serializer = serializer
 
@@ -16,6 +17,14 @@ class SerializedStorage(Storage[K, V]):
         serialized_value = self.__inner.get(key)
         return self.__decode(serialized_value)
 
+    def get_versioned(self, key: K) -> t.Tuple[t.Optional[V], t.Optional[bytes]]:
+        # each get decodes a new value, the digest of the serialized value tells the same values apart
+        serialized_value = self.__inner.get(key)
+        if serialized_value is None:
+            return None, None
+
+        return self.__decode(serialized_value), hashlib.blake2b(serialized_value, digest_size=16).digest()
+
     def update(self, key: K, value: V) -> None:
         serialized_value = self.__serializer.encode(value)
         self.__inner.update(key, serialized_value)
@@ -24,5 +33,5 @@ class SerializedStorage(Storage[K, V]):
         serialized_value = self.__inner.remove(key)
         return self.__decode(serialized_value)
 
-    def __decode(self, value: t.Optional[bytes]) -> t.Optional[V]:
+    def __decode(self, value: t.Optional[Buffer]) -> t.Optional[V]:
         return self.__serializer.decode(value) if value is not None else None
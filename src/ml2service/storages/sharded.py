@@ -0,0 +1,27 @@
+import typing as t
+
+from ml2service.hash_ring import HashRing
+from ml2service.storages.base import Storage
+
+K = t.TypeVar("K")
+V = t.TypeVar("V")
+
+
+class ShardedStorage(t.Generic[K, V], Storage[K, V]):
+    """Spreads the keys over the shards (inner storages by their stable names) by consistent hashing of `str(key)`."""
+
+    def __init__(self, shards: t.Mapping[str, Storage[K, V]], virtual_nodes: int = 128) -> None:
+        self.__shards = dict(shards)
+        self.__ring: HashRing[str] = HashRing(self.__shards, virtual_nodes)
+
+    def get_shard(self, key: K) -> Storage[K, V]:
+        return self.__shards[self.__ring.get_node(str(key))]
+
+    def get(self, key: K) -> t.Optional[V]:
+        return self.get_shard(key).get(key)
+
+    def update(self, key: K, value: V) -> None:
+        self.get_shard(key).update(key, value)
+
+    def remove(self, key: K) -> t.Optional[V]:
+        return self.get_shard(key).remove(key)
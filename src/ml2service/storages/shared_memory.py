@@ -0,0 +1,289 @@
+import fcntl
+import hashlib
+import os
+import secrets
+import struct
+import tempfile
+import typing as t
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from threading import Lock
+
+from ml2service.serializers.base import Buffer
+from ml2service.storages.base import Storage
+
+K = t.TypeVar("K")
+
+
+def _get_buffer(segment: SharedMemory) -> memoryview:
+    buffer = segment.buf
+    if buffer is None:
+        raise ValueError("shared memory segment is closed", segment.name)
+
+    return buffer
+
+
+class _IndexLock:
+    """Excludes both the threads of the process and the other processes (`flock` on the lock file)."""
+
+    def __init__(self, path: Path) -> None:
+        self.__path = path
+        self.__pid = -1
+        self.__thread_lock = Lock()
+        self.__fd = -1
+
+    def __enter__(self) -> None:
+        if self.__pid != os.getpid():
+            # forked child: the descriptor is shared with the parent, so flock would not exclude it, reopen the file
+            self.__pid = os.getpid()
+            self.__thread_lock = Lock()
+            self.__fd = os.open(self.__path, os.O_RDWR | os.O_CREAT, 0o600)
+
+        self.__thread_lock.acquire()
+        fcntl.flock(self.__fd, fcntl.LOCK_EX)
+
+    def __exit__(self, *_: object) -> None:
+        fcntl.flock(self.__fd, fcntl.LOCK_UN)
+        self.__thread_lock.release()
+
+
+class SharedMemoryStorage(t.Generic[K], Storage[K, Buffer]):
+    """
+    Keeps each value in its own shared memory segment, the segments are found by the index in a shared memory segment
+    too. The storage is shared by the processes forked after its creation (e.g. prefork server workers), so a value
+    written by one worker is read by the others without copying.
+
+    Replaced & removed segments are unlinked at once, but their memory is released by the OS only when the last
+    process unmaps it, so the values returned earlier stay valid (while the storage is alive). Each process closes its
+    own mapping of a segment when no views of it are left. All segments that are still there are unlinked when the
+    processes sharing the storage exit (by multiprocessing resource tracker).
+
+    The index is an open addressing hash table of `capacity` slots by the key hashes, it is modified under the file
+    lock, so a crashed process doesn't leave it locked. The mappings of this process are kept under the same lock. The
+    process that created the storage removes the lock file on close, so it must close the storage after the others.
+    """
+
+    __MAGIC: t.Final[bytes] = b"M2SI"
+    __HEADER: t.Final[struct.Struct] = struct.Struct("<4sIQ")
+    __SLOT: t.Final[struct.Struct] = struct.Struct("<B7xQQ16s")
+    __EMPTY: t.Final[int] = 0
+    __USED: t.Final[int] = 1
+    __DELETED: t.Final[int] = 2
+
+    def __init__(self, name: t.Optional[str] = None, capacity: int = 4096) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be positive", capacity)
+
+        self.__name = name or f"ml2s{os.getpid()}"
+        self.__lock_path = Path(tempfile.gettempdir()) / f"{self.__name}.lock"
+        self.__lock = _IndexLock(self.__lock_path)
+        self.__owner_pid: t.Optional[int] = None
+        self.__segments: t.Dict[int, SharedMemory] = {}
+        self.__tokens: t.Dict[bytes, int] = {}
+        self.__retired: t.List[SharedMemory] = []
+
+        with self.__lock:
+            try:
+                self.__index = SharedMemory(f"{self.__name}-index")
+
+            except FileNotFoundError:
+                self.__index = SharedMemory(f"{self.__name}-index", create=True,
+                                            size=self.__HEADER.size + capacity * self.__SLOT.size)
+                self.__HEADER.pack_into(_get_buffer(self.__index), 0, self.__MAGIC, capacity, 0)
+                self.__owner_pid = os.getpid()
+
+            magic, self.__capacity, _ = t.cast(t.Tuple[bytes, int, int],
+                                               self.__HEADER.unpack_from(_get_buffer(self.__index)))
+            if magic != self.__MAGIC:
+                raise ValueError("not a shared memory storage index", self.__name)
+
+    def get(self, key: K) -> t.Optional[Buffer]:
+        digest = self.__digest(key)
+
+        with self.__lock:
+            _, slot = self.__find(digest)
+            if slot is None:
+                self.__forget(digest, None)
+                return None
+
+            _, token, size, _ = self.__read_slot(slot)
+            # the view is taken under the lock, so the segment isn't closed by another thread before
+            value = _get_buffer(self.__attach(token))[:size]
+            self.__forget(digest, token)
+            self.__close_retired()
+
+        return value
+
+    def update(self, key: K, value: Buffer) -> None:
+        digest = self.__digest(key)
+        token = secrets.randbits(64)
+        size = len(value)
+
+        segment = SharedMemory(self.__segment_name(token), create=True, size=max(size, 1))
+        _get_buffer(segment)[:size] = value
+
+        try:
+            with self.__lock:
+                self.__segments[token] = segment
+
+                free, slot = self.__find(digest)
+                if slot is not None:
+                    _, old_token, _, _ = self.__read_slot(slot)
+                    self.__unlink(old_token)
+
+                elif free is not None:
+                    slot = free
+
+                else:
+                    raise RuntimeError("shared memory storage index is full", self.__name, self.__capacity)
+
+                self.__SLOT.pack_into(_get_buffer(self.__index), self.__slot_offset(slot),
+                                      self.__USED, token, size, digest)
+                self.__forget(digest, token)
+                self.__close_retired()
+
+        except BaseException:
+            with self.__lock:
+                self.__unlink(token)
+
+            raise
+
+    def remove(self, key: K) -> t.Optional[Buffer]:
+        digest = self.__digest(key)
+
+        with self.__lock:
+            _, slot = self.__find(digest)
+            if slot is None:
+                return None
+
+            _, token, size, _ = self.__read_slot(slot)
+            value = _get_buffer(self.__attach(token))[:size]
+
+            self.__release(slot)
+            self.__unlink(token)
+            self.__forget(digest, None)
+            self.__close_retired()
+
+        return value
+
+    def close(self) -> None:
+        """Closes the mappings of this process, the segments stay available for the other processes."""
+
+        with self.__lock:
+            self.__retired.extend(self.__segments.values())
+            self.__segments.clear()
+            self.__tokens.clear()
+            self.__close_retired()
+
+        self.__index.close()
+
+        if self.__owner_pid == os.getpid():
+            self.__lock_path.unlink(missing_ok=True)
+
+    def destroy(self) -> None:
+        """Unlinks all the segments of the storage including the index, the storage can't be used anymore."""
+
+        with self.__lock:
+            for slot in range(self.__capacity):
+                state, token, _, _ = self.__read_slot(slot)
+                if state == self.__USED:
+                    self.__unlink(token)
+
+            self.__index.unlink()
+
+        self.close()
+        self.__lock_path.unlink(missing_ok=True)
+
+    def __digest(self, key: K) -> bytes:
+        return hashlib.blake2b(str(key).encode(), digest_size=16).digest()
+
+    def __segment_name(self, token: int) -> str:
+        return f"{self.__name}-{token:016x}"
+
+    def __slot_offset(self, slot: int) -> int:
+        return self.__HEADER.size + slot * self.__SLOT.size
+
+    def __read_slot(self, slot: int) -> t.Tuple[int, int, int, bytes]:
+        return t.cast(t.Tuple[int, int, int, bytes],
+                      self.__SLOT.unpack_from(_get_buffer(self.__index), self.__slot_offset(slot)))
+
+    def __find(self, digest: bytes) -> t.Tuple[t.Optional[int], t.Optional[int]]:
+        """Returns the first free slot on the probe path and the slot of the digest (if it is in the index)."""
+
+        free: t.Optional[int] = None
+        start = int.from_bytes(digest[:8], "little") % self.__capacity
+
+        for i in range(self.__capacity):
+            slot = (start + i) % self.__capacity
+            state, _, _, slot_digest = self.__read_slot(slot)
+
+            if state == self.__EMPTY:
+                return free if free is not None else slot, None
+
+            elif state == self.__DELETED:
+                if free is None:
+                    free = slot
+
+            elif slot_digest == digest:
+                return free, slot
+
+        return free, None
+
+    def __release(self, slot: int) -> None:
+        """
+        Marks the slot deleted, so the probe paths go on past it. The slot followed by the empty one ends no probe path,
+        so it is emptied along with the deleted slots before it, thus the deleted slots don't pile up in the index.
+        """
+
+        state, _, _, _ = self.__read_slot((slot + 1) % self.__capacity)
+        if state != self.__EMPTY:
+            self.__SLOT.pack_into(_get_buffer(self.__index), self.__slot_offset(slot), self.__DELETED, 0, 0, b"")
+            return
+
+        for _ in range(self.__capacity):
+            self.__SLOT.pack_into(_get_buffer(self.__index), self.__slot_offset(slot), self.__EMPTY, 0, 0, b"")
+
+            slot = (slot - 1) % self.__capacity
+            state, _, _, _ = self.__read_slot(slot)
+            if state != self.__DELETED:
+                return
+
+    def __attach(self, token: int) -> SharedMemory:
+        segment = self.__segments.get(token)
+        if segment is None:
+            segment = self.__segments[token] = SharedMemory(self.__segment_name(token))
+
+        return segment
+
+    def __forget(self, digest: bytes, actual_token: t.Optional[int]) -> None:
+        # the value was replaced or removed by another process, this process doesn't need the old mapping anymore
+        token = self.__tokens.pop(digest, None)
+        if token is not None and token != actual_token:
+            segment = self.__segments.pop(token, None)
+            if segment is not None:
+                self.__retired.append(segment)
+
+        if actual_token is not None:
+            self.__tokens[digest] = actual_token
+
+    def __unlink(self, token: int) -> None:
+        try:
+            segment = self.__attach(token)
+
+        except FileNotFoundError:
+            return
+
+        del self.__segments[token]
+        segment.unlink()
+        self.__retired.append(segment)
+
+    def __close_retired(self) -> None:
+        # under the lock
+        retired, self.__retired = self.__retired, []
+        for segment in retired:
+            try:
+                segment.close()
+
+            except BufferError:
+                # the values returned earlier still refer to the segment memory
+                self.__retired.append(segment)
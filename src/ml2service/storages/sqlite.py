@@ -0,0 +1,133 @@
+import sqlite3
+import typing as t
+from concurrent.futures import Future
+from pathlib import Path
+from threading import Lock, local
+
+from ml2service.serializers.base import Buffer
+from ml2service.storages.base import Storage
+
+K = t.TypeVar("K")
+
+_Operation = t.Tuple[str, t.Optional[Buffer]]
+
+
+class SQLiteStorage(t.Generic[K], Storage[K, Buffer]):
+    """
+    Keeps values in SQLite database in WAL mode, each thread uses its own connection.
+
+    Writes are committed in groups: while one thread commits its transaction, the writes of the other threads are
+    queued, then the next committer writes all of them in one transaction. Thus, concurrent writers share a single
+    fsync rather than wait for their own ones.
+    """
+
+    def __init__(
+            self,
+            path: Path,
+            table: str = "models",
+            synchronous: str = "FULL",
+            timeout: float = 30.0,
+    ) -> None:
+        if not table.isidentifier():
+            raise ValueError("invalid table name", table)
+
+        self.__path = path
+        self.__synchronous = synchronous
+        self.__timeout = timeout
+        self.__select_query = f"SELECT value FROM {table} WHERE key = ?"
+        self.__upsert_query = f"INSERT INTO {table} (key, value) VALUES (?, ?) " \
+                              f"ON CONFLICT (key) DO UPDATE SET value = excluded.value"
+        self.__delete_query = f"DELETE FROM {table} WHERE key = ?"
+
+        self.__local = local()
+        self.__connections_lock = Lock()
+        self.__connections: t.List[sqlite3.Connection] = []
+
+        self.__queue_lock = Lock()
+        self.__commit_lock = Lock()
+        self.__queue: t.List[t.Tuple[_Operation, Future[t.Optional[bytes]]]] = []
+
+        self.__get_connection().execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value BLOB NOT NULL)")
+
+    def get(self, key: K) -> t.Optional[Buffer]:
+        return self.__select(self.__get_connection(), str(key))
+
+    def update(self, key: K, value: Buffer) -> None:
+        self.__write((str(key), value))
+
+    def remove(self, key: K) -> t.Optional[Buffer]:
+        return self.__write((str(key), None))
+
+    def close(self) -> None:
+        with self.__connections_lock:
+            for connection in self.__connections:
+                connection.close()
+
+            self.__connections.clear()
+
+    def __get_connection(self) -> sqlite3.Connection:
+        connection = t.cast(t.Optional[sqlite3.Connection], getattr(self.__local, "connection", None))
+        if connection is None:
+            # connection is used only by this thread, but it may be closed from another one
+            connection = sqlite3.connect(self.__path, timeout=self.__timeout, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(f"PRAGMA synchronous={self.__synchronous}")
+            self.__local.connection = connection
+
+            with self.__connections_lock:
+                self.__connections.append(connection)
+
+        return connection
+
+    def __select(self, connection: sqlite3.Connection, key: str) -> t.Optional[bytes]:
+        row = t.cast(t.Optional[t.Tuple[bytes]], connection.execute(self.__select_query, (key,)).fetchone())
+        return row[0] if row is not None else None
+
+    def __write(self, operation: _Operation) -> t.Optional[bytes]:
+        future: Future[t.Optional[bytes]] = Future()
+
+        with self.__queue_lock:
+            self.__queue.append((operation, future))
+
+        with self.__commit_lock:
+            # the operation may have been committed by the previous committer
+            if not future.done():
+                with self.__queue_lock:
+                    batch, self.__queue = self.__queue, []
+
+                self.__commit(batch)
+
+        return future.result()
+
+    def __commit(self, batch: t.Sequence[t.Tuple[_Operation, Future[t.Optional[bytes]]]]) -> None:
+        connection = self.__get_connection()
+        results: t.List[t.Optional[bytes]] = []
+
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+
+            try:
+                for (key, value), _ in batch:
+                    if value is not None:
+                        connection.execute(self.__upsert_query, (key, value))
+                        results.append(None)
+
+                    else:
+                        results.append(self.__select(connection, key))
+                        connection.execute(self.__delete_query, (key,))
+
+                connection.execute("COMMIT")
+
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+        except Exception as err:
+            for _, future in batch:
+                future.set_exception(err)
+
+        else:
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
@@ -0,0 +1,43 @@
+import typing as t
+
+from ml2service.monitoring.tracing import Tracer
+from ml2service.storages.base import Storage
+
+K = t.TypeVar("K")
+V = t.TypeVar("V")
+
+
+class TracedStorage(t.Generic[K, V], Storage[K, V]):
+    """Opens `<name>.get`, `<name>.update` & `<name>.remove` spans around the inner storage operations."""
+
+    def __init__(self, inner: Storage[K, V], tracer: Tracer, name: str = "storage") -> None:
+        self.__inner = inner
+        self.__tracer = tracer
+        self.__get_name = f"{name}.get"
+        self.__update_name = f"{name}.update"
+        self.__remove_name = f"{name}.remove"
+
+    def get(self, key: K) -> t.Optional[V]:
+        with self.__tracer.span(self.__get_name, {"key": str(key)}) as span:
+            value = self.__inner.get(key)
+            span.set_attribute("found", value is not None)
+
+            return value
+
+    def get_versioned(self, key: K) -> t.Tuple[t.Optional[V], t.Optional[bytes]]:
+        with self.__tracer.span(self.__get_name, {"key": str(key)}) as span:
+            value, version = self.__inner.get_versioned(key)
+            span.set_attribute("found", value is not None)
+
+            return value, version
+
+    def update(self, key: K, value: V) -> None:
+        with self.__tracer.span(self.__update_name, {"key": str(key)}):
+            self.__inner.update(key, value)
+
+    def remove(self, key: K) -> t.Optional[V]:
+        with self.__tracer.span(self.__remove_name, {"key": str(key)}) as span:
+            value = self.__inner.remove(key)
+            span.set_attribute("found", value is not None)
+
+            return value
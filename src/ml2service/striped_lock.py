@@ -0,0 +1,34 @@
+import typing as t
+from threading import Lock
+
+K = t.TypeVar("K")
+
+
+class StripedLock(t.Generic[K]):
+    """
+    A fixed number of locks shared by the keys: each key maps to a stripe by its hash, so operations on the same key
+    are serialized, while the operations on the other keys mostly take the other locks and don't wait.
+
+    Each stripe has a generation, it is advanced on each write of its keys, so the readers may find out whether a key
+    was written since they started to read it.
+    """
+
+    def __init__(self, stripes: int = 64) -> None:
+        if stripes < 1:
+            raise ValueError("stripes must be positive", stripes)
+
+        self.__locks = tuple(Lock() for _ in range(stripes))
+        self.__generations = [0] * stripes
+
+    def get_stripe(self, key: K) -> int:
+        return hash(key) % len(self.__locks)
+
+    def get_lock(self, stripe: int) -> Lock:
+        return self.__locks[stripe]
+
+    def get_generation(self, stripe: int) -> int:
+        return self.__generations[stripe]
+
+    def advance(self, stripe: int) -> None:
+        """Advances the generation of the stripe, the caller must hold the lock of the stripe."""
+        self.__generations[stripe] += 1
@@ -7,8 +7,14 @@ import click
 import pytest
 from click.testing import CliRunner
 
+from ml2service.models.loader import ModuleInfo
+from ml2service.services.base import ModelService
 from ml2service.services.runners.base import ServiceRunner
 
+if t.TYPE_CHECKING:
+    # noinspection PyPackageRequirements
+    from fastapi.testclient import TestClient
+
 # 'INFO:     Uvicorn running on http://127.0.0.1:8000 (Press CTRL+C to quit)'
 UVICORN_SERVER_IS_RUNNING_PATTERN = re.compile(r"uvicorn running on (?P<base_url>[^ ]+)",
                                                flags=re.MULTILINE | re.IGNORECASE)
@@ -58,3 +64,29 @@ def cli_service_runner(cli_runner: CliRunner) -> t.Iterable[t.Callable[[t.Sequen
 
     if thread is not None:
         thread.join(3.0)
+
+
+@pytest.fixture()
+def fastapi_client_factory() -> t.Callable[..., "TestClient"]:
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from uvicorn import Config
+
+    from ml2service.services.runners.fastapi.factory import FastAPIServiceRunnerFactory
+
+    def create(service: ModelService, info: ModuleInfo[object, object, object], **options: t.Any) -> TestClient:
+        apps: t.List[FastAPI] = []
+
+        def make_config(app: FastAPI) -> Config:
+            apps.append(app)
+            return Config(app)
+
+        FastAPIServiceRunnerFactory(
+            info=info,
+            server_config_factory=make_config,
+            **options,
+        ).create_service_runner(service)
+
+        return TestClient(apps[0])
+
+    return create
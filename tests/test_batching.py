@@ -0,0 +1,128 @@
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+from time import monotonic, sleep
+
+import pytest
+
+from ml2service.models.base import Model
+from ml2service.services.base import PredictModelInternalErrorResponse, PredictRequest, PredictSuccessResponse
+from ml2service.services.batching import BatchingOptions, MicroBatcher
+from ml2service.services.static import StaticModelService
+
+
+class BatchRecordingModel(Model[int, int]):
+
+    def __init__(self) -> None:
+        self.batch_sizes: t.List[int] = []
+        self.gate = Event()
+
+    def predict(self, input_: int) -> int:
+        if input_ < 0:
+            raise ValueError("negative input", input_)
+
+        elif input_ == 0:
+            # keeps the request in flight, so the next requests wait for each other
+            self.gate.wait(5.0)
+
+        return input_ * 2
+
+    def predict_batch(self, inputs: t.Sequence[int]) -> t.Sequence[int]:
+        self.batch_sizes.append(len(inputs))
+        return [self.predict(input_) for input_ in inputs]
+
+
+def wait_for(condition: t.Callable[[], bool]) -> None:
+    deadline = monotonic() + 5.0
+    while not condition():
+        assert monotonic() < deadline
+        sleep(0.001)
+
+
+def test_micro_batcher_collects_concurrent_items() -> None:
+    batches: t.List[t.Sequence[int]] = []
+    gate = Event()
+
+    def handle(key: str, items: t.Sequence[int]) -> t.Sequence[int]:
+        batches.append(items)
+        if len(batches) == 1:
+            gate.wait(5.0)
+
+        return [item + 1 for item in items]
+
+    batcher: MicroBatcher[str, int, int] = MicroBatcher(handle, BatchingOptions(max_batch_size=4, max_wait_ms=200.0))
+
+    with ThreadPoolExecutor(9) as executor:
+        # the lone item isn't delayed, the items that come while it is in flight are batched
+        first = executor.submit(batcher.submit, "foo", 0)
+        wait_for(lambda: len(batches) == 1)
+        results = list(executor.map(lambda item: batcher.submit("foo", item), range(1, 9)))
+        gate.set()
+
+        assert first.result() == 1
+
+    assert results == list(range(2, 10))
+    assert sorted(len(batch) for batch in batches) == [1, 4, 4]
+
+
+def test_micro_batcher_does_not_delay_lone_item() -> None:
+    batcher: MicroBatcher[str, int, int] = MicroBatcher(lambda key, items: items,
+                                                        BatchingOptions(max_batch_size=4, max_wait_ms=1000.0))
+
+    for item in range(3):
+        start = monotonic()
+        assert batcher.submit("foo", item) == item
+        assert monotonic() - start < 0.5
+
+
+def test_micro_batcher_propagates_handler_error() -> None:
+    def handle(key: str, items: t.Sequence[int]) -> t.Sequence[int]:
+        raise RuntimeError("failed")
+
+    batcher: MicroBatcher[str, int, int] = MicroBatcher(handle, BatchingOptions(max_batch_size=1))
+
+    with pytest.raises(RuntimeError):
+        batcher.submit("foo", 1)
+
+
+def predict_concurrently(
+        service: StaticModelService[str, int, int],
+        model: BatchRecordingModel,
+        inputs: t.Sequence[int],
+) -> t.Sequence[object]:
+    with ThreadPoolExecutor(len(inputs) + 1) as executor:
+        executor.submit(service.predict, PredictRequest(key="", input_=0))
+        wait_for(lambda: len(model.batch_sizes) == 1)
+        responses = list(executor.map(lambda input_: service.predict(PredictRequest(key="", input_=input_)), inputs))
+        model.gate.set()
+
+    return responses
+
+
+def test_static_service_batches_predictions_and_isolates_errors() -> None:
+    model = BatchRecordingModel()
+    service: StaticModelService[str, int, int] = StaticModelService(
+        model, BatchingOptions(max_batch_size=3, max_wait_ms=200.0))
+
+    responses = predict_concurrently(service, model, [1, -1, 3])
+
+    assert model.batch_sizes == [1, 3]
+    assert responses[0] == PredictSuccessResponse(key="", output=2)
+    assert isinstance(responses[1], PredictModelInternalErrorResponse)
+    assert responses[2] == PredictSuccessResponse(key="", output=6)
+
+
+class TruncatingModel(BatchRecordingModel):
+
+    def predict_batch(self, inputs: t.Sequence[int]) -> t.Sequence[int]:
+        return super().predict_batch(inputs)[:-1]
+
+
+def test_static_service_turns_batch_size_mismatch_into_errors() -> None:
+    model = TruncatingModel()
+    service: StaticModelService[str, int, int] = StaticModelService(
+        model, BatchingOptions(max_batch_size=3, max_wait_ms=200.0))
+
+    responses = predict_concurrently(service, model, [1, 2, 3])
+
+    assert all(isinstance(response, PredictModelInternalErrorResponse) for response in responses)
@@ -0,0 +1,19 @@
+import io
+
+from benchmarks import macro, micro
+from benchmarks.runner import dump_results, load_results, run_benchmark
+
+
+def test_benchmarks_run() -> None:
+    results = [
+        run_benchmark(benchmark, warmup=1)
+        for benchmark in [*micro.create_benchmarks(10), *macro.create_benchmarks(10)]
+    ]
+
+    assert all(result.operations == 10 and result.p50_us <= result.p99_us for result in results)
+
+    stream = io.StringIO()
+    dump_results(results, stream)
+    stream.seek(0)
+
+    assert list(load_results(stream).values()) == results
@@ -1,7 +1,9 @@
 import typing as t
+from pathlib import Path
 
 import pytest
 import requests
+from click.testing import CliRunner
 
 
 @pytest.mark.parametrize(("args",), [
@@ -23,3 +25,19 @@ def test_http_docs_available(
 
     response = requests.get(f"{base_url}/docs")
     assert response.status_code == 200
+
+
+def test_http_workers_require_process_independent_service(cli_runner: CliRunner, tmp_path: Path) -> None:
+    from ml2service.cli import cli
+
+    # the concurrent updates of a key by the workers would be lost
+    result = cli_runner.invoke(cli, ["tests.test_services:SumModelTrainer", "run", "dynamic", "--storage-dir",
+                                     str(tmp_path), "http", "--workers", "2"])
+    assert result.exit_code == 2
+    assert "incremental updates" in result.output
+
+    # a scrape would get the metrics of the one worker that handled it
+    result = cli_runner.invoke(cli, ["examples.myproject.models:FooStaticModelTrainer", "run", "--metrics", "static",
+                                     "src/examples/myproject/data.json", "http", "--workers", "2"])
+    assert result.exit_code == 2
+    assert "without metrics" in result.output
@@ -0,0 +1,94 @@
+import logging
+import typing as t
+from time import sleep
+
+import pytest
+
+from examples.myproject.models import FooDynamicModelTrainer, FooModel
+from ml2service.executors.base import ModelExecutor
+from ml2service.executors.inline import InlineModelExecutor
+from ml2service.executors.process_pool import ProcessPoolModelExecutor
+from ml2service.executors.thread_pool import ThreadPoolModelExecutor
+from ml2service.models.base import Model
+from ml2service.services.base import PredictRequest, PredictSuccessResponse, TrainRequest, TrainSuccessResponse
+from ml2service.services.dynamic import DynamicModelService
+from ml2service.storages.in_memory import InMemoryStorage
+
+
+@pytest.fixture(params=[
+    pytest.param(InlineModelExecutor, id="inline"),
+    pytest.param(lambda: ThreadPoolModelExecutor(2), id="thread"),
+    pytest.param(lambda: ProcessPoolModelExecutor(2), id="process"),
+])
+def executor(request: pytest.FixtureRequest) -> t.Iterable[ModelExecutor]:
+    executor = t.cast(t.Callable[[], ModelExecutor], request.param)()
+    yield executor
+    executor.shutdown()
+
+
+def test_executor_runs_train_and_predict(executor: ModelExecutor) -> None:
+    storage: InMemoryStorage[str, Model[int, int]] = InMemoryStorage()
+    service = DynamicModelService(FooDynamicModelTrainer(), storage, executor=executor)
+
+    assert service.train(TrainRequest(key="foo", input_=3)) == TrainSuccessResponse(key="foo")
+    for _ in range(4):
+        assert service.predict(PredictRequest(key="foo", input_=2)) == PredictSuccessResponse(key="foo", output=12)
+
+
+def test_executor_propagates_model_error(executor: ModelExecutor) -> None:
+    with pytest.raises(TypeError):
+        executor.predict(FooModel(1), t.cast(int, "not a number")).result(5.0)
+
+
+class SleepingModel(Model[float, float]):
+
+    def predict(self, input_: float) -> float:
+        sleep(input_)
+        return input_
+
+
+class PickleCountingModel(Model[int, int]):
+    pickles = 0
+
+    def __reduce__(self) -> t.Tuple[t.Type["PickleCountingModel"], t.Tuple[()]]:
+        PickleCountingModel.pickles += 1
+        return PickleCountingModel, ()
+
+    def predict(self, input_: int) -> int:
+        return input_
+
+
+def test_process_pool_executor_cancels_calls(caplog: pytest.LogCaptureFixture) -> None:
+    executor = ProcessPoolModelExecutor(1)
+    model = SleepingModel()
+
+    try:
+        assert executor.predict(model, 0.0).result(5.0) == 0.0
+
+        running = executor.predict(model, 0.3)
+        pending = executor.predict(model, 0.0)
+        sleep(0.1)
+
+        assert running.cancel()
+        assert pending.cancel()
+        assert executor.predict(model, 0.0).result(5.0) == 0.0
+
+    finally:
+        executor.shutdown()
+
+    assert not [record for record in caplog.records if record.levelno >= logging.ERROR]
+
+
+def test_process_pool_executor_sends_model_once_per_cache_key() -> None:
+    executor = ProcessPoolModelExecutor(1)
+    PickleCountingModel.pickles = 0
+
+    try:
+        # the storage decodes a new model object on each get
+        for input_ in range(4):
+            assert executor.predict(PickleCountingModel(), input_, ("foo", b"v1")).result(5.0) == input_
+
+    finally:
+        executor.shutdown()
+
+    assert PickleCountingModel.pickles == 1
@@ -0,0 +1,394 @@
+import json
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from time import sleep
+
+import pytest
+
+from examples.myproject.models import FooModel
+from ml2service.models.base import IncrementalModelTrainer, Model, ModelTrainer, StreamingModel
+from ml2service.executors.inline import InlineModelExecutor
+from ml2service.executors.instrumented import InstrumentedModelExecutor
+from ml2service.executors.thread_pool import ThreadPoolModelExecutor
+from ml2service.executors.traced import TracedModelExecutor
+from ml2service.models.loader import EntrypointLoader, ModuleInfo
+from ml2service.monitoring.metrics import ServiceMetrics, make_prefix_key_classifier
+from ml2service.monitoring.tracing import InMemorySpanExporter, Tracer
+from ml2service.services.admission import AdmissionOptions
+from ml2service.services.dynamic import DynamicModelService
+from ml2service.services.static import StaticModelService
+from ml2service.storages.in_memory import InMemoryStorage
+from ml2service.storages.instrumented import InstrumentedStorage
+from ml2service.storages.memoize import MemoizeStorage
+from ml2service.storages.traced import TracedStorage
+
+if t.TYPE_CHECKING:
+    # noinspection PyPackageRequirements
+    from fastapi.testclient import TestClient
+
+ClientFactory = t.Callable[..., "TestClient"]
+
+DYNAMIC_INFO = EntrypointLoader().load("examples.myproject.models:FooDynamicModelTrainer", [])
+STATIC_INFO = EntrypointLoader().load("examples.myproject.models:FooStaticModelTrainer", [])
+
+
+def test_dynamic_train_predict_remove(fastapi_client_factory: ClientFactory) -> None:
+    storage: InMemoryStorage[object, Model[object, object]] = InMemoryStorage()
+    client = fastapi_client_factory(DynamicModelService(DYNAMIC_INFO.trainer, storage), DYNAMIC_INFO)
+
+    assert client.post("/foo/", json=2).status_code == 404
+    assert client.put("/foo/", json=3).status_code == 201
+    assert client.post("/foo/", json=2).json() == 12
+    assert client.delete("/foo/").status_code == 202
+    assert client.post("/foo/", json=2).status_code == 404
+
+
+def test_dynamic_predict_many(fastapi_client_factory: ClientFactory) -> None:
+    storage: InMemoryStorage[object, Model[object, object]] = InMemoryStorage()
+    client = fastapi_client_factory(DynamicModelService(DYNAMIC_INFO.trainer, storage), DYNAMIC_INFO)
+
+    assert client.post("/foo/batch", json=[1, 2]).status_code == 404
+    assert client.put("/foo/", json=3).status_code == 201
+
+    response = client.post("/foo/batch", json=[1, 2, 3])
+    assert response.status_code == 200
+    assert [item["output"] for item in response.json()] == [3, 12, 27]
+
+
+def test_static_predict_many(fastapi_client_factory: ClientFactory) -> None:
+    client = fastapi_client_factory(StaticModelService(FooModel(2)), STATIC_INFO)
+
+    response = client.post("/batch", json=[1, 2])
+    assert response.status_code == 200
+    assert response.json() == [{"output": 2, "error": None}, {"output": 8, "error": None}]
+
+
+def test_dynamic_train_job(fastapi_client_factory: ClientFactory) -> None:
+    storage: InMemoryStorage[object, Model[object, object]] = InMemoryStorage()
+    client = fastapi_client_factory(DynamicModelService(DYNAMIC_INFO.trainer, storage), DYNAMIC_INFO,
+                                    train_jobs_enabled=True)
+
+    response = client.put("/foo/", json=3)
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    for _ in range(100):
+        status = client.get(f"/foo/jobs/{job_id}").json()["status"]
+        if status == "succeeded":
+            break
+
+        sleep(0.01)
+
+    assert client.post("/foo/", json=2).json() == 12
+    assert client.delete(f"/foo/jobs/{job_id}").status_code == 409
+    assert client.get(f"/bar/jobs/{job_id}").status_code == 404
+    assert client.delete("/foo/jobs/unknown").status_code == 404
+
+    # the job routes are served only when the trainings are run by the jobs
+    client = fastapi_client_factory(DynamicModelService(DYNAMIC_INFO.trainer, storage), DYNAMIC_INFO)
+    assert not [path for path in client.get("/openapi.json").json()["paths"] if "/jobs/" in path]
+
+
+def test_dynamic_metrics(fastapi_client_factory: ClientFactory) -> None:
+    metrics = ServiceMetrics(key_classifier=make_prefix_key_classifier("-"))
+    storage: InMemoryStorage[object, Model[object, object]] = InMemoryStorage()
+    service = DynamicModelService(
+        trainer=DYNAMIC_INFO.trainer,
+        storage=InstrumentedStorage(storage, metrics),
+        executor=InstrumentedModelExecutor(InlineModelExecutor(), metrics),
+    )
+    client = fastapi_client_factory(service, DYNAMIC_INFO, metrics=metrics)
+
+    assert client.post("/foo-1/", json=2).status_code == 404
+    assert client.put("/foo-1/", json=3).status_code == 201
+    assert client.post("/foo-1/", json=2).json() == 12
+    assert client.put("/foo-1/", json="not a number").status_code == 422
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    lines = set(response.text.splitlines())
+
+    assert 'ml2service_requests_total{route="POST /{key}/",key_class="foo"} 2.0' in lines
+    assert 'ml2service_request_errors_total{route="POST /{key}/",key_class="foo",status="404"} 1.0' in lines
+    assert 'ml2service_request_errors_total{route="PUT /{key}/",key_class="foo",status="422"} 1.0' in lines
+    assert 'ml2service_requests_in_flight{route="PUT /{key}/",key_class="foo"} 0.0' in lines
+    for stage, count in [("decode", 3), ("encode", 3), ("storage_get", 2), ("storage_update", 1), ("train", 1),
+                         ("predict", 1)]:
+        assert f'ml2service_stage_duration_seconds_count{{stage="{stage}"}} {count}' in lines
+
+
+def test_dynamic_tracing(fastapi_client_factory: ClientFactory) -> None:
+    exporter = InMemorySpanExporter()
+    tracer = Tracer(exporter)
+    storage: InMemoryStorage[object, Model[object, object]] = InMemoryStorage()
+    service = DynamicModelService(
+        trainer=DYNAMIC_INFO.trainer,
+        storage=TracedStorage(MemoizeStorage(TracedStorage(storage, tracer, "in_memory")), tracer, "memoize"),
+        executor=TracedModelExecutor(InlineModelExecutor(), tracer),
+    )
+    client = fastapi_client_factory(service, DYNAMIC_INFO, tracer=tracer)
+
+    assert client.put("/foo/", json=3).status_code == 201
+    exporter.clear()
+
+    traceparent = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+    assert client.post("/foo/", json=2, headers={"traceparent": traceparent}).json() == 12
+
+    spans = {span.name: span for span in exporter.spans}
+    assert set(spans) == {"http POST /{key}/", "memoize.get", "in_memory.get", "model.predict"}
+
+    http_span = spans["http POST /{key}/"]
+    assert http_span.context.trace_id == "0af7651916cd43dd8448eb211c80319c"
+    assert http_span.parent_id == "b7ad6b7169203331"
+    assert http_span.attributes == {"http.route": "POST /{key}/", "key": "foo", "http.status_code": 200}
+
+    assert spans["memoize.get"].parent_id == http_span.context.span_id
+    assert spans["memoize.get"].attributes == {"key": "foo", "cache.hit": False, "found": True}
+    assert spans["in_memory.get"].parent_id == spans["memoize.get"].context.span_id
+    assert spans["model.predict"].parent_id == http_span.context.span_id
+
+
+class SlowFooModel(FooModel):
+
+    def predict(self, input_: int) -> int:
+        sleep(0.5)
+        return super().predict(input_)
+
+
+def test_dynamic_admission_sheds_predictions_over_limit(fastapi_client_factory: ClientFactory) -> None:
+    storage: InMemoryStorage[object, Model[object, object]] = InMemoryStorage()
+    storage.update("slow", t.cast(Model[object, object], SlowFooModel(1)))
+    client = fastapi_client_factory(
+        DynamicModelService(DYNAMIC_INFO.trainer, storage),
+        DYNAMIC_INFO,
+        admission=AdmissionOptions(max_in_flight=1, max_queued=1),
+        train_admission=AdmissionOptions(max_in_flight=1),
+    )
+
+    with ThreadPoolExecutor(3) as executor:
+        predictions = [executor.submit(client.post, "/slow/", json=2)]
+        sleep(0.1)
+        predictions.append(executor.submit(client.post, "/slow/", json=2))
+        sleep(0.1)
+
+        rejected = client.post("/slow/", json=2)
+        assert rejected.status_code == 503
+        assert rejected.headers["Retry-After"] == "1"
+
+        # trainings have their own limit, the busy predictions don't hold them back
+        assert client.put("/foo/", json=3).status_code == 201
+
+        assert [prediction.result().json() for prediction in predictions] == [4, 4]
+
+    assert client.post("/foo/", json=2).json() == 12
+
+
+def test_dynamic_admission_holds_streams_until_sent(fastapi_client_factory: ClientFactory) -> None:
+    storage: InMemoryStorage[object, Model[object, object]] = InMemoryStorage()
+    storage.update("slow", t.cast(Model[object, object], SlowFooModel(1)))
+    client = fastapi_client_factory(
+        DynamicModelService(DYNAMIC_INFO.trainer, storage),
+        DYNAMIC_INFO,
+        admission=AdmissionOptions(max_in_flight=1),
+    )
+
+    with ThreadPoolExecutor(1) as executor:
+        stream = executor.submit(client.post, "/slow/stream?chunk_size=1", data=b"1\n2\n")
+        sleep(0.2)
+
+        # the stream still predicts its inputs, so it keeps the only slot
+        assert client.post("/slow/", json=2).status_code == 503
+
+        assert [json.loads(line)["output"] for line in stream.result().iter_lines()] == [1, 4]
+
+    assert client.post("/slow/", json=2).json() == 4
+
+
+def test_dynamic_predict_deadline(fastapi_client_factory: ClientFactory) -> None:
+    storage: InMemoryStorage[object, Model[object, object]] = InMemoryStorage()
+    storage.update("slow", t.cast(Model[object, object], SlowFooModel(1)))
+    executor = ThreadPoolModelExecutor(1)
+    client = fastapi_client_factory(DynamicModelService(DYNAMIC_INFO.trainer, storage, executor=executor),
+                                    DYNAMIC_INFO, default_timeout=2.0)
+
+    try:
+        assert client.post("/slow/", json=2, headers={"X-Request-Timeout": "0.1"}).status_code == 504
+        assert client.post("/slow/batch?timeout=0.1", json=[2]).status_code == 504
+        assert client.post("/slow/", json=2).json() == 4
+        assert client.post("/slow/?timeout=-1", json=2).status_code == 422
+
+    finally:
+        executor.shutdown()
+
+
+class ScaleModel(Model[t.Any, t.Any]):
+
+    def __init__(self, k: float) -> None:
+        self.__k = k
+
+    def predict(self, input_: t.Any) -> t.Any:
+        return input_ * self.__k
+
+
+class ScaleModelTrainer(ModelTrainer[t.Any, t.Any, t.Any]):
+
+    def train(self, input_: t.Any) -> Model[t.Any, t.Any]:
+        return ScaleModel(float(input_.sum()))
+
+
+def test_dynamic_array_payloads(fastapi_client_factory: ClientFactory) -> None:
+    np = pytest.importorskip("numpy")
+    from ml2service.serializers.npy import decode_npy, encode_npy
+
+    info: ModuleInfo[object, object, object] = ModuleInfo(np.ndarray, np.ndarray, np.ndarray, ScaleModelTrainer())
+    storage: InMemoryStorage[object, Model[object, object]] = InMemoryStorage()
+    client = fastapi_client_factory(DynamicModelService(info.trainer, storage), info)
+    matrix = np.arange(6, dtype="<f4").reshape(2, 3)
+
+    assert client.put("/foo/", data=encode_npy(np.array([1.0, 1.0])),
+                      headers={"Content-Type": "application/x-npy"}).status_code == 201
+
+    response = client.post("/foo/", data=encode_npy(matrix), headers={"Content-Type": "application/x-npy"})
+    assert response.headers["Content-Type"] == "application/x-npy"
+    np.testing.assert_array_equal(decode_npy(response.content), matrix * 2)
+
+    response = client.post("/foo/", data=matrix.tobytes(), headers={
+        "Content-Type": "application/octet-stream",
+        "X-Array-Dtype": "<f4",
+        "X-Array-Shape": "2,3",
+    })
+    assert response.headers["X-Array-Shape"] == "2,3"
+    np.testing.assert_array_equal(np.frombuffer(response.content, dtype=response.headers["X-Array-Dtype"]),
+                                  matrix.reshape(-1) * 2)
+
+    # JSON bodies are still accepted, binary requests may ask for JSON response
+    assert client.post("/foo/", json=[[1, 2]]).json() == [[2, 4]]
+    assert client.post("/foo/", data=encode_npy(matrix), headers={
+        "Content-Type": "application/x-npy",
+        "Accept": "application/json",
+    }).json() == [[0, 2, 4], [6, 8, 10]]
+    assert [item["output"] for item in client.post("/foo/batch", data=encode_npy(matrix), headers={
+        "Content-Type": "application/x-npy",
+    }).json()] == [[0, 2, 4], [6, 8, 10]]
+
+    assert client.post("/foo/", data=b"garbage", headers={"Content-Type": "application/x-npy"}).status_code == 400
+    assert client.post("/foo/", data=b"1234", headers={"Content-Type": "application/octet-stream"}).status_code == 400
+    assert client.get("/openapi.json").status_code == 200
+
+
+def test_dynamic_fast_responses(fastapi_client_factory: ClientFactory) -> None:
+    storage: InMemoryStorage[object, Model[object, object]] = InMemoryStorage()
+    client = fastapi_client_factory(DynamicModelService(DYNAMIC_INFO.trainer, storage), DYNAMIC_INFO,
+                                    fast_responses=True)
+    validating_client = fastapi_client_factory(DynamicModelService(DYNAMIC_INFO.trainer, storage), DYNAMIC_INFO)
+
+    assert client.put("/foo/", json=3).status_code == 201
+    assert client.post("/foo/", json=2).json() == 12
+    assert client.post("/foo/batch", json=[1, 2]).json() == [{"output": 3, "error": None},
+                                                            {"output": 12, "error": None}]
+    assert client.post("/bar/", json=2).status_code == 404
+    assert client.get("/openapi.json").json() == validating_client.get("/openapi.json").json()
+
+
+class CumulativeSumModel(StreamingModel[int, int]):
+
+    def predict(self, input_: int) -> int:
+        return input_
+
+    def predict_stream(self, inputs: t.Iterable[int]) -> t.Iterator[int]:
+        total = 0
+        for input_ in inputs:
+            total += input_
+            yield total
+
+
+def test_dynamic_predict_stream(fastapi_client_factory: ClientFactory) -> None:
+    storage: InMemoryStorage[object, Model[object, object]] = InMemoryStorage()
+    storage.update("sum", t.cast(Model[object, object], CumulativeSumModel()))
+    client = fastapi_client_factory(DynamicModelService(DYNAMIC_INFO.trainer, storage), DYNAMIC_INFO)
+
+    def body() -> t.Iterator[bytes]:
+        # the lines are split between the chunks of the body
+        yield b"1\n2\n"
+        yield b"\n3"
+        yield b"\n4"
+
+    assert client.post("/foo/stream", data=body()).status_code == 404
+    assert client.put("/foo/", json=3).status_code == 201
+
+    response = client.post("/foo/stream?chunk_size=3", data=body())
+    assert response.headers["Content-Type"] == "application/x-ndjson"
+    assert [json.loads(line)["output"] for line in response.iter_lines()] == [3, 12, 27, 48]
+
+    response = client.post("/sum/stream", data=body())
+    assert [json.loads(line)["output"] for line in response.iter_lines()] == [1, 3, 6, 10]
+
+    # the inputs before the malformed line are predicted, the error line ends the stream
+    response = client.post("/foo/stream?chunk_size=64", data=b'1\n2\n"x"\n3\n')
+    lines = [json.loads(line) for line in response.iter_lines()]
+    assert [line["output"] for line in lines] == [3, 12, None]
+    assert lines[-1]["error"].startswith("invalid input")
+
+    # the streaming model predicts the inputs before the malformed line too, the line isn't the failure of the model
+    response = client.post("/sum/stream", data=b'1\n2\n"x"\n3\n')
+    lines = [json.loads(line) for line in response.iter_lines()]
+    assert [line["output"] for line in lines] == [1, 3, None]
+    assert lines[-1]["error"].startswith("invalid input")
+
+
+class SizeModelTrainer(ModelTrainer[Path, int, int]):
+
+    def __init__(self) -> None:
+        self.paths: t.List[Path] = []
+
+    def train(self, input_: Path) -> Model[int, int]:
+        self.paths.append(input_)
+        return FooModel(input_.stat().st_size)
+
+
+def test_dynamic_train_upload(fastapi_client_factory: ClientFactory, tmp_path: Path) -> None:
+    trainer = SizeModelTrainer()
+    info: ModuleInfo[object, object, object] = ModuleInfo(Path, int, int, t.cast(ModelTrainer[object, object, object],
+                                                                                 trainer))
+    storage: InMemoryStorage[object, Model[object, object]] = InMemoryStorage()
+    client = fastapi_client_factory(DynamicModelService(info.trainer, storage), info, upload_dir=tmp_path,
+                                    max_upload_size=1024)
+
+    def body() -> t.Iterator[bytes]:
+        yield b"x" * 100
+        yield b"y" * 200
+
+    assert client.put("/foo/upload", data=body()).status_code == 201
+    assert client.post("/foo/", json=1).json() == 300
+    assert client.put("/foo/upload", data=b"z" * 2048).status_code == 413
+
+    # the spooled files are removed after the training
+    assert [path.parent for path in trainer.paths] == [tmp_path]
+    assert list(tmp_path.iterdir()) == []
+
+
+class AddingModelTrainer(IncrementalModelTrainer[int, int, int]):
+
+    def train(self, input_: int) -> Model[int, int]:
+        return FooModel(input_)
+
+    def update(self, model: Model[int, int], input_: int) -> Model[int, int]:
+        return FooModel(model.predict(1) + input_)
+
+
+def test_dynamic_update(fastapi_client_factory: ClientFactory) -> None:
+    trainer = AddingModelTrainer()
+    info: ModuleInfo[object, object, object] = ModuleInfo(int, int, int, t.cast(ModelTrainer[object, object, object],
+                                                                               trainer))
+    storage: InMemoryStorage[object, Model[object, object]] = InMemoryStorage()
+    client = fastapi_client_factory(DynamicModelService(info.trainer, storage), info)
+
+    assert client.patch("/foo/", json=1).status_code == 404
+    assert client.put("/foo/", json=3).status_code == 201
+    assert client.patch("/foo/", json=2).status_code == 200
+    assert client.post("/foo/", json=2).json() == 20
+
+    # the route is there only for the incremental trainers
+    client = fastapi_client_factory(DynamicModelService(DYNAMIC_INFO.trainer, storage), DYNAMIC_INFO)
+    assert client.patch("/foo/", json=2).status_code == 405
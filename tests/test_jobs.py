@@ -0,0 +1,60 @@
+import typing as t
+from threading import Event
+
+from ml2service.services.base import TrainJobStatus
+from ml2service.services.jobs import TrainingJobOptions, TrainingJobQueue
+
+
+def wait_for_status(queue: TrainingJobQueue[str], job_id: str, status: TrainJobStatus) -> None:
+    for _ in range(1000):
+        response = queue.get("foo", job_id)
+        if response is not None and response.status is status:
+            return
+
+        Event().wait(0.001)
+
+    raise AssertionError("job status was not reached", job_id, status)
+
+
+def test_training_job_queue_cancels_pending_and_running_jobs() -> None:
+    queue: TrainingJobQueue[str] = TrainingJobQueue(TrainingJobOptions(max_workers=1, max_pending=1))
+    release = Event()
+    stored: t.List[str] = []
+
+    def make_runner(name: str) -> t.Callable[[t.Callable[[], bool]], t.Optional[Exception]]:
+        def run(is_cancelled: t.Callable[[], bool]) -> t.Optional[Exception]:
+            release.wait(5.0)
+            if not is_cancelled():
+                stored.append(name)
+
+            return None
+
+        return run
+
+    running = queue.submit("foo", make_runner("running"))
+    pending = queue.submit("foo", make_runner("pending"))
+    assert running is not None and pending is not None
+    assert queue.submit("foo", make_runner("rejected")) is None
+
+    wait_for_status(queue, running, TrainJobStatus.RUNNING)
+    assert queue.cancel("foo", pending) is TrainJobStatus.PENDING
+    assert queue.cancel("foo", running) is TrainJobStatus.RUNNING
+
+    release.set()
+    queue.shutdown()
+
+    wait_for_status(queue, running, TrainJobStatus.CANCELLED)
+    assert queue.cancel("foo", running) is TrainJobStatus.CANCELLED
+    assert queue.get("bar", running) is None
+    assert stored == []
+
+
+def test_training_job_queue_runs_jobs_after_shutdown() -> None:
+    queue: TrainingJobQueue[str] = TrainingJobQueue(TrainingJobOptions())
+    queue.shutdown()
+
+    job_id = queue.submit("foo", lambda is_cancelled: None)
+    assert job_id is not None
+    wait_for_status(queue, job_id, TrainJobStatus.SUCCEEDED)
+
+    queue.shutdown()
@@ -0,0 +1,45 @@
+import random
+
+from ml2service.monitoring.metrics import MetricsRegistry
+from ml2service.monitoring.tracing import InMemorySpanExporter, SpanContext, Tracer
+
+
+def test_histogram_render() -> None:
+    registry = MetricsRegistry()
+    histogram = registry.histogram("latency_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+
+    for value in (0.05, 0.5, 5.0):
+        histogram.labels("predict").observe(value)
+
+    assert registry.render().splitlines() == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{stage="predict",le="0.1"} 1',
+        'latency_seconds_bucket{stage="predict",le="1.0"} 2',
+        'latency_seconds_bucket{stage="predict",le="+Inf"} 3',
+        'latency_seconds_sum{stage="predict"} 5.55',
+        'latency_seconds_count{stage="predict"} 3',
+    ]
+
+
+def test_tracer_head_sampling() -> None:
+    exporter = InMemorySpanExporter()
+    tracer = Tracer(exporter, sample_ratio=0.5, rand=random.Random(42))
+
+    for _ in range(200):
+        with tracer.span("root"):
+            with tracer.span("child"):
+                pass
+
+    roots = [span for span in exporter.spans if span.name == "root"]
+    children = [span for span in exporter.spans if span.name == "child"]
+
+    assert 50 < len(roots) < 150
+    # children are sampled together with their roots
+    assert sorted(span.parent_id or "" for span in children) == sorted(span.context.span_id for span in roots)
+
+    exporter.clear()
+    with tracer.span("remote child", parent=SpanContext("0" * 32, "1" * 16, sampled=False)):
+        pass
+
+    assert exporter.spans == []
@@ -0,0 +1,76 @@
+import os
+import signal
+import socket
+import typing as t
+from threading import Thread
+from time import monotonic, sleep
+
+import pytest
+import requests
+
+from examples.myproject.models import FooModel
+from ml2service.models.loader import EntrypointLoader
+from ml2service.services.static import StaticModelService
+
+if t.TYPE_CHECKING:
+    # noinspection PyPackageRequirements
+    from fastapi import FastAPI
+    # noinspection PyPackageRequirements
+    from uvicorn import Config
+
+
+def wait_for(condition: t.Callable[[], bool], timeout: float = 10.0) -> None:
+    deadline = monotonic() + timeout
+    while not condition():
+        assert monotonic() < deadline, "condition wasn't met in time"
+        sleep(0.1)
+
+
+def is_available(url: str) -> bool:
+    try:
+        return requests.post(url, json=2, timeout=1.0).json() == 8
+
+    except requests.ConnectionError:
+        return False
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork is not supported")
+def test_prefork_workers_are_restarted() -> None:
+    from uvicorn import Config
+
+    from ml2service.services.runners.fastapi.factory import FastAPIServiceRunnerFactory
+    from ml2service.services.runners.fastapi.prefork import PreforkUvicornServiceRunner
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = t.cast(t.Tuple[str, int], sock.getsockname())[1]
+
+    def make_config(app: "FastAPI") -> "Config":
+        return Config(app, port=port)
+
+    runner = FastAPIServiceRunnerFactory(
+        info=EntrypointLoader().load("examples.myproject.models:FooStaticModelTrainer", []),
+        server_config_factory=make_config,
+        workers=2,
+    ).create_service_runner(StaticModelService(FooModel(2)))
+    assert isinstance(runner, PreforkUvicornServiceRunner)
+
+    url = f"http://127.0.0.1:{port}/"
+    thread = Thread(target=runner.start)
+    thread.start()
+
+    try:
+        wait_for(lambda: len(runner.pids) == 2 and is_available(url))
+
+        killed = next(iter(runner.pids))
+        os.kill(killed, signal.SIGKILL)
+
+        wait_for(lambda: len(runner.pids) == 2 and killed not in runner.pids)
+        assert is_available(url)
+
+    finally:
+        runner.stop()
+        thread.join(15.0)
+
+    assert not thread.is_alive()
+    assert not runner.pids
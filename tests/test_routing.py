@@ -0,0 +1,194 @@
+import json
+import socket
+import typing as t
+from threading import Thread
+from time import monotonic, sleep
+
+import pytest
+import requests
+
+from ml2service.models.base import Model
+from ml2service.models.loader import EntrypointLoader
+from ml2service.services.base import (
+    PredictModelInternalErrorResponse,
+    PredictRequest,
+    PredictSuccessResponse,
+    RemoveInternalErrorResponse,
+    RemoveRequest,
+    UpdateInternalErrorResponse,
+    UpdateRequest,
+)
+from ml2service.services.dynamic import DynamicModelService
+from ml2service.services.remote import FORWARDED_HEADER, RemoteModelService
+from ml2service.services.routing import RoutingModelService
+from ml2service.services.runners.base import ServiceRunner
+from ml2service.storages.in_memory import InMemoryStorage
+
+if t.TYPE_CHECKING:
+    # noinspection PyPackageRequirements
+    from fastapi import FastAPI
+    # noinspection PyPackageRequirements
+    from uvicorn import Config
+
+DYNAMIC_INFO = EntrypointLoader().load("examples.myproject.models:FooDynamicModelTrainer", [])
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return t.cast(t.Tuple[str, int], sock.getsockname())[1]
+
+
+def wait_for_server(url: str, timeout: float = 10.0) -> None:
+    deadline = monotonic() + timeout
+    while True:
+        try:
+            requests.get(url, timeout=1.0)
+            return
+
+        except requests.ConnectionError:
+            assert monotonic() < deadline, "server didn't start in time"
+            sleep(0.1)
+
+
+def test_routing_service_keeps_each_model_on_its_owner_node() -> None:
+    from uvicorn import Config
+
+    from ml2service.services.runners.fastapi.factory import FastAPIServiceRunnerFactory
+
+    ports = {"a": get_free_port(), "b": get_free_port()}
+    urls = {node: f"http://127.0.0.1:{port}" for node, port in ports.items()}
+    storages: t.Dict[str, InMemoryStorage[str, Model[object, object]]] = {node: InMemoryStorage() for node in ports}
+    services: t.Dict[str, RoutingModelService[object, object, object]] = {}
+    runners: t.List[ServiceRunner] = []
+    threads: t.List[Thread] = []
+
+    for node, port in ports.items():
+        def make_config(app: "FastAPI", port: int = port) -> "Config":
+            return Config(app, port=port)
+
+        services[node] = RoutingModelService(
+            node=node,
+            local=DynamicModelService(DYNAMIC_INFO.trainer, storages[node]),
+            peers={peer: RemoteModelService(url, int, "secret") for peer, url in urls.items() if peer != node},
+            secret="secret",
+        )
+        runner = FastAPIServiceRunnerFactory(
+            info=DYNAMIC_INFO,
+            server_config_factory=make_config,
+        ).create_service_runner(services[node])
+        runners.append(runner)
+        threads.append(Thread(target=runner.start))
+        threads[-1].start()
+
+    try:
+        for url in urls.values():
+            wait_for_server(f"{url}/docs")
+
+        keys = [f"key-{i}" for i in range(20)]
+        for key in keys:
+            assert requests.put(f"{urls['a']}/{key}/", json=3).status_code == 201
+
+        for key in keys:
+            owner = services["a"].get_owner(key)
+            assert services["b"].get_owner(key) == owner
+            assert storages[owner].get(key) is not None
+            assert storages["b" if owner == "a" else "a"].get(key) is None
+
+            assert requests.post(f"{urls['b']}/{key}/", json=2).json() == 12
+            # the clients can't mark their requests as forwarded ones without the secret
+            assert requests.post(f"{urls['b']}/{key}/", json=2, headers={FORWARDED_HEADER: "1"}).json() == 12
+            assert [item["output"] for item in requests.post(f"{urls['b']}/{key}/batch", json=[1, 2]).json()] == [3, 12]
+
+            lines = requests.post(f"{urls['b']}/{key}/stream", params={"chunk_size": 2},
+                                  data=b"1\n2\n\"x\"\n").text.splitlines()
+            assert [json.loads(line)["output"] for line in lines[:2]] == [3, 12]
+            assert json.loads(lines[2])["error"].startswith("invalid input")
+
+        assert requests.delete(f"{urls['b']}/{keys[0]}/").status_code == 202
+        assert requests.post(f"{urls['a']}/{keys[0]}/", json=2).status_code == 404
+        assert all(storage.get(keys[0]) is None for storage in storages.values())
+
+    finally:
+        for runner in runners:
+            runner.stop()
+
+        for thread in threads:
+            thread.join(5.0)
+
+
+def test_remote_service_turns_unreachable_peer_into_error_responses() -> None:
+    service: RemoteModelService[object, object, int] = RemoteModelService(
+        f"http://127.0.0.1:{get_free_port()}", int, "secret")
+
+    assert isinstance(service.remove(RemoveRequest(key="foo")), RemoveInternalErrorResponse)
+    assert isinstance(service.predict(PredictRequest(key="foo", input_=1)), PredictModelInternalErrorResponse)
+
+
+class DroppingPeer:
+    """Answers the first request of each connection, then reads the next one & closes the connection without answer."""
+
+    def __init__(self) -> None:
+        self.methods: t.List[str] = []
+        self.bodies: t.List[bytes] = []
+        self.__server = socket.create_server(("127.0.0.1", 0))
+        self.url = f"http://127.0.0.1:{t.cast(t.Tuple[str, int], self.__server.getsockname())[1]}"
+        Thread(target=self.__serve, daemon=True).start()
+
+    def close(self) -> None:
+        self.__server.close()
+
+    def __serve(self) -> None:
+        while True:
+            try:
+                conn, _ = self.__server.accept()
+
+            except OSError:
+                return
+
+            with conn, conn.makefile("rb") as reader:
+                for answer in (True, False):
+                    head = [line for line in iter(reader.readline, b"\r\n")]
+                    if not head:
+                        break
+
+                    self.methods.append(head[0].split()[0].decode())
+                    length = [int(line.split(b":")[1]) for line in head if line.lower().startswith(b"content-length")]
+                    self.bodies.append(reader.read(length[0] if length else 0))
+
+                    if answer:
+                        conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 1\r\n\r\n4")
+
+
+def test_remote_service_repeats_only_idempotent_requests_on_dropped_connection() -> None:
+    peer = DroppingPeer()
+    service: RemoteModelService[object, object, int] = RemoteModelService(peer.url, int, "secret")
+
+    try:
+        assert service.predict(PredictRequest(key="foo", input_=2)) == PredictSuccessResponse(key="foo", output=4)
+
+        # the peer may have applied the dropped update, so it isn't sent again
+        assert isinstance(service.update(UpdateRequest(key="foo", input_=3)), UpdateInternalErrorResponse)
+        assert peer.methods == ["POST", "PATCH"]
+
+        assert service.predict(PredictRequest(key="foo", input_=2)) == PredictSuccessResponse(key="foo", output=4)
+        assert service.predict(PredictRequest(key="foo", input_=2)) == PredictSuccessResponse(key="foo", output=4)
+        assert peer.methods == ["POST", "PATCH", "POST", "POST", "POST"]
+
+    finally:
+        peer.close()
+
+
+def test_remote_service_sends_numpy_arrays_as_lists() -> None:
+    np = pytest.importorskip("numpy")
+
+    peer = DroppingPeer()
+    service: RemoteModelService[object, object, int] = RemoteModelService(peer.url, int, "secret")
+
+    try:
+        assert service.predict(PredictRequest(key="foo", input_=np.array([1, 2]))) == PredictSuccessResponse(
+            key="foo", output=4)
+        assert peer.bodies == [b"[1, 2]"]
+
+    finally:
+        peer.close()
@@ -0,0 +1,71 @@
+import io
+import pickle
+import typing as t
+
+import pytest
+
+from ml2service.serializers.pickle import Compression, PickleSerializer
+
+
+@pytest.mark.parametrize(("compression",), [
+    pytest.param(Compression.NONE, id="none"),
+    pytest.param(Compression.ZLIB, id="zlib"),
+    pytest.param(Compression.LZMA, id="lzma"),
+])
+def test_pickle_serializer_round_trip(compression: Compression) -> None:
+    serializer: PickleSerializer[t.Dict[str, object]] = PickleSerializer(compression, compression_threshold=1024)
+    obj: t.Dict[str, object] = {"small": [1, 2, 3], "first": bytearray(b"x" * 10_000), "second": bytearray(b"y" * 3)}
+
+    data = serializer.encode(obj)
+
+    assert serializer.decode(data) == obj
+    assert (len(data) < 10_000) is (compression is not Compression.NONE)
+
+
+def test_pickle_serializer_decodes_out_of_band_buffers_without_copy() -> None:
+    serializer: PickleSerializer[pickle.PickleBuffer] = PickleSerializer()
+
+    data = serializer.encode(pickle.PickleBuffer(b"z" * 1024))
+    decoded = serializer.decode(data)
+
+    view = memoryview(decoded)
+    assert view.obj is data
+    assert view.tobytes() == b"z" * 1024
+
+
+@pytest.mark.parametrize(("shape", "order"), [
+    pytest.param((), "C", id="scalar"),
+    pytest.param((0, 3), "C", id="empty"),
+    pytest.param((2, 3), "C", id="c-order"),
+    pytest.param((2, 3), "F", id="fortran-order"),
+])
+def test_npy_round_trip(shape: t.Tuple[int, ...], order: str) -> None:
+    np = pytest.importorskip("numpy")
+    from ml2service.serializers.npy import NpySerializer
+
+    array = np.arange(int(np.prod(shape)), dtype="<f8").reshape(shape, order=order)
+    serializer = NpySerializer()
+
+    stream = io.BytesIO()
+    np.save(stream, array)
+
+    np.testing.assert_array_equal(serializer.decode(stream.getvalue()), array)
+    np.testing.assert_array_equal(np.load(io.BytesIO(serializer.encode(array))), array)
+
+
+def test_npy_decodes_without_copy() -> None:
+    np = pytest.importorskip("numpy")
+    from ml2service.serializers.npy import decode_npy, decode_raw, encode_npy
+
+    array = np.arange(12, dtype="<i4")
+    data = encode_npy(array)
+
+    decoded = decode_npy(data)
+    assert np.shares_memory(decoded, np.frombuffer(data, dtype=np.uint8))
+    assert not decoded.flags.writeable
+
+    raw = array.tobytes()
+    assert np.shares_memory(decode_raw(raw, "<i4", (3, 4)), np.frombuffer(raw, dtype=np.uint8))
+
+    with pytest.raises(ValueError):
+        decode_raw(raw, "<i4", (5, 5))
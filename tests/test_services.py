@@ -0,0 +1,327 @@
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic, sleep
+
+from examples.myproject.models import FooModel
+from ml2service.executors.thread_pool import ThreadPoolModelExecutor
+from ml2service.models.base import IncrementalModelTrainer, Model, ModelTrainer
+from ml2service.services.admission import AdmissionLimiter, AdmissionOptions
+from ml2service.services.base import (
+    PredictDeadlineExceededErrorResponse,
+    PredictManyRequest,
+    PredictManySuccessResponse,
+    PredictRequest,
+    PredictStreamRequest,
+    PredictStreamSuccessResponse,
+    PredictSuccessResponse,
+    RemoveRequest,
+    TrainDeadlineExceededErrorResponse,
+    TrainRequest,
+    TrainSuccessResponse,
+    UpdateInternalErrorResponse,
+    UpdateModelNotFoundErrorResponse,
+    UpdateRequest,
+    UpdateSuccessResponse,
+)
+from ml2service.services.batching import BatchingOptions
+from ml2service.services.dynamic import DynamicModelService
+from ml2service.services.prediction_cache import PredictionCacheOptions, hash_input
+from ml2service.services.static import StaticModelService
+from ml2service.storages.in_memory import InMemoryStorage
+from ml2service.storages.lru_cache import LRUCacheStorage
+from ml2service.storages.memoize import MemoizeStorage
+
+
+class CountingModel(Model[t.Dict[str, int], int]):
+
+    def __init__(self, k: int, calls: t.List[int]) -> None:
+        self.__k = k
+        self.__calls = calls
+
+    def predict(self, input_: t.Dict[str, int]) -> int:
+        self.__calls.append(self.__k)
+        return self.__k * sum(input_.values())
+
+
+class CountingModelTrainer(ModelTrainer[int, t.Dict[str, int], int]):
+
+    def __init__(self) -> None:
+        self.calls: t.List[int] = []
+        self.predictions: t.List[int] = []
+
+    def train(self, input_: int) -> Model[t.Dict[str, int], int]:
+        self.calls.append(input_)
+        sleep(0.1)
+        return CountingModel(input_, self.predictions)
+
+
+def test_hash_input_is_canonical() -> None:
+    assert hash_input({"a": 1, "b": [1, 2]}) == hash_input({"b": [1, 2], "a": 1})
+    assert hash_input({"a": 1}) != hash_input({"a": 2})
+    assert hash_input(object()) is None
+
+
+def test_dynamic_service_caches_predictions_until_retrain() -> None:
+    trainer = CountingModelTrainer()
+    storage: InMemoryStorage[str, Model[t.Dict[str, int], int]] = InMemoryStorage()
+    service = DynamicModelService(trainer, storage, prediction_cache=PredictionCacheOptions(max_entries=8))
+
+    service.train(TrainRequest(key="foo", input_=2))
+    for _ in range(3):
+        assert service.predict(PredictRequest(key="foo", input_={"x": 1, "y": 2})) == PredictSuccessResponse(
+            key="foo", output=6)
+
+    service.train(TrainRequest(key="foo", input_=3))
+    assert service.predict(PredictRequest(key="foo", input_={"y": 2, "x": 1})) == PredictSuccessResponse(
+        key="foo", output=9)
+    assert trainer.predictions == [2, 3]
+
+    service.remove(RemoveRequest(key="foo"))
+    assert not isinstance(service.predict(PredictRequest(key="foo", input_={"x": 1, "y": 2})), PredictSuccessResponse)
+
+
+def test_dynamic_service_coalesces_concurrent_trains() -> None:
+    trainer = CountingModelTrainer()
+    storage: InMemoryStorage[str, Model[t.Dict[str, int], int]] = InMemoryStorage()
+    service = DynamicModelService(trainer, storage)
+
+    with ThreadPoolExecutor(4) as executor:
+        list(executor.map(service.train, [TrainRequest(key="foo", input_=2)] * 4))
+
+    assert trainer.calls == [2]
+    assert service.predict(PredictRequest(key="foo", input_={"x": 1})) == PredictSuccessResponse(key="foo", output=2)
+
+
+class UnversionedStorage(InMemoryStorage[str, Model[t.Dict[str, int], int]]):
+
+    def get_versioned(self, key: str) -> t.Tuple[t.Optional[Model[t.Dict[str, int], int]], t.Optional[bytes]]:
+        raise AssertionError("the version is used by the process pool only")
+
+
+def test_dynamic_service_skips_model_versions_for_inline_executor() -> None:
+    service = DynamicModelService(CountingModelTrainer(), UnversionedStorage())
+    service.train(TrainRequest(key="foo", input_=2))
+
+    assert service.predict(PredictRequest(key="foo", input_={"x": 1})) == PredictSuccessResponse(key="foo", output=2)
+    assert service.predict_many(PredictManyRequest(key="foo", inputs=[{"x": 1}])) == PredictManySuccessResponse(
+        key="foo", results=[PredictSuccessResponse(key="foo", output=2)])
+
+
+class LaggingStorage(InMemoryStorage[str, Model[t.Dict[str, int], int]]):
+
+    def get(self, key: str) -> t.Optional[Model[t.Dict[str, int], int]]:
+        value = super().get(key)
+        sleep(0.001)
+        return value
+
+
+def test_dynamic_service_concurrent_train_and_predict_of_single_key() -> None:
+    trainer = CountingModelTrainer()
+    storage = LRUCacheStorage(MemoizeStorage(LaggingStorage()), max_entries=10)
+    service = DynamicModelService(trainer, storage)
+    service.train(TrainRequest(key="foo", input_=0))
+    versions = range(1, 21)
+
+    def predict_while_training() -> t.Set[int]:
+        outputs: t.Set[int] = set()
+        while len(trainer.calls) < len(versions) + 1:
+            response = service.predict(PredictRequest(key="foo", input_={"x": 1}))
+            assert isinstance(response, PredictSuccessResponse)
+            outputs.add(response.output)
+
+        return outputs
+
+    with ThreadPoolExecutor(6) as executor:
+        predictions = [executor.submit(predict_while_training) for _ in range(6)]
+
+        for k in versions:
+            assert service.train(TrainRequest(key="foo", input_=k)) == TrainSuccessResponse(key="foo")
+            # a retrained model must be visible right after the train, stale models must not be cached again
+            for _ in range(3):
+                assert service.predict(PredictRequest(key="foo", input_={"x": 1})) == PredictSuccessResponse(
+                    key="foo", output=k)
+
+        outputs = set().union(*(prediction.result() for prediction in predictions))
+
+    assert outputs <= {0, *versions}
+
+
+def test_admission_limiter_caps_in_flight_and_queue() -> None:
+    limiter: AdmissionLimiter[str] = AdmissionLimiter(AdmissionOptions(max_in_flight=2, max_in_flight_per_key=1,
+                                                                       max_queued=2))
+
+    first = limiter.acquire("a")
+    assert first is not None and first.done()
+
+    # the queued request of the key at its cap doesn't hold back the other keys
+    second = limiter.acquire("a")
+    assert second is not None and not second.done()
+    other = limiter.acquire("b")
+    assert other is not None and other.done()
+
+    third = limiter.acquire("c")
+    assert third is not None and not third.done()
+    assert limiter.acquire("d") is None
+
+    limiter.release("b")
+    assert third.done() and not second.done()
+
+    limiter.abandon("a", second)
+    assert limiter.queued == 0
+
+    limiter.release("a")
+    limiter.release("c")
+    assert limiter.in_flight == 0
+
+
+class SlowModel(Model[t.Dict[str, int], int]):
+
+    def predict(self, input_: t.Dict[str, int]) -> int:
+        sleep(0.5)
+        return sum(input_.values())
+
+
+class SlowModelTrainer(ModelTrainer[int, t.Dict[str, int], int]):
+
+    def train(self, input_: int) -> Model[t.Dict[str, int], int]:
+        sleep(0.5)
+        return SlowModel()
+
+
+def test_dynamic_service_stops_waiting_at_deadline() -> None:
+    storage: InMemoryStorage[str, Model[t.Dict[str, int], int]] = InMemoryStorage()
+    executor = ThreadPoolModelExecutor(1)
+    service = DynamicModelService(SlowModelTrainer(), storage, executor=executor)
+
+    try:
+        assert service.train(TrainRequest(key="foo", input_=1, deadline=monotonic() + 0.1)) == \
+               TrainDeadlineExceededErrorResponse(key="foo")
+        assert storage.get("foo") is None
+
+        assert service.train(TrainRequest(key="foo", input_=1)) == TrainSuccessResponse(key="foo")
+
+        start = monotonic()
+        assert service.predict(PredictRequest(key="foo", input_={"x": 1}, deadline=start + 0.1)) == \
+               PredictDeadlineExceededErrorResponse(key="foo")
+        assert service.predict(PredictRequest(key="foo", input_={"x": 1}, deadline=start)) == \
+               PredictDeadlineExceededErrorResponse(key="foo")
+        assert service.predict_many(PredictManyRequest(key="foo", inputs=[{"x": 1}], deadline=start + 0.1)) == \
+               PredictDeadlineExceededErrorResponse(key="foo")
+        assert monotonic() - start < 0.5
+
+        assert service.predict(PredictRequest(key="foo", input_={"x": 1}, deadline=monotonic() + 5.0)) == \
+               PredictSuccessResponse(key="foo", output=1)
+
+    finally:
+        executor.shutdown()
+
+
+def test_inline_services_stop_waiting_at_deadline() -> None:
+    storage: InMemoryStorage[str, Model[t.Dict[str, int], int]] = InMemoryStorage()
+    storage.update("foo", SlowModel())
+    services = [
+        DynamicModelService(SlowModelTrainer(), storage),
+        StaticModelService(SlowModel()),
+        StaticModelService(SlowModel(), batching=BatchingOptions(max_wait_ms=1.0)),
+    ]
+
+    try:
+        for service in services:
+            start = monotonic()
+            assert service.predict(PredictRequest(key="foo", input_={"x": 1}, deadline=start + 0.1)) == \
+                   PredictDeadlineExceededErrorResponse(key="foo")
+            assert monotonic() - start < 0.3
+
+            assert service.predict(PredictRequest(key="foo", input_={"x": 1})) == \
+                   PredictSuccessResponse(key="foo", output=1)
+
+    finally:
+        for service in services:
+            service.close()
+
+
+def test_static_service_predicts_stream_lazily_by_chunks() -> None:
+    read: t.List[int] = []
+
+    def inputs() -> t.Iterator[int]:
+        for i in range(10):
+            read.append(i)
+            yield i
+
+    service: StaticModelService[str, int, int] = StaticModelService(FooModel(1))
+    response = service.predict_stream(PredictStreamRequest(key="", inputs=inputs(), chunk_size=4))
+    assert isinstance(response, PredictStreamSuccessResponse)
+
+    assert read == []
+    assert next(response.results) == PredictSuccessResponse(key="", output=0)
+    assert read == [0, 1, 2, 3]
+
+    outputs = [result.output for result in response.results if isinstance(result, PredictSuccessResponse)]
+    assert outputs == [i ** 2 for i in range(1, 10)]
+
+
+class SumModel(Model[int, int]):
+
+    def __init__(self, total: int) -> None:
+        self.total = total
+
+    def predict(self, input_: int) -> int:
+        return self.total + input_
+
+
+class SumModelTrainer(IncrementalModelTrainer[int, int, int]):
+
+    def train(self, input_: int) -> Model[int, int]:
+        return SumModel(input_)
+
+    def update(self, model: Model[int, int], input_: int) -> Model[int, int]:
+        assert isinstance(model, SumModel)
+        total = model.total
+        # let the concurrent updates of the key read the same model, if they can
+        sleep(0.001)
+        return SumModel(total + input_)
+
+
+def test_dynamic_service_applies_concurrent_updates_of_key_atomically() -> None:
+    storage: InMemoryStorage[str, Model[int, int]] = InMemoryStorage()
+    service = DynamicModelService(SumModelTrainer(), storage, executor=ThreadPoolModelExecutor(4))
+
+    assert isinstance(service.update(UpdateRequest(key="foo", input_=1)), UpdateModelNotFoundErrorResponse)
+    assert isinstance(service.train(TrainRequest(key="foo", input_=10)), TrainSuccessResponse)
+
+    with ThreadPoolExecutor(8) as executor:
+        responses = list(executor.map(lambda i: service.update(UpdateRequest(key="foo", input_=i)), range(1, 33)))
+
+    assert all(isinstance(response, UpdateSuccessResponse) for response in responses)
+    assert service.predict(PredictRequest(key="foo", input_=0)) == PredictSuccessResponse(key="foo",
+                                                                                         output=10 + 32 * 33 // 2)
+
+    not_incremental_storage: InMemoryStorage[str, Model[t.Dict[str, int], int]] = InMemoryStorage()
+    not_incremental = DynamicModelService(CountingModelTrainer(), not_incremental_storage)
+    assert isinstance(not_incremental.update(UpdateRequest(key="foo", input_=1)), UpdateInternalErrorResponse)
+
+
+class SlowSumModelTrainer(SumModelTrainer):
+
+    def update(self, model: Model[int, int], input_: int) -> Model[int, int]:
+        sleep(0.5)
+        return super().update(model, input_)
+
+
+def test_dynamic_service_writes_other_keys_during_update() -> None:
+    storage: InMemoryStorage[int, Model[int, int]] = InMemoryStorage()
+    service = DynamicModelService(SlowSumModelTrainer(), storage)
+    service.train(TrainRequest(key=1, input_=10))
+
+    with ThreadPoolExecutor(1) as executor:
+        update = executor.submit(service.update, UpdateRequest(key=1, input_=1))
+        sleep(0.1)
+
+        # the keys would share a lock of 64 stripes, the write of the other key must not wait for the update
+        start = monotonic()
+        assert service.train(TrainRequest(key=65, input_=1)) == TrainSuccessResponse(key=65)
+        assert monotonic() - start < 0.2
+
+        assert update.result() == UpdateSuccessResponse(key=1)
+
+    assert service.predict(PredictRequest(key=1, input_=0)) == PredictSuccessResponse(key=1, output=11)
@@ -0,0 +1,33 @@
+import typing as t
+from pathlib import Path
+
+from examples.myproject.models import FooModel
+from ml2service.models.base import Model
+from ml2service.models.loader import EntrypointLoader
+from ml2service.models.snapshot import ModelSnapshot, ModelSnapshotCache
+from ml2service.serializers.pickle import PickleSerializer
+from ml2service.storages.file import FileStorage
+from ml2service.storages.serialized import SerializedStorage
+
+
+def test_snapshot_reused_until_input_changes(tmp_path: Path) -> None:
+    info = EntrypointLoader().load("examples.myproject.models:FooStaticModelTrainer", [])
+    input_ = tmp_path / "data.json"
+    input_.write_text("3")
+
+    storage: SerializedStorage[str, ModelSnapshot] = SerializedStorage(FileStorage(tmp_path / "snapshots"),
+                                                                       PickleSerializer())
+    snapshots = ModelSnapshotCache(storage)
+
+    model = snapshots.load_or_train(info, input_)
+    assert model.predict(2) == 12
+
+    # the snapshot is loaded rather than trained again
+    storage.update(input_.name, ModelSnapshot(snapshots.get_digest(info, input_), t.cast(Model[object, object],
+                                                                                        FooModel(5))))
+    assert snapshots.load_or_train(info, input_).predict(2) == 20
+
+    input_.write_text("4")
+    assert snapshots.load_or_train(info, input_).predict(2) == 16
+    # the snapshot of the changed input replaces the old one
+    assert len(list((tmp_path / "snapshots").iterdir())) == 1
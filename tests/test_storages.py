@@ -0,0 +1,291 @@
+import mmap
+import os
+import tempfile
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from time import sleep
+
+import pytest
+
+from examples.myproject.models import FooDynamicModelTrainer
+from ml2service.serializers.pickle import PickleSerializer
+from ml2service.services.base import TrainInternalErrorResponse, TrainRequest
+from ml2service.services.dynamic import DynamicModelService
+from ml2service.storages.base import Storage
+from ml2service.storages.file import FileStorage
+from ml2service.storages.in_memory import InMemoryStorage
+from ml2service.storages.lru_cache import CacheStats, LRUCacheStorage, estimate_deep_size
+from ml2service.storages.memoize import MemoizeStorage
+from ml2service.storages.serialized import SerializedStorage
+from ml2service.storages.sqlite import SQLiteStorage
+
+
+class CountingStorage(InMemoryStorage[str, str]):
+
+    def __init__(self, data: t.Optional[t.Dict[str, str]] = None) -> None:
+        super().__init__(data)
+        self.gets = 0
+
+    def get(self, key: str) -> t.Optional[str]:
+        self.gets += 1
+        return super().get(key)
+
+
+class SlowStorage(CountingStorage):
+
+    def get(self, key: str) -> t.Optional[str]:
+        sleep(0.2)
+        return super().get(key)
+
+
+class LaggingStorage(InMemoryStorage[str, str]):
+
+    def get(self, key: str) -> t.Optional[str]:
+        # the value is read before the delay, so it may be stale when it is returned
+        value = super().get(key)
+        sleep(0.2)
+        return value
+
+
+@pytest.mark.parametrize("make_storage", [
+    MemoizeStorage,
+    lambda inner: LRUCacheStorage(inner, max_entries=10),
+])
+def test_caching_storage_doesnt_cache_value_loaded_during_update(
+        make_storage: t.Callable[[Storage[str, str]], Storage[str, str]],
+) -> None:
+    storage = make_storage(LaggingStorage({"a": "1"}))
+
+    with ThreadPoolExecutor(1) as executor:
+        stale_get = executor.submit(storage.get, "a")
+        sleep(0.05)
+        storage.update("a", "2")
+
+        assert stale_get.result() == "1"
+
+    assert storage.get("a") == "2"
+
+
+def test_memoize_storage_coalesces_concurrent_misses() -> None:
+    inner = SlowStorage({"a": "1"})
+    storage = MemoizeStorage(inner)
+
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(storage.get, ["a"] * 4))
+
+    assert results == ["1"] * 4
+    assert inner.gets == 1
+
+
+def test_lru_cache_storage_evicts_least_recently_used() -> None:
+    inner = CountingStorage({"a": "1", "b": "2", "c": "3"})
+    storage = LRUCacheStorage(inner, max_entries=2, size_estimator=len)
+
+    assert [storage.get(key) for key in ["a", "b", "a", "c", "a", "b"]] == ["1", "2", "1", "3", "1", "2"]
+    assert inner.gets == 4
+    assert storage.stats == CacheStats(hits=2, misses=4, evictions=2, entries=2, size=2)
+
+
+def test_lru_cache_storage_bounds_size_and_expires_entries() -> None:
+    now = 0.0
+    inner = CountingStorage({"a": "1" * 10, "b": "2" * 10})
+    storage = LRUCacheStorage(inner, max_size=15, ttl=1.0, size_estimator=len, clock=lambda: now)
+
+    storage.get("a")
+    storage.get("b")
+    storage.get("b")
+    assert storage.stats.evictions == 1 and storage.stats.size == 10
+    assert inner.gets == 2
+
+    now = 2.0
+    storage.get("b")
+    assert inner.gets == 3
+
+
+def test_lru_cache_storage_drops_entry_on_update_and_remove() -> None:
+    storage = LRUCacheStorage(InMemoryStorage[str, str](), max_entries=10)
+
+    assert storage.get("a") is None
+    storage.update("a", "1")
+    assert storage.get("a") == "1"
+    assert storage.remove("a") == "1"
+    assert storage.get("a") is None
+
+
+def test_file_storage_persists_values(tmp_path: Path) -> None:
+    storage: FileStorage[str] = FileStorage(tmp_path)
+
+    assert storage.get("foo/bar") is None
+    storage.update("foo/bar", b"1")
+    storage.update("foo/bar", b"2")
+
+    assert FileStorage[str](tmp_path).get("foo/bar") == b"2"
+    assert storage.remove("foo/bar") == b"2"
+    assert storage.get("foo/bar") is None
+    assert storage.remove("foo/bar") is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_file_storage_maps_large_values(tmp_path: Path) -> None:
+    storage: FileStorage[str] = FileStorage(tmp_path, mmap_threshold=8)
+    storage.update("foo", b"x" * 16)
+
+    old_value = storage.get("foo")
+    storage.update("foo", b"y" * 16)
+    new_value = storage.get("foo")
+
+    assert isinstance(old_value, mmap.mmap)
+    assert bytes(old_value) == b"x" * 16
+    assert new_value is not None and bytes(new_value) == b"y" * 16
+
+
+def test_sqlite_storage_persists_concurrent_writes(tmp_path: Path) -> None:
+    storage: SQLiteStorage[str] = SQLiteStorage(tmp_path / "models.db")
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda i: storage.update(f"key-{i % 10}", str(i).encode()), range(100)))
+
+    assert storage.remove("key-3") is not None
+    assert storage.remove("key-3") is None
+    storage.close()
+
+    reopened: SQLiteStorage[str] = SQLiteStorage(tmp_path / "models.db")
+    assert reopened.get("key-3") is None
+    assert all(reopened.get(f"key-{i}") is not None for i in range(10) if i != 3)
+    reopened.close()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork is not supported")
+def test_shared_memory_storage_is_shared_by_forked_processes() -> None:
+    from ml2service.storages.shared_memory import SharedMemoryStorage
+
+    storage: SharedMemoryStorage[str] = SharedMemoryStorage(f"ml2stest{os.getpid()}", capacity=4)
+
+    try:
+        storage.update("foo", b"foo-1")
+        value = storage.get("foo")
+        assert isinstance(t.cast(object, value), memoryview)
+        assert value == b"foo-1"
+
+        pid = os.fork()
+        if pid == 0:
+            ok = storage.get("foo") == b"foo-1"
+            storage.update("foo", b"foo-2")
+            storage.update("bar", b"bar-1")
+            os._exit(0 if ok else 1)
+
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
+
+        # the value returned before the replacement stays valid
+        assert value == b"foo-1"
+        assert storage.get("foo") == b"foo-2"
+        assert storage.remove("bar") == b"bar-1"
+        assert storage.get("bar") is None
+
+        for key in ("a", "b", "c"):
+            storage.update(key, key.encode())
+
+        with pytest.raises(RuntimeError):
+            storage.update("d", b"d")
+
+    finally:
+        # the values must not outlive the storage mappings
+        value = None
+        storage.destroy()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork is not supported")
+def test_shared_memory_storage_is_thread_safe_and_full_index_fails_training() -> None:
+    from ml2service.storages.shared_memory import SharedMemoryStorage
+
+    name = f"ml2stest{os.getpid()}t"
+    storage: SharedMemoryStorage[str] = SharedMemoryStorage(name, capacity=1)
+
+    def write_and_read(i: int) -> bool:
+        storage.update("foo", str(i).encode())
+        return storage.get("foo") is not None
+
+    try:
+        with ThreadPoolExecutor(8) as executor:
+            assert all(executor.map(write_and_read, range(200)))
+
+        service = DynamicModelService(FooDynamicModelTrainer(), SerializedStorage(storage, PickleSerializer()))
+        assert isinstance(service.train(TrainRequest(key="bar", input_=1)), TrainInternalErrorResponse)
+
+    finally:
+        storage.destroy()
+
+    assert not (Path(tempfile.gettempdir()) / f"{name}.lock").exists()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork is not supported")
+def test_shared_memory_storage_empties_removed_slots() -> None:
+    from multiprocessing.shared_memory import SharedMemory
+
+    from ml2service.storages.shared_memory import SharedMemoryStorage
+
+    name = f"ml2stest{os.getpid()}r"
+    storage: SharedMemoryStorage[str] = SharedMemoryStorage(name, capacity=8)
+    keys = [f"key-{i}" for i in range(6)]
+
+    try:
+        for _ in range(3):
+            for key in keys:
+                storage.update(key, key.encode())
+
+            for key in keys:
+                assert storage.remove(key) == key.encode()
+
+        # no deleted slots are left to be probed past (16 bytes header, 40 bytes slots starting with the state)
+        index = SharedMemory(f"{name}-index")
+        buffer = index.buf
+        assert buffer is not None
+        assert [buffer[16 + slot * 40] for slot in range(8)] == [0] * 8
+        del buffer
+        index.close()
+
+    finally:
+        storage.destroy()
+
+
+def test_sharded_storage_spreads_keys_and_moves_few_on_new_shard() -> None:
+    from ml2service.storages.sharded import ShardedStorage
+
+    shards: t.Dict[str, InMemoryStorage[str, str]] = {name: InMemoryStorage() for name in "abc"}
+    storage = ShardedStorage(shards)
+    keys = [f"key-{i}" for i in range(3000)]
+
+    for key in keys:
+        storage.update(key, key)
+
+    assert all(storage.get(key) == key for key in keys)
+    assert all(700 < sum(shard.get(key) is not None for key in keys) < 1300 for shard in shards.values())
+
+    grown = ShardedStorage({**shards, "d": InMemoryStorage[str, str]()})
+    moved = sum(grown.get_shard(key) is not storage.get_shard(key) for key in keys)
+    assert 450 < moved < 1050
+
+
+def test_estimate_deep_size_accounts_object_graph() -> None:
+    class Weights:
+        def __init__(self, values: t.List[bytes]) -> None:
+            self.values = values
+
+    values = [bytes(1000) for _ in range(10)]
+    weights = Weights(values)
+
+    assert estimate_deep_size(weights) > 10 * 1000
+    # the shared objects are accounted once
+    assert estimate_deep_size([weights, weights]) < estimate_deep_size(weights) + 1000
+
+
+def test_estimate_deep_size_bounds_walk_of_large_graph() -> None:
+    values = [float(i) for i in range(100_000)]
+
+    size = estimate_deep_size(values, max_objects=len(values) + 1)
+    approximate_size = estimate_deep_size(values, max_objects=100)
+
+    assert size > 100_000 * 24
+    assert 0.9 * size < approximate_size < 1.1 * size